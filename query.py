@@ -0,0 +1,353 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import csv
+import datetime
+import decimal
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from sqlbuilder import Composer
+from sqlcache import ResultCache
+from sqlclient import SQLClient
+from sqlschema import BigQuerySchemaSource, JSONSchemaSource, SchemaRegistry
+from sqlservice import ClientPool, QueryServer, QueryService
+
+logger = logging.getLogger('Query')
+
+class NDJSONWriter(object):
+    DEFINITION = 'definition'
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def _default(self, value):
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.isoformat()
+        if isinstance(value, decimal.Decimal):
+            return str(value)
+        return repr(value)
+
+    def writeRecord(self, record):
+        line = json.dumps(record, default=self._default)
+        with self._lock:
+            self._stream.write(line + '\n')
+
+    def writeRow(self, definition, columns, row):
+        record = {self.DEFINITION: definition}
+        record.update(zip(columns, row))
+        self.writeRecord(record)
+
+    def flush(self):
+        with self._lock:
+            self._stream.flush()
+
+
+class CSVWriter(NDJSONWriter):
+
+    def __init__(self, stream):
+        super(CSVWriter, self).__init__(stream)
+        self._blocks = OrderedDict()
+        self._columns = [self.DEFINITION]
+
+    def writeRecord(self, record):
+        with self._lock:
+            for column in record.keys():
+                if column not in self._columns:
+                    self._columns.append(column)
+            self._blocks.setdefault(record[self.DEFINITION], []).append(record)
+
+    def flush(self):
+        with self._lock:
+            if self._blocks:
+                writer = csv.DictWriter(self._stream, self._columns, restval='')
+                writer.writeheader()
+                for block in self._blocks.values():
+                    writer.writerows(block)
+                self._blocks = OrderedDict()
+            self._stream.flush()
+
+
+class BatchRunner(object):
+    EXTENSION = '.json'
+    FORMAT_CSV = 'csv'
+    FORMAT_NDJSON = 'ndjson'
+    WRITERS = {FORMAT_CSV: CSVWriter, FORMAT_NDJSON: NDJSONWriter}
+    FIELD_BYTES = 'bytes'
+    FIELD_ERROR = 'error'
+    FIELD_SQL = 'sql'
+
+    PROGRESS = "[{}/{}] {}: {} rows in {:.2f}s\n"
+    PROGRESS_FAILED = "[{}/{}] {}: failed, {}\n"
+    SUMMARY = "{} definitions, {} rows, {} failed in {:.2f}s\n"
+    NO_DEFINITIONS = "No query definitions found in {}"
+
+    def __init__(self, client, workers=4, streams=1, timeout=None, progress=None, registry=None):
+        self._client = None
+        self._completed = 0
+        self._failed = 0
+        self._progress = None
+        self._registry = None
+        self._rows = 0
+        self._streams = None
+        self._timeout = None
+        self._workers = None
+        self._lock = threading.Lock()
+        self._setup(client, workers, streams, timeout, progress, registry)
+
+    @property
+    def client(self):
+        return self._client
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    @property
+    def failed(self):
+        return self._failed
+
+    @property
+    def progress(self):
+        return self._progress
+    @progress.setter
+    def progress(self, progress):
+        self._progress = progress
+
+    @property
+    def registry(self):
+        return self._registry
+    @registry.setter
+    def registry(self, registry):
+        self._registry = registry
+
+    @property
+    def rows(self):
+        return self._rows
+
+    @property
+    def streams(self):
+        return self._streams
+    @streams.setter
+    def streams(self, streams):
+        self._streams = streams
+
+    @property
+    def timeout(self):
+        return self._timeout
+    @timeout.setter
+    def timeout(self, timeout):
+        self._timeout = timeout
+
+    @property
+    def workers(self):
+        return self._workers
+    @workers.setter
+    def workers(self, workers):
+        self._workers = workers
+
+    def _setup(self, client, workers, streams, timeout, progress, registry):
+        self.client = client
+        self.workers = workers
+        self.streams = streams
+        self.timeout = timeout
+        self.progress = progress
+        self.registry = registry
+
+    @classmethod
+    def definitions(cls, paths):
+        definitions = []
+        for path in paths:
+            if os.path.isdir(path):
+                definitions += sorted(
+                    os.path.join(path, name) for name in os.listdir(path) if name.endswith(cls.EXTENSION)
+                )
+            else:
+                definitions.append(path)
+        if not definitions:
+            logger.error(cls.NO_DEFINITIONS.format(', '.join(paths)))
+            raise Exception(cls.NO_DEFINITIONS.format(', '.join(paths)))
+        return definitions
+
+    def _name(self, path):
+        return os.path.splitext(os.path.basename(path))[0]
+
+    def compile(self, paths):
+        compiled = []
+        for path in self.definitions(paths):
+            try:
+                composer = Composer(path)
+                if self.registry is not None:
+                    self.registry.check(composer)
+                compiled.append((self._name(path), composer.buildQuery(), None))
+            except Exception as error:
+                compiled.append((self._name(path), None, str(error)))
+        return compiled
+
+    def _report(self, total, name, rows, elapsed, error=None):
+        with self._lock:
+            self._completed += 1
+            self._rows += rows
+            if error is not None:
+                self._failed += 1
+            if self.progress is None:
+                return
+            if error is None:
+                self.progress.write(self.PROGRESS.format(self._completed, total, name, rows, elapsed))
+            else:
+                self.progress.write(self.PROGRESS_FAILED.format(self._completed, total, name, error.splitlines()[0]))
+            self.progress.flush()
+
+    def _execute(self, writer, total, name, sql):
+        start = time.time()
+        rows = 0
+        try:
+            handle = self.client.submit(sql, streams=self.streams, timeout=self.timeout)
+            for row in handle:
+                writer.writeRow(name, handle.columns, row)
+                rows += 1
+        except Exception as error:
+            writer.writeRecord({writer.DEFINITION: name, self.FIELD_ERROR: str(error)})
+            self._report(total, name, rows, time.time() - start, str(error))
+            return
+        self._report(total, name, rows, time.time() - start)
+
+    def _describe(self, writer, total, name, sql, estimate):
+        record = {writer.DEFINITION: name, self.FIELD_SQL: sql}
+        try:
+            if estimate:
+                record[self.FIELD_BYTES] = self.client.estimate(sql)
+        except Exception as error:
+            record[self.FIELD_ERROR] = str(error)
+            self._report(total, name, 0, 0.0, str(error))
+        else:
+            self._report(total, name, 0, 0.0)
+        writer.writeRecord(record)
+
+    def run(self, paths, writer, dryRun=False, estimate=False):
+        start = time.time()
+        compiled = self.compile(paths)
+        total = len(compiled)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for name, sql, error in compiled:
+                if error is not None:
+                    writer.writeRecord({writer.DEFINITION: name, self.FIELD_ERROR: error})
+                    self._report(total, name, 0, 0.0, error)
+                elif dryRun or estimate:
+                    pool.submit(self._describe, writer, total, name, sql, estimate)
+                else:
+                    pool.submit(self._execute, writer, total, name, sql)
+        writer.flush()
+        if self.progress is not None:
+            self.progress.write(self.SUMMARY.format(total, self.rows, self.failed, time.time() - start))
+        return self.failed
+
+
+class CommandLine(object):
+    COMMAND_RUN = 'run'
+    COMMAND_SERVE = 'serve'
+    LIVE_SCHEMA = '-'
+    STDOUT = '-'
+
+    def __init__(self, client=None):
+        self._client = client
+
+    def parser(self):
+        parser = argparse.ArgumentParser(prog='python -m query')
+        commands = parser.add_subparsers(dest='command')
+        commands.required = True
+        run = commands.add_parser(self.COMMAND_RUN, help='run query definitions and stream their rows')
+        run.add_argument('paths', nargs='+', help='definition files or directories of .json definitions')
+        run.add_argument('--workers', type=int, default=4, help='definitions executed concurrently')
+        run.add_argument('--streams', type=int, default=1, help='parallel download streams per definition')
+        run.add_argument('--timeout', type=float, default=None, help='per definition timeout in seconds')
+        run.add_argument('--out', default=self.STDOUT, help='output file, - for standard output')
+        run.add_argument('--format', choices=sorted(BatchRunner.WRITERS.keys()), default=None,
+                         help='output format, inferred from --out extension by default')
+        run.add_argument('--dry-run', action='store_true', help='only compile definitions and print their SQL')
+        run.add_argument('--estimate', action='store_true', help='report bytes each definition would process')
+        run.add_argument('--quiet', action='store_true', help='disable progress reporting')
+        run.add_argument('--schema', default=None,
+                         help='validate definitions before submission, against a JSON schema file or - for live tables')
+        run.add_argument('--schema-cache', default=None, help='directory caching fetched table schemas')
+        run.add_argument('--schema-ttl', type=float, default=SchemaRegistry.TTL, help='schema cache TTL in seconds')
+        serve = commands.add_parser(self.COMMAND_SERVE, help='serve definitions and SQL over HTTP')
+        serve.add_argument('--host', default=QueryServer.HOST, help='address to listen on')
+        serve.add_argument('--port', type=int, default=QueryServer.PORT, help='port to listen on')
+        serve.add_argument('--clients', type=int, default=ClientPool.SIZE, help='warm clients kept in the pool')
+        serve.add_argument('--capacity', type=int, default=ResultCache.CAPACITY, help='cached result sets')
+        serve.add_argument('--ttl', type=float, default=ResultCache.TTL, help='result cache TTL in seconds')
+        serve.add_argument('--chunk', type=int, default=QueryService.CHUNK_SIZE, help='rows per streamed chunk')
+        return parser
+
+    def _format(self, arguments):
+        if arguments.format is not None:
+            return arguments.format
+        if arguments.out.lower().endswith('.' + BatchRunner.FORMAT_CSV):
+            return BatchRunner.FORMAT_CSV
+        return BatchRunner.FORMAT_NDJSON
+
+    def main(self, argv=None):
+        arguments = self.parser().parse_args(argv)
+        if arguments.command == self.COMMAND_SERVE:
+            return self.serve(arguments)
+        return self.run(arguments)
+
+    def server(self, arguments):
+        factory = SQLClient if self._client is None else (lambda: self._client)
+        service = QueryService(
+            ClientPool(factory, arguments.clients),
+            ResultCache(arguments.capacity, arguments.ttl),
+            chunkSize=arguments.chunk
+        )
+        return QueryServer(service, arguments.host, arguments.port)
+
+    def serve(self, arguments):
+        server = self.server(arguments)
+        sys.stderr.write("Serving on http://{}:{}\n".format(*server.address))
+        try:
+            server.serve()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    def registry(self, arguments, client):
+        if arguments.schema is None:
+            return None
+        if arguments.schema == self.LIVE_SCHEMA:
+            source = BigQuerySchemaSource((client or SQLClient()).client)
+        else:
+            source = JSONSchemaSource(arguments.schema)
+        return SchemaRegistry(source, arguments.schema_cache, arguments.schema_ttl)
+
+    def run(self, arguments):
+        client = self._client
+        if client is None and (arguments.estimate or not arguments.dry_run):
+            client = SQLClient()
+        runner = BatchRunner(
+            client,
+            arguments.workers,
+            arguments.streams,
+            arguments.timeout,
+            None if arguments.quiet else sys.stderr,
+            self.registry(arguments, client)
+        )
+        if arguments.out == self.STDOUT:
+            stream = sys.stdout
+        else:
+            stream = open(arguments.out, 'w', newline='')
+        try:
+            writer = BatchRunner.WRITERS[self._format(arguments)](stream)
+            failed = runner.run(arguments.paths, writer, arguments.dry_run, arguments.estimate)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        return 1 if failed else 0
+
+
+if "__main__" == __name__:
+    sys.exit(CommandLine().main())
@@ -0,0 +1,217 @@
+from collections import OrderedDict
+import logging
+import threading
+
+from sqlbuilder import AggregationFunction, Condition
+from sqlrollup import Rollup
+
+logger = logging.getLogger('SQLAggregate')
+
+class CachedResult(object):
+
+    def __init__(self, composer, rows):
+        self._columns = None
+        self._composer = None
+        self._dimensions = None
+        self._measures = None
+        self._rows = None
+        self._setup(composer, rows)
+
+    @property
+    def columns(self):
+        return self._columns
+    @columns.setter
+    def columns(self, columns):
+        self._columns = columns
+
+    @property
+    def composer(self):
+        return self._composer
+    @composer.setter
+    def composer(self, composer):
+        self._composer = composer
+
+    @property
+    def dimensions(self):
+        return self._dimensions
+    @dimensions.setter
+    def dimensions(self, dimensions):
+        self._dimensions = dimensions
+
+    @property
+    def measures(self):
+        return self._measures
+    @measures.setter
+    def measures(self, measures):
+        self._measures = measures
+
+    @property
+    def rows(self):
+        return self._rows
+    @rows.setter
+    def rows(self, rows):
+        self._rows = rows
+
+    def _setup(self, composer, rows):
+        self.composer = composer
+        self.rows = list(rows)
+        self.dimensions = [
+            clause.field for position, clause in sorted(composer.groupByClauses.clauses.items())
+        ]
+        self.measures = {}
+        for offset, (position, clause) in enumerate(sorted(composer.valueClauses.clauses.items())):
+            if clause.modifier is None and clause.order is None:
+                self.measures[(clause.operation, clause.field)] = len(self.dimensions) + offset
+        if self.rows:
+            self.columns = [list(column) for column in zip(*self.rows)]
+        else:
+            self.columns = [[] for position in range(len(self.dimensions) + len(composer.valueClauses.clauses))]
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class LocalAggregator(object):
+    REDUCERS = {
+        AggregationFunction.MAX: max,
+        AggregationFunction.MIN: min,
+        AggregationFunction.SUM: sum,
+    }
+
+    def __init__(self, capacity=32):
+        self._capacity = None
+        self._entries = None
+        self._lock = threading.Lock()
+        self._setup(capacity)
+
+    @property
+    def capacity(self):
+        return self._capacity
+    @capacity.setter
+    def capacity(self, capacity):
+        self._capacity = capacity
+
+    @property
+    def entries(self):
+        return self._entries
+    @entries.setter
+    def entries(self, entries):
+        self._entries = entries
+
+    def _setup(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def _complete(self, composer, rows):
+        if composer.havingClauses.clauses or composer.offset:
+            return False
+        if composer.limit and len(rows) >= composer.limit:
+            return False
+        for position, clause in composer.groupByClauses.clauses.items():
+            if clause.aggregation or clause.limit:
+                return False
+        return True
+
+    def remember(self, composer, rows):
+        if not self._complete(composer, rows):
+            return False
+        with self._lock:
+            self.entries[composer.buildQuery()] = CachedResult(composer, rows)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        return True
+
+    def _answerable(self, composer, entry):
+        if composer.scanClauses() != entry.composer.scanClauses():
+            return False
+        for position, clause in composer.groupByClauses.clauses.items():
+            if clause.aggregation or clause.limit or clause.field not in entry.dimensions:
+                return False
+        for position, clause in composer.valueClauses.clauses.items():
+            if clause.operation not in Rollup.PARTIALS.keys():
+                return False
+            if clause.modifier is not None or clause.order is not None:
+                return False
+            for operation in Rollup.PARTIALS[clause.operation]:
+                if (operation, clause.field) not in entry.measures.keys():
+                    return False
+        return True
+
+    def lookup(self, composer):
+        with self._lock:
+            candidates = [
+                (key, entry) for key, entry in self.entries.items()
+                if self._answerable(composer, entry)
+            ]
+            if not candidates:
+                return None
+            key, entry = min(candidates, key=lambda candidate: len(candidate[1]))
+            self.entries.move_to_end(key)
+        return entry
+
+    def answer(self, composer):
+        entry = self.lookup(composer)
+        if entry is None:
+            return None
+        return self._aggregate(composer, entry)
+
+    def _reduce(self, operation, values):
+        values = [value for value in values if value is not None]
+        if not values:
+            return 0 if operation == AggregationFunction.COUNT else None
+        return self.REDUCERS[Rollup.MERGE[operation]](values)
+
+    def _aggregate(self, composer, entry):
+        fields = [clause.field for position, clause in sorted(composer.groupByClauses.clauses.items())]
+        keys = [entry.columns[entry.dimensions.index(field)] for field in fields]
+        groups = OrderedDict()
+        if not fields:
+            groups[()] = list(range(len(entry)))
+        for index, key in enumerate(zip(*keys) if keys else []):
+            groups.setdefault(key, []).append(index)
+        columns = [list(column) for column in zip(*groups.keys())] or [[] for field in fields]
+        for position, clause in sorted(composer.valueClauses.clauses.items()):
+            partials = []
+            for operation in Rollup.PARTIALS[clause.operation]:
+                source = entry.columns[entry.measures[(operation, clause.field)]]
+                partials.append([
+                    self._reduce(operation, [source[index] for index in indexes])
+                    for indexes in groups.values()
+                ])
+            if clause.operation == AggregationFunction.AVG:
+                columns.append([
+                    total / count if total is not None and count else None
+                    for total, count in zip(*partials)
+                ])
+            else:
+                columns.append(partials[0])
+        rows = list(zip(*columns)) if groups else []
+        rows = self._having(composer, rows, len(fields))
+        composer.sortRows(rows)
+        offset = composer.offset or 0
+        if composer.limit:
+            return rows[offset:offset + composer.limit]
+        return rows[offset:]
+
+    def _having(self, composer, rows, width):
+        if not composer.havingClauses.clauses:
+            return rows
+        positions = sorted(composer.valueClauses.clauses.keys())
+        for position, clause in sorted(composer.havingClauses.clauses.items()):
+            column = width + positions.index(composer.valuePosition(clause.value))
+            condition = Condition(clause.value, clause.operator, clause.operand)
+            rows = [row for row in rows if condition.evaluate(row[column])]
+        return rows
+
+    def query(self, client, composer):
+        rows = self.answer(composer)
+        if rows is not None:
+            return rows
+        client.query(composer.buildQuery())
+        rows = client.fetchall()
+        self.remember(composer, rows)
+        return rows
+
+
+if "__main__" == __name__:
+    print("SQLAggregate is a package file, execution has no effects.\nTo execute tests suite run testsqlaggregate.py")
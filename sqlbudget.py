@@ -0,0 +1,249 @@
+import logging
+import re
+import threading
+import time
+
+from sqlstore import ResultStore
+
+logger = logging.getLogger('SQLBudget')
+
+class LedgerEntry(object):
+
+    def __init__(self, sqlquery, estimate, action, original=None):
+        self._action = None
+        self._actual = None
+        self._estimate = None
+        self._original = None
+        self._sqlquery = None
+        self._timestamp = None
+        self._setup(sqlquery, estimate, action, original)
+
+    @property
+    def action(self):
+        return self._action
+    @action.setter
+    def action(self, action):
+        self._action = action
+
+    @property
+    def actual(self):
+        return self._actual
+    @actual.setter
+    def actual(self, actual):
+        self._actual = actual
+
+    @property
+    def estimate(self):
+        return self._estimate
+    @estimate.setter
+    def estimate(self, estimate):
+        self._estimate = estimate
+
+    @property
+    def original(self):
+        return self._original
+    @original.setter
+    def original(self, original):
+        self._original = original
+
+    @property
+    def sqlquery(self):
+        return self._sqlquery
+    @sqlquery.setter
+    def sqlquery(self, sqlquery):
+        self._sqlquery = sqlquery
+
+    @property
+    def timestamp(self):
+        return self._timestamp
+    @timestamp.setter
+    def timestamp(self, timestamp):
+        self._timestamp = timestamp
+
+    def _setup(self, sqlquery, estimate, action, original):
+        self.sqlquery = sqlquery
+        self.estimate = estimate
+        self.action = action
+        self.original = sqlquery if original is None else original
+        self.timestamp = time.time()
+
+    def charged(self):
+        if self.action == BytesBudget.REFUSE:
+            return 0
+        if self.actual is not None:
+            return self.actual
+        return self.estimate
+
+    def __repr__(self):
+        return "LedgerEntry({}, estimate={}, actual={})".format(self.action, self.estimate, self.actual)
+
+
+class BytesBudget(object):
+    ALLOW = 'ALLOW'
+    DEGRADE = 'DEGRADE'
+    REFUSE = 'REFUSE'
+
+    SAMPLE_PERCENT = 10
+    THRESHOLD = 0.8
+    SAMPLE = "{} TABLESAMPLE SYSTEM ({} PERCENT)"
+    SAMPLE_SOURCE = re.compile(r'(\bFROM\s+`[^`]+`)(?!\s+TABLESAMPLE)', re.IGNORECASE)
+    AGGREGATE = re.compile(r'\b(\w+)\s*\(', re.IGNORECASE)
+    ADDITIVE = ('COUNT', 'SUM')
+    UNBIASED = ('AVG',)
+    NOT_SCALABLE = ('ANY_VALUE', 'APPROX_COUNT_DISTINCT', 'APPROX_QUANTILES', 'APPROX_TOP_COUNT', 'APPROX_TOP_SUM',
+                    'ARRAY_AGG', 'COUNTIF', 'LOGICAL_AND', 'LOGICAL_OR', 'MAX', 'MIN', 'STRING_AGG')
+    DISTINCT = re.compile(r'^\s*DISTINCT\b', re.IGNORECASE)
+    WINDOW = re.compile(r'^\s*OVER\b', re.IGNORECASE)
+    SCALED = "({} * {})"
+    SCALED_COUNT = "CAST(ROUND({} * {}) AS INT64)"
+
+    BUDGET_EXCEEDED = "Query needs {} bytes, budget has {} of {} bytes left"
+
+    def __init__(self, limit, threshold=THRESHOLD, samplePercent=SAMPLE_PERCENT, degrade=True):
+        self._degrade = None
+        self._ledger = None
+        self._limit = None
+        self._samplePercent = None
+        self._threshold = None
+        self._lock = threading.Lock()
+        self._setup(limit, threshold, samplePercent, degrade)
+
+    @property
+    def degrade(self):
+        return self._degrade
+    @degrade.setter
+    def degrade(self, degrade):
+        self._degrade = degrade
+
+    @property
+    def ledger(self):
+        return self._ledger
+    @ledger.setter
+    def ledger(self, ledger):
+        self._ledger = ledger
+
+    @property
+    def limit(self):
+        return self._limit
+    @limit.setter
+    def limit(self, limit):
+        self._limit = limit
+
+    @property
+    def samplePercent(self):
+        return self._samplePercent
+    @samplePercent.setter
+    def samplePercent(self, samplePercent):
+        self._samplePercent = samplePercent
+
+    @property
+    def threshold(self):
+        return self._threshold
+    @threshold.setter
+    def threshold(self, threshold):
+        self._threshold = threshold
+
+    def _setup(self, limit, threshold, samplePercent, degrade):
+        self.limit = limit
+        self.threshold = threshold
+        self.samplePercent = samplePercent
+        self.degrade = degrade
+        self.ledger = []
+
+    def committed(self):
+        with self._lock:
+            return sum(entry.charged() for entry in self.ledger)
+
+    def remaining(self):
+        return self.limit - self.committed()
+
+    def _closing(self, sqlQuery, start):
+        depth = 0
+        quote = None
+        for position in range(start, len(sqlQuery)):
+            character = sqlQuery[position]
+            if quote is not None:
+                if character == quote and sqlQuery[position - 1] != '\\':
+                    quote = None
+            elif character in '\'"`':
+                quote = character
+            elif character == '(':
+                depth += 1
+            elif character == ')':
+                depth -= 1
+                if depth == 0:
+                    return position
+        return None
+
+    def _scaled(self, sqlQuery):
+        factor = 100.0 / self.samplePercent
+        quoted = [match.span() for match in ResultStore.QUOTED.finditer(sqlQuery)]
+        parts = []
+        cursor = 0
+        additive = 0
+        for match in self.AGGREGATE.finditer(sqlQuery):
+            if match.start() < cursor or any(start <= match.start() < end for start, end in quoted):
+                continue
+            function = match.group(1).upper()
+            if function in self.NOT_SCALABLE:
+                return None
+            if function not in self.ADDITIVE + self.UNBIASED:
+                continue
+            end = self._closing(sqlQuery, match.end() - 1)
+            if end is None or self.WINDOW.match(sqlQuery[end + 1:]):
+                return None
+            if self.DISTINCT.match(sqlQuery[match.end():end]):
+                return None
+            if function in self.UNBIASED:
+                continue
+            expression = sqlQuery[match.start():end + 1]
+            template = self.SCALED_COUNT if function == 'COUNT' else self.SCALED
+            parts += [sqlQuery[cursor:match.start()], template.format(expression, factor)]
+            cursor = end + 1
+            additive += 1
+        if not additive:
+            return None
+        return ''.join(parts) + sqlQuery[cursor:]
+
+    def degraded(self, sqlQuery):
+        scaled = self._scaled(sqlQuery)
+        if scaled is None:
+            return sqlQuery
+        return self.SAMPLE_SOURCE.sub(
+            lambda match: self.SAMPLE.format(match.group(1), self.samplePercent),
+            scaled
+        )
+
+    def _record(self, entry):
+        self.ledger.append(entry)
+        return entry
+
+    def admit(self, sqlQuery, estimator):
+        estimate = estimator(sqlQuery)
+        with self._lock:
+            committed = sum(entry.charged() for entry in self.ledger)
+            if committed + estimate <= self.limit * self.threshold:
+                return self._record(LedgerEntry(sqlQuery, estimate, self.ALLOW))
+        if self.degrade:
+            degraded = self.degraded(sqlQuery)
+            if degraded != sqlQuery:
+                cheaper = estimator(degraded)
+                with self._lock:
+                    committed = sum(entry.charged() for entry in self.ledger)
+                    if cheaper < estimate and committed + cheaper <= self.limit:
+                        return self._record(LedgerEntry(degraded, cheaper, self.DEGRADE, sqlQuery))
+        with self._lock:
+            committed = sum(entry.charged() for entry in self.ledger)
+            if committed + estimate <= self.limit:
+                return self._record(LedgerEntry(sqlQuery, estimate, self.ALLOW))
+            self._record(LedgerEntry(sqlQuery, estimate, self.REFUSE))
+        logger.error(self.BUDGET_EXCEEDED.format(estimate, self.limit - committed, self.limit))
+        raise Exception(self.BUDGET_EXCEEDED.format(estimate, self.limit - committed, self.limit))
+
+    def settle(self, entry, actual):
+        with self._lock:
+            entry.actual = actual or 0
+
+
+if "__main__" == __name__:
+    print("SQLBudget is a package file, execution has no effects.\nTo execute tests suite run testsqlbudget.py")
@@ -1,9 +1,13 @@
 from collections import namedtuple
 from google.cloud import bigquery
+import datetime
 import json
 import logging
+import operator
 import os
 
+from sqlprofile import Profiler
+
 logger = logging.getLogger('SQLBuilder')
 
 class Field(object):
@@ -171,6 +175,98 @@ class AggregationFunction(StandardSqlFunction):
     NOT_SUPPORTED = "Aggregation function '{}' not supported"
 
 
+class Condition(object):
+    PATTERN = "{} {} {}"
+    NULL = "NULL"
+    NULL_OPERATORS = {"=": "IS", "!=": "IS NOT", "<>": "IS NOT"}
+    OPERATORS = ("=", "!=", "<>", "<", "<=", ">", ">=")
+    COMPARISONS = {
+        "=": operator.eq,
+        "!=": operator.ne,
+        "<>": operator.ne,
+        "<": operator.lt,
+        "<=": operator.le,
+        ">": operator.gt,
+        ">=": operator.ge,
+    }
+    STRING = '"{}"'
+    DATE = 'DATE "{}"'
+    TIMESTAMP = 'TIMESTAMP "{}"'
+    TRUE = "TRUE"
+    FALSE = "FALSE"
+
+    NOT_SUPPORTED = "Condition operator '{}' not supported"
+    NOT_VALID_OPERAND = "Condition operand '{}' not supported"
+
+    def __init__(self, expression, operator, operand):
+        self._expression = None
+        self._operator = None
+        self._operand = None
+        self._setup(expression, operator, operand)
+
+    def _setup(self, expression, operator, operand):
+        self.expression = expression
+        self.operator = operator
+        self.operand = operand
+
+    @property
+    def expression(self):
+        return self._expression
+    @expression.setter
+    def expression(self, expression):
+        self._expression = str(expression)
+
+    @property
+    def operator(self):
+        return self._operator
+    @operator.setter
+    def operator(self, operator):
+        if operator not in self.OPERATORS:
+            logger.error(self.NOT_SUPPORTED.format(operator))
+            raise Exception(self.NOT_SUPPORTED.format(operator))
+        self._operator = operator
+
+    @property
+    def operand(self):
+        return self._operand
+    @operand.setter
+    def operand(self, operand):
+        if operand is None and self.operator not in self.NULL_OPERATORS.keys():
+            logger.error(self.NOT_VALID_OPERAND.format(operand))
+            raise Exception(self.NOT_VALID_OPERAND.format(operand))
+        self._operand = operand
+
+    def _literal(self):
+        if self.operand is None:
+            return self.NULL
+        if isinstance(self.operand, bool):
+            return self.TRUE if self.operand else self.FALSE
+        if isinstance(self.operand, (int, float)):
+            return repr(self.operand)
+        if isinstance(self.operand, datetime.datetime):
+            return self.TIMESTAMP.format(self.operand.isoformat())
+        if isinstance(self.operand, datetime.date):
+            return self.DATE.format(self.operand.isoformat())
+        if isinstance(self.operand, str):
+            escaped = self.operand.replace('\\', '\\\\').replace('"', '\\"')
+            return self.STRING.format(escaped)
+        logger.error(self.NOT_VALID_OPERAND.format(self.operand))
+        raise Exception(self.NOT_VALID_OPERAND.format(self.operand))
+
+    def apply(self):
+        operator = self.operator
+        if self.operand is None:
+            operator = self.NULL_OPERATORS[operator]
+        return self.PATTERN.format(self.expression, operator, self._literal())
+
+    def evaluate(self, value):
+        if self.operand is None:
+            return (value is None) == (self.operator == "=")
+        if value is None:
+            return False
+        return self.COMPARISONS[self.operator](value, self.operand)
+
+
 class QueryClause(object):
 
     def __init__(self, config):
@@ -178,6 +274,7 @@ class QueryClause(object):
         self._limit = None
         self._values = None
         self._groupby = None
+        self._having = None
         self._config = None
         self._setup(config)
 
@@ -209,6 +306,13 @@ class QueryClause(object):
     def groupby(self, groupby):
         self._groupby = groupby
 
+    @property
+    def having(self):
+        return self._having
+    @having.setter
+    def having(self, having):
+        self._having = having
+
     @property
     def config(self):
         return self._config
@@ -225,6 +329,7 @@ class QueryClause(object):
         self.limit = self.config.limit
         self.values = self.config.values
         self.groupby = self.config.groupby
+        self.having = self.config.having
 
 
 class GroupByClauses(object):
@@ -416,30 +521,174 @@ class ValueClause(object):
         self.config = config
 
 
+class HavingClauses(object):
+    NOT_VALID_STRUCTURE = "Having '{}' not a valid structure"
+
+    def __init__(self, config):
+        self._clauses = None
+        self._config = None
+        self._setup(config)
+
+    @property
+    def config(self):
+        return self._config
+    @config.setter
+    def config(self, config):
+        self._config = config
+        self._parse()
+
+    @property
+    def clauses(self):
+        return self._clauses
+    @clauses.setter
+    def clauses(self, clauses):
+        self._clauses = clauses
+
+    def _parse(self):
+        if self.config.having is None:
+            self.clauses = None
+        else:
+            for position, having in enumerate(self.config.having):
+                try:
+                    handler = ConfigHandlerHaving(having)
+                    self.clauses[position] = handler()
+                except:
+                    logger.info(self.NOT_VALID_STRUCTURE.format(position))
+
+    def _setup(self, config):
+        self.clauses = {}
+        self.config = config
+
+
+class WhereClauses(object):
+    NOT_VALID_STRUCTURE = "Where '{}' not a valid structure"
+
+    def __init__(self, config):
+        self._clauses = None
+        self._config = None
+        self._setup(config)
+
+    @property
+    def config(self):
+        return self._config
+    @config.setter
+    def config(self, config):
+        self._config = config
+        self._parse()
+
+    @property
+    def clauses(self):
+        return self._clauses
+    @clauses.setter
+    def clauses(self, clauses):
+        self._clauses = clauses
+
+    def _parse(self):
+        if self.config.where is None:
+            self.clauses = None
+        else:
+            for position, where in enumerate(self.config.where):
+                try:
+                    handler = ConfigHandlerWhere(where)
+                    self.clauses[position] = handler()
+                except:
+                    logger.info(self.NOT_VALID_STRUCTURE.format(position))
+
+    def _setup(self, config):
+        self.clauses = {}
+        self.config = config
+
+
+class WithClauses(object):
+    NOT_VALID_STRUCTURE = "With '{}' not a valid structure"
+
+    def __init__(self, config):
+        self._clauses = None
+        self._config = None
+        self._setup(config)
+
+    @property
+    def config(self):
+        return self._config
+    @config.setter
+    def config(self, config):
+        self._config = config
+        self._parse()
+
+    @property
+    def clauses(self):
+        return self._clauses
+    @clauses.setter
+    def clauses(self, clauses):
+        self._clauses = clauses
+
+    def _parse(self):
+        if self.config.ctes is None:
+            self.clauses = None
+        else:
+            for position, cte in enumerate(self.config.ctes):
+                try:
+                    handler = ConfigHandlerWith(cte)
+                    self.clauses[position] = handler()
+                except:
+                    logger.info(self.NOT_VALID_STRUCTURE.format(position))
+
+    def _setup(self, config):
+        self.clauses = {}
+        self.config = config
+
+
 class Composer(object):
 
     EXPRESSION = "{} {}"
     STATEMENT_FROM = "FROM"
     STATEMENT_GROUPBY = "GROUP BY"
+    STATEMENT_HAVING = "HAVING"
     STATEMENT_LIMIT = "LIMIT"
+    STATEMENT_OFFSET = "OFFSET"
     STATEMENT_SELECT = "SELECT"
+    STATEMENT_WHERE = "WHERE"
+    STATEMENT_WITH = "WITH"
     STATEMENT_ORDERBY = "ORDER BY"
+    STATEMENT_PARTITIONBY = "PARTITION BY"
+    STATEMENT_QUALIFY = "QUALIFY"
     SEPARATOR_CLAUSES = " "
+    SEPARATOR_CONDITIONS = " AND "
     SEPARATOR_FIELDS = ", "
     TABLE_NAME_ESC = "`{}`"
+    QUALIFIER_ALL = "*"
     QUALIFIER_DISTINCT = "DISTINCT"
-
+    DIRECTION_ASC = "ASC"
+    DIRECTION_DESC = "DESC"
+    SORT_FIELD = -1
+    WINDOW = "{} OVER ({})"
+    WITH_EXPRESSION = "{} AS ({})"
+    CONDITION_TOP = "{} <= {}"
+
+    DUPLICATE_WITH = "With '{}' defined more than once"
+    INVALID_DIRECTION = "Sort direction '{}' not supported"
+    INVALID_HAVING = "Having '{}' does not reference a value clause"
+    INVALID_SORT = "Sort '{}' does not reference a value clause"
+    NOT_SORTABLE = "Value clause '{}' can not be used for sorting"
+    NOT_SUPPORTED_LIMIT = "Limit on group '{}' sorted by a value is only supported on the last group"
+
+    @Profiler.profile('Composer.__init__')
     def __init__(self, path):
         self._aliases = None
         self._fields = None
         self._groupByClauses = None
         self._groupByFields = None
+        self._havingClauses = None
         self._path = None
         self._sql = None
         self._table = None
         self._query = None
+        self._valueExpressions = None
+        self._whereClauses = None
+        self._withClauses = None
         self._setup(path)
 
+    @Profiler.profile('Composer.buildQuery')
     def buildQuery(self):
         self.sql = []
         self._with()
@@ -447,6 +696,9 @@ class Composer(object):
         self._from()
         self._where()
         self._groupby()
+        self._having()
+        self._qualify()
+        self._orderby()
         self._limit()
         self._offset()
         return self.SEPARATOR_CLAUSES.join(
@@ -456,7 +708,63 @@ class Composer(object):
         )
 
     def _with(self):
-        pass
+        withClause = self._withClause()
+        if withClause:
+            self.sql.append(withClause)
+
+    def _withClause(self):
+        if not self.withClauses.clauses:
+            return ""
+        names = []
+        expressions = []
+        for position, clause in sorted(self.withClauses.clauses.items()):
+            if clause.name in names:
+                logger.error(self.DUPLICATE_WITH.format(clause.name))
+                raise Exception(self.DUPLICATE_WITH.format(clause.name))
+            fields = self.QUALIFIER_ALL
+            if clause.fields:
+                fields = self.SEPARATOR_FIELDS.join(clause.fields)
+            subquery = [
+                self.EXPRESSION.format(self.STATEMENT_SELECT, fields),
+                self.EXPRESSION.format(self.STATEMENT_FROM, self._source(clause.table, names)),
+            ]
+            if clause.where:
+                conditions = []
+                for where in clause.where:
+                    where = ConfigHandlerWhere(where)()
+                    conditions.append(Condition(where.field, where.operator, where.operand).apply())
+                subquery.append(
+                    self.EXPRESSION.format(
+                        self.STATEMENT_WHERE,
+                        self.SEPARATOR_CONDITIONS.join(conditions)
+                    )
+                )
+            expressions.append(
+                self.WITH_EXPRESSION.format(
+                    clause.name,
+                    self.SEPARATOR_CLAUSES.join(subquery)
+                )
+            )
+            names.append(clause.name)
+        return self.EXPRESSION.format(
+            self.STATEMENT_WITH,
+            self.SEPARATOR_FIELDS.join(expressions)
+        )
+
+    def _source(self, table, names=None):
+        if names is None:
+            names = self.withNames()
+        if table in names:
+            return table
+        return self.TABLE_NAME_ESC.format(table)
+
+    def withNames(self):
+        if not self.withClauses.clauses:
+            return []
+        return [clause.name for position, clause in sorted(self.withClauses.clauses.items())]
+
+    def scanClauses(self):
+        return (self._withClause(), self._fromClause(), self._whereClause())
 
     def _select(self):
         self.sql.append(
@@ -469,15 +777,29 @@ class Composer(object):
         )
 
     def _from(self):
-        self.sql.append(
-            self.EXPRESSION.format(
-                self.STATEMENT_FROM,
-                self.TABLE_NAME_ESC.format(self.table)
-            )
+        self.sql.append(self._fromClause())
+
+    def _fromClause(self):
+        return self.EXPRESSION.format(
+            self.STATEMENT_FROM,
+            self._source(self.table)
         )
 
     def _where(self):
-        pass
+        whereClause = self._whereClause()
+        if whereClause:
+            self.sql.append(whereClause)
+
+    def _whereClause(self):
+        if not self.whereClauses.clauses:
+            return ""
+        conditions = []
+        for position, clause in sorted(self.whereClauses.clauses.items()):
+            conditions.append(Condition(clause.field, clause.operator, clause.operand).apply())
+        return self.EXPRESSION.format(
+            self.STATEMENT_WHERE,
+            self.SEPARATOR_CONDITIONS.join(conditions)
+        )
 
     def _groupby(self):
         if self.groupByFields:
@@ -489,6 +811,133 @@ class Composer(object):
             )
         )
 
+    def _having(self):
+        if self.havingClauses.clauses:
+            conditions = []
+            for position, clause in sorted(self.havingClauses.clauses.items()):
+                conditions.append(
+                    Condition(
+                        self._havingExpression(clause),
+                        clause.operator,
+                        clause.operand
+                    ).apply()
+                )
+            self.sql.append(
+                self.EXPRESSION.format(
+                    self.STATEMENT_HAVING,
+                    self.SEPARATOR_CONDITIONS.join(conditions)
+                )
+            )
+
+    def _havingExpression(self, havingClause):
+        return self.valueExpressions[self.valuePosition(havingClause.value)]
+
+    def valuePosition(self, reference):
+        if isinstance(reference, int) and not isinstance(reference, bool):
+            if reference in self.valueExpressions.keys():
+                return reference
+        else:
+            for position, valueClause in self.valueClauses.clauses.items():
+                if valueClause.alias is not None and valueClause.alias == reference:
+                    return position
+        logger.error(self.INVALID_HAVING.format(reference))
+        raise Exception(self.INVALID_HAVING.format(reference))
+
+    def _qualify(self):
+        conditions = []
+        clauses = [clause for position, clause in sorted(self.groupByClauses.clauses.items())]
+        for level, clause in enumerate(clauses):
+            if not clause.limit:
+                continue
+            partition = [partial.field for partial in clauses[:level]]
+            sort = self._sortExpression(clause)
+            if sort is None or sort == clause.field:
+                sort = clause.field
+                functional = NumberingFunction.DENSE_RANK
+            elif level == len(clauses) - 1:
+                functional = NumberingFunction.ROW_NUMBER
+            else:
+                logger.error(self.NOT_SUPPORTED_LIMIT.format(clause.field))
+                raise Exception(self.NOT_SUPPORTED_LIMIT.format(clause.field))
+            window = [
+                self.EXPRESSION.format(
+                    self.STATEMENT_ORDERBY,
+                    self.EXPRESSION.format(sort, self._sortDirection(clause))
+                )
+            ]
+            if partition:
+                window.insert(0, self.EXPRESSION.format(
+                    self.STATEMENT_PARTITIONBY,
+                    self.SEPARATOR_FIELDS.join(partition)
+                ))
+            conditions.append(self.CONDITION_TOP.format(
+                self.WINDOW.format(
+                    NumberingFunction(functional, "").apply(),
+                    self.SEPARATOR_CLAUSES.join(window)
+                ),
+                clause.limit
+            ))
+        if conditions:
+            self.sql.append(
+                self.EXPRESSION.format(
+                    self.STATEMENT_QUALIFY,
+                    self.SEPARATOR_CONDITIONS.join(conditions)
+                )
+            )
+
+    def _orderby(self):
+        orderBy = self.orderBy()
+        if orderBy:
+            self.sql.append(
+                self.EXPRESSION.format(
+                    self.STATEMENT_ORDERBY,
+                    self.SEPARATOR_FIELDS.join(
+                        [self.EXPRESSION.format(expression, direction) for expression, direction in orderBy]
+                    )
+                )
+            )
+
+    def orderBy(self):
+        orderBy = []
+        for position, clause in sorted(self.groupByClauses.clauses.items()):
+            expression = self._sortExpression(clause)
+            if expression is not None:
+                orderBy.append((expression, self._sortDirection(clause)))
+        return orderBy
+
+    def sortRows(self, rows):
+        columns = [clause.field for position, clause in sorted(self.groupByClauses.clauses.items())]
+        columns += list(self.valueExpressions.values())
+        for expression, direction in reversed(self.orderBy()):
+            position = columns.index(expression)
+            rows.sort(
+                key=lambda row: (row[position] is not None, row[position]),
+                reverse=direction == self.DIRECTION_DESC
+            )
+        return rows
+
+    def _sortExpression(self, groupByClause):
+        if groupByClause.sort is None:
+            return None
+        if groupByClause.sort == self.SORT_FIELD:
+            return groupByClause.field
+        if groupByClause.sort not in self.valueExpressions.keys():
+            logger.error(self.INVALID_SORT.format(groupByClause.sort))
+            raise Exception(self.INVALID_SORT.format(groupByClause.sort))
+        if self.valueClauses.clauses[groupByClause.sort].operation == AggregationFunction.ARRAY_AGG:
+            logger.error(self.NOT_SORTABLE.format(groupByClause.sort))
+            raise Exception(self.NOT_SORTABLE.format(groupByClause.sort))
+        return self.valueExpressions[groupByClause.sort]
+
+    def _sortDirection(self, groupByClause):
+        if groupByClause.direction is None:
+            return self.DIRECTION_ASC
+        direction = str(groupByClause.direction).upper()
+        if direction not in (self.DIRECTION_ASC, self.DIRECTION_DESC):
+            logger.error(self.INVALID_DIRECTION.format(groupByClause.direction))
+            raise Exception(self.INVALID_DIRECTION.format(groupByClause.direction))
+        return direction
+
     def _limit(self):
         if self.limit:
             self.sql.append(
@@ -533,6 +982,13 @@ class Composer(object):
     def groupByFields(self, groupByFields):
         self._groupByFields = groupByFields
 
+    @property
+    def havingClauses(self):
+        return self._havingClauses
+    @havingClauses.setter
+    def havingClauses(self, havingClauses):
+        self._havingClauses = havingClauses
+
     @property
     def path(self):
         return self._path
@@ -554,6 +1010,13 @@ class Composer(object):
     def table(self, table):
         self._table = table
 
+    @property
+    def valueExpressions(self):
+        return self._valueExpressions
+    @valueExpressions.setter
+    def valueExpressions(self, valueExpressions):
+        self._valueExpressions = valueExpressions
+
     @property
     def valueClauses(self):
         return self._valueClauses
@@ -561,6 +1024,20 @@ class Composer(object):
     def valueClauses(self, valueClauses):
         self._valueClauses = valueClauses
 
+    @property
+    def whereClauses(self):
+        return self._whereClauses
+    @whereClauses.setter
+    def whereClauses(self, whereClauses):
+        self._whereClauses = whereClauses
+
+    @property
+    def withClauses(self):
+        return self._withClauses
+    @withClauses.setter
+    def withClauses(self, withClauses):
+        self._withClauses = withClauses
+
     def _groupbyClauses(self, groupByClauses):
         self.groupByClauses = groupByClauses
 
@@ -572,8 +1049,11 @@ class Composer(object):
 
     def _parseConfig(self):
         self._parseTable()
+        self._parseWith()
+        self._parseWhere()
         self._parseGroupBy()
         self._parseValues()
+        self._parseHaving()
         self._parseLimit()
         self._parseOffset()
         self._collectFields()
@@ -581,6 +1061,16 @@ class Composer(object):
     def _parseTable(self):
         self.table = self.config.config[ConfigHandlerQuery.TABLE]
 
+    def _parseWith(self):
+        configHandlerQuery = ConfigHandlerQuery(self.config.config)
+        configuration = configHandlerQuery()
+        self.withClauses = WithClauses(configuration)
+
+    def _parseWhere(self):
+        configHandlerQuery = ConfigHandlerQuery(self.config.config)
+        configuration = configHandlerQuery()
+        self.whereClauses = WhereClauses(configuration)
+
     def _parseGroupBy(self):
         configHandlerQuery = ConfigHandlerQuery(self.config.config)
         configInstance = configHandlerQuery()
@@ -591,6 +1081,11 @@ class Composer(object):
         configuration = configHandlerQuery()
         self.valueClauses = ValueClauses(configuration)
 
+    def _parseHaving(self):
+        configHandlerQuery = ConfigHandlerQuery(self.config.config)
+        configuration = configHandlerQuery()
+        self.havingClauses = HavingClauses(configuration)
+
     def _parseLimit(self):
         if ConfigHandlerQuery.LIMIT in self.config.config.keys():
             self.limit = self.config.config[ConfigHandlerQuery.LIMIT]
@@ -606,6 +1101,7 @@ class Composer(object):
     def _collectFields(self):
         self.fields = FieldCollection()
         self.groupByFields = FieldCollection()
+        self.valueExpressions = {}
         for index, groupByClause in self.groupByClauses.clauses.items():
             if groupByClause.alias:
                 self.fields.addField(
@@ -616,24 +1112,29 @@ class Composer(object):
                 self.fields.addField(groupByClause.field)
             self.groupByFields.addField(groupByClause.field)
         for index, valueClause in self.valueClauses.clauses.items():
-            # @TODO: Add support for date aggregation
-            expression = valueClause.field
-            if valueClause.modifier is not None:
-                expression = self.EXPRESSION.format(valueClause.modifier, expression)
-            if valueClause.order is not None:
-                order = self.EXPRESSION.format(self.STATEMENT_ORDERBY, valueClause.field)
-                direction = self.EXPRESSION.format(order, valueClause.direction)
-                expression = self.EXPRESSION.format(expression, direction)
-            if valueClause.operation == AggregationFunction.ARRAY_AGG and valueClause.arrayLimit:
-                limit = self.EXPRESSION.format(self.STATEMENT_LIMIT, valueClause.arrayLimit)
-                expression = self.EXPRESSION.format(expression, limit)
-            expression = AggregationFunction(
-                valueClause.operation,
-                expression,
-            ).apply()
+            expression = self._valueExpression(valueClause)
+            self.valueExpressions[index] = expression
             self.fields.addField(expression, alias=valueClause.alias)
 
+    def _valueExpression(self, valueClause):
+        # @TODO: Add support for date aggregation
+        expression = valueClause.field
+        if valueClause.modifier is not None:
+            expression = self.EXPRESSION.format(valueClause.modifier, expression)
+        if valueClause.order is not None:
+            order = self.EXPRESSION.format(self.STATEMENT_ORDERBY, valueClause.field)
+            direction = self.EXPRESSION.format(order, valueClause.direction)
+            expression = self.EXPRESSION.format(expression, direction)
+        if valueClause.operation == AggregationFunction.ARRAY_AGG and valueClause.arrayLimit:
+            limit = self.EXPRESSION.format(self.STATEMENT_LIMIT, valueClause.arrayLimit)
+            expression = self.EXPRESSION.format(expression, limit)
+        return AggregationFunction(
+            valueClause.operation,
+            expression,
+        ).apply()
+
 class Configuration():
+    INLINE = "<definition>"
 
     def __init__(self, path):
         self._path = None
@@ -655,8 +1156,12 @@ class Configuration():
         self._config = config
 
     def _setup(self, path):
-        self.path = path
-        self._load()
+        if isinstance(path, dict):
+            self.path = self.INLINE
+            self.config = path
+        else:
+            self.path = path
+            self._load()
 
     def _load(self):
         try:
@@ -703,10 +1208,15 @@ class ConfigurationHandler(object):
 
 class ConfigHandlerQuery(ConfigurationHandler):
     GROUPBY = 'GROUP_BY'
+    HAVING  = 'HAVING'
     LIMIT   = 'TOTAL_LIMIT'
     OFFSET  = 'OFFSET'
     TABLE   = 'TABLE_NAME'
     VALUES  = 'VALUES'
+    WHERE   = 'WHERE'
+    WITH    = 'WITH'
+
+    MISSING_TABLE = ConfigurationHandler.MISSING_FIELD
 
     def _parse(self):
         try:
@@ -720,14 +1230,23 @@ class ConfigHandlerQuery(ConfigurationHandler):
             groupby = None
             if self.GROUPBY in self.config.keys():
                 groupby = self.config[self.GROUPBY]
+            having = None
+            if self.HAVING in self.config.keys():
+                having = self.config[self.HAVING]
+            ctes = None
+            if self.WITH in self.config.keys():
+                ctes = self.config[self.WITH]
+            where = None
+            if self.WHERE in self.config.keys():
+                where = self.config[self.WHERE]
         except:
             logger.error(self.MISSING_TABLE.format(self.TABLE))
             raise Exception(self.MISSING_TABLE.format(self.TABLE))
         Configuration = namedtuple(
             'Configuration',
-            'table limit values groupby'
+            'table limit values groupby having ctes where'
         )
-        self.config = Configuration(table, limit, values, groupby)
+        self.config = Configuration(table, limit, values, groupby, having, ctes, where)
 
 
 class ConfigHandlerValue(ConfigurationHandler):
@@ -826,5 +1345,88 @@ class ConfigHandlerGroupBy(ConfigurationHandler):
         )
 
 
+class ConfigHandlerHaving(ConfigurationHandler):
+    OPERAND     = 'Operand'
+    OPERATOR    = 'Operator'
+    VALUE       = 'Value'
+
+    def _parse(self):
+        try:
+            value = self.config[self.VALUE]
+            operator = self.config[self.OPERATOR]
+            operand = None
+            if self.OPERAND in self.config.keys():
+                operand = self.config[self.OPERAND]
+        except:
+            logger.error(self.MISSING_FIELD.format(self.VALUE))
+            raise Exception(self.MISSING_FIELD.format(self.VALUE))
+        Configuration = namedtuple(
+            'Configuration',
+            'operand operator value'
+        )
+        self.config = Configuration(
+            operand,
+            operator,
+            value
+        )
+
+
+class ConfigHandlerWhere(ConfigurationHandler):
+    FIELD       = 'Field'
+    OPERAND     = 'Operand'
+    OPERATOR    = 'Operator'
+
+    def _parse(self):
+        try:
+            field = self.config[self.FIELD]
+            operator = self.config[self.OPERATOR]
+            operand = None
+            if self.OPERAND in self.config.keys():
+                operand = self.config[self.OPERAND]
+        except:
+            logger.error(self.MISSING_FIELD.format(self.FIELD))
+            raise Exception(self.MISSING_FIELD.format(self.FIELD))
+        Configuration = namedtuple(
+            'Configuration',
+            'field operand operator'
+        )
+        self.config = Configuration(
+            field,
+            operand,
+            operator
+        )
+
+
+class ConfigHandlerWith(ConfigurationHandler):
+    FIELDS      = 'Fields'
+    NAME        = 'Name'
+    TABLE       = 'Table'
+    WHERE       = 'Where'
+
+    def _parse(self):
+        try:
+            name = self.config[self.NAME]
+            table = self.config[self.TABLE]
+            fields = None
+            if self.FIELDS in self.config.keys():
+                fields = self.config[self.FIELDS]
+            where = None
+            if self.WHERE in self.config.keys():
+                where = self.config[self.WHERE]
+        except:
+            logger.error(self.MISSING_FIELD.format(self.NAME))
+            raise Exception(self.MISSING_FIELD.format(self.NAME))
+        Configuration = namedtuple(
+            'Configuration',
+            'fields name table where'
+        )
+        self.config = Configuration(
+            fields,
+            name,
+            table,
+            where
+        )
+
+
 if "__main__" == __name__:
     print("SQLBuilder is a package file, execution has no effects.\nTo execute tests suite run testsqlbuilder.py")
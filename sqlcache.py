@@ -0,0 +1,362 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
+import math
+import threading
+import time
+import traceback
+
+logger = logging.getLogger('SQLCache')
+
+class CacheEntry(object):
+
+    def __init__(self, value, expires, loader=None, ttl=None):
+        self._accessed = None
+        self._created = None
+        self._expires = None
+        self._frequency = None
+        self._loader = None
+        self._ttl = None
+        self._value = None
+        self._setup(value, expires, loader, ttl)
+
+    @property
+    def accessed(self):
+        return self._accessed
+    @accessed.setter
+    def accessed(self, accessed):
+        self._accessed = accessed
+
+    @property
+    def created(self):
+        return self._created
+    @created.setter
+    def created(self, created):
+        self._created = created
+
+    @property
+    def expires(self):
+        return self._expires
+    @expires.setter
+    def expires(self, expires):
+        self._expires = expires
+
+    @property
+    def frequency(self):
+        return self._frequency
+    @frequency.setter
+    def frequency(self, frequency):
+        self._frequency = frequency
+
+    @property
+    def loader(self):
+        return self._loader
+    @loader.setter
+    def loader(self, loader):
+        self._loader = loader
+
+    @property
+    def ttl(self):
+        return self._ttl
+    @ttl.setter
+    def ttl(self, ttl):
+        self._ttl = ttl
+
+    @property
+    def value(self):
+        return self._value
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+    def _setup(self, value, expires, loader, ttl):
+        self.value = value
+        self.expires = expires
+        self.loader = loader
+        self.ttl = ttl
+        self.created = time.monotonic()
+        self.accessed = self.created
+        self.frequency = 0.0
+
+
+class ResultCache(object):
+    CAPACITY = 128
+    TTL = 300.0
+
+    METRIC_EVICTIONS = 'evictions'
+    METRIC_EXPIRED = 'expired'
+    METRIC_HITS = 'hits'
+    METRIC_MISSES = 'misses'
+    METRIC_SIZE = 'size'
+
+    def __init__(self, capacity=CAPACITY, ttl=TTL):
+        self._capacity = None
+        self._entries = None
+        self._statistics = None
+        self._ttl = None
+        self._lock = threading.RLock()
+        self._setup(capacity, ttl)
+
+    @property
+    def capacity(self):
+        return self._capacity
+    @capacity.setter
+    def capacity(self, capacity):
+        self._capacity = capacity
+
+    @property
+    def ttl(self):
+        return self._ttl
+    @ttl.setter
+    def ttl(self, ttl):
+        self._ttl = ttl
+
+    def _setup(self, capacity, ttl):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._statistics = {
+            self.METRIC_EVICTIONS: 0,
+            self.METRIC_EXPIRED: 0,
+            self.METRIC_HITS: 0,
+            self.METRIC_MISSES: 0,
+        }
+
+    def _expires(self, ttl):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is None:
+            return None
+        return time.monotonic() + ttl
+
+    def _expired(self, entry, now=None):
+        if entry.expires is None:
+            return False
+        return (time.monotonic() if now is None else now) >= entry.expires
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                del self._entries[key]
+                self._statistics[self.METRIC_EXPIRED] += 1
+                entry = None
+            if entry is None:
+                self._statistics[self.METRIC_MISSES] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._statistics[self.METRIC_HITS] += 1
+            return entry.value
+
+    def put(self, key, value, ttl=None):
+        self._store(key, CacheEntry(value, self._expires(ttl)))
+
+    def fetch(self, key, loader, ttl=None):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = loader()
+            self.put(key, value, ttl)
+        return value
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self._statistics[self.METRIC_EVICTIONS] += 1
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._expired(entry)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def statistics(self):
+        with self._lock:
+            statistics = dict(self._statistics)
+            statistics[self.METRIC_SIZE] = len(self._entries)
+        return statistics
+
+
+class RevalidatingCache(ResultCache):
+    GRACE = 60.0
+    HALF_LIFE = 60.0
+    HOT = 5.0
+    LEAD = 0.2
+    WORKERS = 4
+
+    METRIC_REFRESHES = 'refreshes'
+    METRIC_REFRESH_FAILURES = 'refreshFailures'
+    METRIC_STALE = 'stale'
+
+    REFRESH_FAILED = "Background refresh of '{}' failed\n{}"
+
+    def __init__(self, capacity=ResultCache.CAPACITY, ttl=ResultCache.TTL, grace=GRACE, workers=WORKERS,
+                 hot=HOT, lead=LEAD, halfLife=HALF_LIFE):
+        self._grace = None
+        self._halfLife = None
+        self._hot = None
+        self._lead = None
+        self._pool = None
+        self._refreshing = None
+        super(RevalidatingCache, self).__init__(capacity, ttl)
+        self.grace = grace
+        self.halfLife = halfLife
+        self.hot = hot
+        self.lead = lead
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._refreshing = {}
+        self._statistics[self.METRIC_REFRESHES] = 0
+        self._statistics[self.METRIC_REFRESH_FAILURES] = 0
+        self._statistics[self.METRIC_STALE] = 0
+
+    @property
+    def grace(self):
+        return self._grace
+    @grace.setter
+    def grace(self, grace):
+        self._grace = grace
+
+    @property
+    def halfLife(self):
+        return self._halfLife
+    @halfLife.setter
+    def halfLife(self, halfLife):
+        self._halfLife = halfLife
+
+    @property
+    def hot(self):
+        return self._hot
+    @hot.setter
+    def hot(self, hot):
+        self._hot = hot
+
+    @property
+    def lead(self):
+        return self._lead
+    @lead.setter
+    def lead(self, lead):
+        self._lead = lead
+
+    def _touch(self, entry, now):
+        decay = math.exp(-(now - entry.accessed) * math.log(2) / self.halfLife)
+        entry.frequency = entry.frequency * decay + 1.0
+        entry.accessed = now
+
+    def _stale(self, entry, now):
+        return self._expired(entry, now) and now < entry.expires + self.grace
+
+    def _early(self, entry, now):
+        if entry.expires is None or self.hot is None or entry.frequency < self.hot:
+            return False
+        return entry.expires - now <= (entry.expires - entry.created) * self.lead
+
+    def frequency(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return 0.0 if entry is None else entry.frequency
+
+    def _load(self, key, loader, ttl, previous=None):
+        value = loader()
+        entry = CacheEntry(value, self._expires(ttl), loader, ttl)
+        if previous is not None:
+            entry.accessed = previous.accessed
+            entry.frequency = previous.frequency
+        self._store(key, entry)
+        return value
+
+    def _refreshed(self, key, future):
+        with self._lock:
+            self._refreshing.pop(key, None)
+            if future.exception() is None:
+                self._statistics[self.METRIC_REFRESHES] += 1
+                return
+            self._statistics[self.METRIC_REFRESH_FAILURES] += 1
+        error = future.exception()
+        logger.error(self.REFRESH_FAILED.format(key, ''.join(
+            traceback.format_exception(type(error), error, error.__traceback__)
+        )))
+
+    def _refresh(self, key, entry):
+        future = self._refreshing.get(key)
+        if future is None:
+            future = self._pool.submit(self._load, key, entry.loader, entry.ttl, entry)
+            self._refreshing[key] = future
+            future.add_done_callback(lambda done: self._refreshed(key, done))
+        return future
+
+    def refresh(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.loader is None:
+                return None
+            return self._refresh(key, entry)
+
+    def get(self, key, default=None):
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now) and not self._stale(entry, now):
+                del self._entries[key]
+                self._statistics[self.METRIC_EXPIRED] += 1
+                entry = None
+            if entry is None:
+                self._statistics[self.METRIC_MISSES] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._touch(entry, now)
+            if self._expired(entry, now):
+                self._statistics[self.METRIC_STALE] += 1
+                if entry.loader is not None:
+                    self._refresh(key, entry)
+            else:
+                self._statistics[self.METRIC_HITS] += 1
+                if entry.loader is not None and self._early(entry, now):
+                    self._refresh(key, entry)
+            return entry.value
+
+    def fetch(self, key, loader, ttl=None):
+        missing = object()
+        with self._lock:
+            if key in self._entries.keys():
+                self._entries[key].loader = loader
+            value = self.get(key, missing)
+            if value is not missing:
+                return value
+            future = self._refreshing.get(key)
+            if future is None:
+                future = Future()
+                self._refreshing[key] = future
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            return future.result()
+        try:
+            value = self._load(key, loader, ttl)
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                self._refreshing.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+
+if "__main__" == __name__:
+    print("SQLCache is a package file, execution has no effects.\nTo execute tests suite run testsqlcache.py")
@@ -1,14 +1,103 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
 from google.cloud import bigquery
+import asyncio
 import logging
+import threading
+import time
 import traceback
 
+from sqlbudget import BytesBudget
+from sqlpoller import BatchPoller
+from sqlprofile import Profiler
+from sqlragged import ColumnarResult
+from sqlrow import ArrowPage, LazyRow, RecordPage
+from sqlshared import SharedResult
+from sqlstore import ResultStore
+
 logger = logging.getLogger('SQLClient')
 
-class SQLClient(object):
+class CancellationToken(object):
+
     def __init__(self):
+        self._callbacks = []
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def register(self, callback):
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def unregister(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def cancel(self):
+        with self._lock:
+            if self.cancelled:
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+
+class QueryHandle(object):
+    PAGE_SIZE = 10000
+    WAIT_SLICE = 10.0
+
+    QUERY_ERROR = "Query error!\nQuery:\n`{}`\nReason: {}"
+    CANCELLED = "Query cancelled, job {} stopped"
+    TIMEOUT = "Query exceeded its deadline, job {} stopped"
+    MISSING_COLUMN = "Column '{}' not found in result columns {}"
+
+    def __init__(self, client, sqlQuery, streams=1, ordered=True, destination=None, store=None,
+                 timeout=None, deadline=None, token=None, budget=None, priority=None):
+        self._budget = None
+        self._cancelled = CancellationToken()
         self._client = None
+        self._columns = None
+        self._deadline = None
+        self._destination = None
+        self._entry = None
+        self._finished = False
+        self._job = None
+        self._ordered = None
+        self._priority = None
+        self._ragged = None
+        self._records = None
+        self._rows = None
         self._sqlquery = None
-        self._setup()
+        self._store = None
+        self._streams = None
+        self._token = None
+        self._lock = threading.RLock()
+        self._setup(client, sqlQuery, streams, ordered, destination, store, timeout, deadline, token, budget, priority)
+
+    @property
+    def budget(self):
+        return self._budget
+    @budget.setter
+    def budget(self, budget):
+        self._budget = budget
+
+    @property
+    def cancelled(self):
+        return self._cancelled.cancelled
+
+    @property
+    def degraded(self):
+        return self.entry is not None and self.entry.action == BytesBudget.DEGRADE
 
     @property
     def client(self):
@@ -17,6 +106,457 @@ class SQLClient(object):
     def client(self, client):
         self._client = client
 
+    @property
+    def columns(self):
+        return self._columns
+    @columns.setter
+    def columns(self, columns):
+        self._columns = columns
+
+    @property
+    def deadline(self):
+        return self._deadline
+    @deadline.setter
+    def deadline(self, deadline):
+        self._deadline = deadline
+
+    @property
+    def destination(self):
+        return self._destination
+    @destination.setter
+    def destination(self, destination):
+        self._destination = destination
+
+    @property
+    def entry(self):
+        return self._entry
+    @entry.setter
+    def entry(self, entry):
+        self._entry = entry
+
+    @property
+    def finished(self):
+        return self._finished
+    @finished.setter
+    def finished(self, finished):
+        self._finished = finished
+
+    @property
+    def job(self):
+        return self._job
+    @job.setter
+    def job(self, job):
+        self._job = job
+
+    @property
+    def ordered(self):
+        return self._ordered
+    @ordered.setter
+    def ordered(self, ordered):
+        self._ordered = ordered
+
+    @property
+    def priority(self):
+        return self._priority
+    @priority.setter
+    def priority(self, priority):
+        self._priority = priority
+
+    @property
+    def ragged(self):
+        return self._ragged
+    @ragged.setter
+    def ragged(self, ragged):
+        self._ragged = ragged
+
+    @property
+    def records(self):
+        return self._records
+    @records.setter
+    def records(self, records):
+        self._records = records
+
+    @property
+    def sqlquery(self):
+        return self._sqlquery
+    @sqlquery.setter
+    def sqlquery(self, sqlquery):
+        self._sqlquery = sqlquery
+
+    @property
+    def store(self):
+        return self._store
+    @store.setter
+    def store(self, store):
+        self._store = store
+
+    @property
+    def streams(self):
+        return self._streams
+    @streams.setter
+    def streams(self, streams):
+        self._streams = streams
+
+    @property
+    def token(self):
+        return self._token
+    @token.setter
+    def token(self, token):
+        self._token = token
+
+    def _setup(self, client, sqlQuery, streams, ordered, destination, store, timeout, deadline, token, budget,
+               priority):
+        self.budget = budget
+        self.priority = priority
+        self.client = client
+        self.sqlquery = sqlQuery
+        self.streams = streams
+        self.ordered = ordered
+        self.destination = destination
+        self.store = store
+        self.deadline = deadline
+        if timeout is not None:
+            expiry = time.time() + timeout
+            self.deadline = expiry if deadline is None else min(deadline, expiry)
+        if self.store is not None and self.sqlquery in self.store:
+            self._guard(self._restore)
+        else:
+            self._guard(self._submit)
+        if token is not None and self.records is None:
+            self.token = token
+            token.register(self.cancel)
+
+    def remaining(self):
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.time())
+
+    def _check(self):
+        if self.cancelled:
+            logger.error(self.CANCELLED.format(self._jobId()))
+            raise Exception(self.CANCELLED.format(self._jobId()))
+        if self.deadline is not None and time.time() >= self.deadline:
+            self.cancel()
+            logger.error(self.TIMEOUT.format(self._jobId()))
+            raise Exception(self.TIMEOUT.format(self._jobId()))
+
+    def _jobId(self):
+        return getattr(self.job, 'job_id', None)
+
+    def _complete(self):
+        if self.token is not None:
+            self.token.unregister(self.cancel)
+            self.token = None
+
+    def cancel(self):
+        if self.cancelled:
+            return
+        self._cancelled.cancel()
+        if self.job is not None and self._rows is None and not self.job.done():
+            try:
+                self.job.cancel()
+            except Exception:
+                logger.info(self.QUERY_ERROR.format(str(self.sqlquery), traceback.format_exc()))
+
+    def _guard(self, method, *args):
+        try:
+            return method(*args)
+        except Exception:
+            logger.info(self.QUERY_ERROR.format(str(self.sqlquery), traceback.format_exc()))
+            raise Exception(self.QUERY_ERROR.format(str(self.sqlquery), traceback.format_exc()))
+
+    def _restore(self):
+        table = self.store.load(self.sqlquery)
+        self.columns = table.column_names
+        self.records = list(zip(*[column.to_pylist() for column in table.columns]))
+
+    @classmethod
+    def estimate(cls, client, sqlQuery):
+        jobConfig = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
+        return client.query(sqlQuery, job_config=jobConfig).total_bytes_processed or 0
+
+    def _submit(self):
+        if self.budget is not None:
+            self.entry = self.budget.admit(self.sqlquery, lambda sqlQuery: self.estimate(self.client, sqlQuery))
+            self.sqlquery = self.entry.sqlquery
+        jobConfig = {}
+        if self.destination is not None:
+            jobConfig['destination'] = self.destination
+            jobConfig['write_disposition'] = bigquery.WriteDisposition.WRITE_TRUNCATE
+        if self.priority is not None:
+            jobConfig['priority'] = self.priority
+        if jobConfig:
+            self.job = self.client.query(self.sqlquery, job_config=bigquery.QueryJobConfig(**jobConfig))
+        else:
+            self.job = self.client.query(self.sqlquery)
+
+    def _result(self):
+        if self.finished or (self.deadline is None and self.token is None):
+            return self.job.result()
+        while True:
+            timeout = self.WAIT_SLICE
+            if self.deadline is not None:
+                timeout = min(timeout, self.remaining())
+            try:
+                return self.job.result(timeout=timeout)
+            except TimeoutError:
+                self._check()
+
+    def _wait(self):
+        with self._lock:
+            if self._rows is None:
+                try:
+                    self._check()
+                    try:
+                        self._rows = self._result()
+                    except Exception:
+                        self._check()
+                        raise
+                finally:
+                    if self.entry is not None and self.entry.actual is None:
+                        self.budget.settle(self.entry, getattr(self.job, 'total_bytes_processed', None))
+                self.columns = [field.name for field in self._rows.schema]
+        return self._rows
+
+    def result(self):
+        if self.job is not None:
+            self._guard(self._wait)
+        return self
+
+    def rows(self):
+        return self._guard(self._wait)
+
+    def _iterate(self):
+        rows = self._wait()
+        if self.streams > 1 and rows.total_rows:
+            return self._download(rows.total_rows)
+        return self._stream(rows)
+
+    def _checked(self, pages):
+        for page in pages:
+            self._check()
+            yield page
+
+    def _items(self, rows):
+        for page in self._checked(getattr(rows, 'pages', [rows])):
+            for item in page:
+                yield item
+
+    def _stream(self, rows):
+        for item in self._items(rows):
+            yield item.values()
+
+    def _download(self, total, fields=None):
+        shard = -(-total // self.streams)
+        destination = self.job.destination
+        with ThreadPoolExecutor(max_workers=self.streams) as pool:
+            futures = [
+                pool.submit(self._readShard, destination, start, min(shard, total - start), fields)
+                for start in range(0, total, shard)
+            ]
+            try:
+                for future in (futures if self.ordered else as_completed(futures)):
+                    self._check()
+                    for record in future.result(timeout=self.remaining()):
+                        yield record
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    @Profiler.profile('QueryHandle._readShard')
+    def _readShard(self, destination, start, count, fields=None):
+        if fields is None:
+            rows = self.client.list_rows(destination, start_index=start, max_results=count)
+        else:
+            rows = self.client.list_rows(destination, start_index=start, max_results=count, selected_fields=fields)
+        return [item.values() for item in rows]
+
+    @Profiler.profileIterator('QueryHandle.__iter__')
+    def __iter__(self):
+        if self.records is not None:
+            for record in self.records:
+                yield record
+            return
+        try:
+            for record in self._guard(self._iterate):
+                yield record
+        except GeneratorExit:
+            self.cancel()
+            raise
+        finally:
+            self._complete()
+
+    def _fetch(self):
+        self.records = list(self._iterate())
+        if self.store is not None:
+            self.store.save(self.sqlquery, self.columns, self.records)
+
+    @Profiler.profile('QueryHandle.fetchall')
+    def fetchall(self):
+        with self._lock:
+            if self.records is None:
+                try:
+                    self._guard(self._fetch)
+                finally:
+                    self._complete()
+        return self.records
+
+    def _project(self, projection):
+        if projection is None:
+            return list(self.columns), list(range(len(self.columns)))
+        for name in projection:
+            if name not in self.columns:
+                logger.error(self.MISSING_COLUMN.format(name, self.columns))
+                raise Exception(self.MISSING_COLUMN.format(name, self.columns))
+        return list(projection), [self.columns.index(name) for name in projection]
+
+    def _paginate(self, records, columns, positions=None):
+        page = []
+        for record in records:
+            page.append(record)
+            if len(page) >= self.PAGE_SIZE:
+                yield RecordPage(page, columns, positions)
+                page = []
+        if page:
+            yield RecordPage(page, columns, positions)
+
+    def _pages(self, projection):
+        if self.records is not None:
+            columns, positions = self._project(projection)
+            return self._paginate(self.records, columns, positions)
+        rows = self._wait()
+        columns, positions = self._project(projection)
+        fields = None if projection is None else [rows.schema[position] for position in positions]
+        if self.streams > 1 and rows.total_rows:
+            return self._paginate(self._download(rows.total_rows, fields), columns)
+        if fields is not None and rows.total_rows:
+            rows = self.client.list_rows(self.job.destination, selected_fields=fields)
+            names = [field.name for field in rows.schema]
+            positions = [names.index(name) for name in columns]
+        if LazyRow.readable(rows):
+            return (ArrowPage(batch, columns) for batch in self._checked(rows.to_arrow_iterable()))
+        return self._paginate(self._items(rows), columns, positions)
+
+    def _pageRows(self, page, projection):
+        if projection is None:
+            return page.rows()
+        return page.records()
+
+    @Profiler.profileIterator('QueryHandle.iterLazy')
+    def iterLazy(self, projection=None):
+        try:
+            for page in self._guard(self._pages, projection):
+                for row in self._pageRows(page, projection):
+                    yield row
+        finally:
+            self._complete()
+
+    @Profiler.profile('QueryHandle.fetchLazy')
+    def fetchLazy(self, projection=None):
+        rows = []
+        try:
+            for page in self._guard(self._pages, projection):
+                rows += self._pageRows(page, projection)
+        finally:
+            self._complete()
+        return rows
+
+    def _fetchRagged(self):
+        if self.records is not None:
+            return ColumnarResult.fromRecords(self.records, self.columns)
+        rows = self._wait()
+        if self.streams == 1 and ColumnarResult.readable(rows):
+            return ColumnarResult.fromArrow(self._checked(rows.to_arrow_iterable()), self.columns)
+        return ColumnarResult.fromRecords(self._iterate(), self.columns)
+
+    @Profiler.profile('QueryHandle.fetchRagged')
+    def fetchRagged(self):
+        with self._lock:
+            if self.ragged is None:
+                try:
+                    self.ragged = self._guard(self._fetchRagged)
+                finally:
+                    self._complete()
+        return self.ragged
+
+    @Profiler.profile('QueryHandle.process')
+    def process(self, pipeline):
+        try:
+            return self._guard(pipeline.run, self)
+        finally:
+            self._complete()
+
+    async def fetchallAsync(self):
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, self.fetchall)
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+
+
+class SQLClient(object):
+    QUERY_ERROR = QueryHandle.QUERY_ERROR
+
+    def __init__(self, clientInterface=None, store=None, budget=None, cache=None):
+        self._budget = budget
+        self._cache = cache
+        self._client = None
+        self._columns = None
+        self._handle = None
+        self._poller = None
+        self._records = None
+        self._result = None
+        self._sqlquery = None
+        self._store = store
+        self._lock = threading.Lock()
+        self._setup(clientInterface)
+
+    @property
+    def budget(self):
+        return self._budget
+    @budget.setter
+    def budget(self, budget):
+        self._budget = budget
+
+    @property
+    def cache(self):
+        return self._cache
+    @cache.setter
+    def cache(self, cache):
+        self._cache = cache
+
+    @property
+    def client(self):
+        return self._client
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    @property
+    def columns(self):
+        return self._columns
+    @columns.setter
+    def columns(self, columns):
+        self._columns = columns
+
+    @property
+    def degraded(self):
+        return self.handle is not None and self.handle.degraded
+
+    @property
+    def handle(self):
+        return self._handle
+    @handle.setter
+    def handle(self, handle):
+        self._handle = handle
+
+    @property
+    def poller(self):
+        return self._poller
+    @poller.setter
+    def poller(self, poller):
+        self._poller = poller
+
     @property
     def result(self):
         return self._result
@@ -38,26 +578,109 @@ class SQLClient(object):
     def sqlquery(self, sqlquery):
         self._sqlquery = sqlquery
 
+    @property
+    def store(self):
+        return self._store
+    @store.setter
+    def store(self, store):
+        self._store = store
+
     def _setup(self, clientInterface=None):
         if clientInterface is None:
             self.client = bigquery.Client()
         else:
             self.client = clientInterface
 
-    def _execute(self):
-        self.result = self.client.query(self.sqlquery)
-        self.records = [item.values() for item in self.result.result()]
+    def submit(self, sqlQuery, streams=1, ordered=True, destination=None,
+               timeout=None, deadline=None, token=None):
+        return QueryHandle(
+            self.client, sqlQuery, streams, ordered, destination, self.store,
+            timeout, deadline, token, self.budget
+        )
+
+    def estimate(self, sqlQuery):
+        return QueryHandle.estimate(self.client, sqlQuery)
 
-    def query(self, sqlQuery):
+    def submitBatch(self, sqlQuery, callback=None, destination=None, token=None):
+        with self._lock:
+            if self.poller is None:
+                self.poller = BatchPoller(self.client)
+        handle = QueryHandle(
+            self.client, sqlQuery, destination=destination, store=self.store, token=token,
+            budget=self.budget, priority=bigquery.QueryPriority.BATCH
+        )
+        future = self.poller.watch(handle)
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def query(self, sqlQuery, streams=1, ordered=True, destination=None,
+              timeout=None, deadline=None, token=None, pipeline=None, ragged=False, lazy=False,
+              projection=None):
+        self.sqlquery = sqlQuery
+        if self.cache is not None and not (destination or timeout or deadline or token or pipeline or ragged or lazy
+                                           or projection):
+            return self._cached(sqlQuery, streams, ordered)
+        self.handle = self.submit(sqlQuery, streams, ordered, destination, timeout, deadline, token)
+        self.result = self.handle.job
+        if lazy or projection is not None:
+            self.records = self.handle.fetchLazy(projection)
+            self.columns = list(self.handle.columns if projection is None else projection)
+            return
+        if ragged:
+            self.records = self.handle.fetchRagged()
+            self.columns = self.handle.columns
+            return
+        if pipeline is None:
+            self.records = self.handle.fetchall()
+            self.columns = self.handle.columns
+            return
+        table = self.handle.process(pipeline)
+        self.records = pipeline.records(table)
+        self.columns = self.handle.columns if table is None else table.column_names
+
+    def _cached(self, sqlQuery, streams, ordered):
+        def load():
+            handle = self.submit(sqlQuery, streams, ordered)
+            records = handle.fetchall()
+            return handle.columns, records
+        self.handle = None
+        self.result = None
+        self.columns, self.records = self.cache.fetch(ResultStore.fingerprint(sqlQuery), load)
+
+    def process(self, sqlQuery, pipeline, streams=1, ordered=True, destination=None,
+                timeout=None, deadline=None, token=None):
         self.sqlquery = sqlQuery
+        self.records = None
+        self.handle = self.submit(sqlQuery, streams, ordered, destination, timeout, deadline, token)
+        self.result = self.handle.job
+        table = self.handle.process(pipeline)
+        self.columns = self.handle.columns if table is None else table.column_names
+        return table
+
+    def stream(self, sqlQuery, streams=1, ordered=True, destination=None,
+               timeout=None, deadline=None, token=None):
+        self.sqlquery = sqlQuery
+        self.records = None
+        self.handle = self.submit(sqlQuery, streams, ordered, destination, timeout, deadline, token)
+        self.result = self.handle.job
+        records = iter(self.handle)
         try:
-            self._execute()
-        except:
-            logger.info("Query error!\nQuery:\n`{}`\nReason: {}".format(str(self.sqlquery), traceback.format_exc()))
-            raise Exception("Query error!\nQuery:\n`{}`\nReason: {}".format(str(self.sqlquery), traceback.format_exc()))
+            for record in records:
+                self.columns = self.handle.columns
+                yield record
+        finally:
+            records.close()
 
     def fetchall(self):
         return self.records
 
+    def share(self):
+        return SharedResult.publish(self.columns, self.records)
+
+    def save(self, store=None):
+        store = self.store if store is None else store
+        return store.save(self.sqlquery, self.columns, self.records)
+
 if "__main__" == __name__:
     print("SQLClient is a package file, execution has no effects.\nTo execute tests suite run testsqlclient.py")
@@ -0,0 +1,242 @@
+import copy
+import datetime
+import decimal
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from sqlbuilder import (
+    AggregationFunction,
+    Composer,
+    ConfigHandlerGroupBy,
+    ConfigHandlerQuery,
+    ConfigHandlerWhere,
+)
+from sqlrollup import Rollup
+
+logger = logging.getLogger('SQLIncremental')
+
+class StateEncoder(json.JSONEncoder):
+    DATE = '__date__'
+    DATETIME = '__datetime__'
+    DECIMAL = '__decimal__'
+
+    def default(self, value):
+        if isinstance(value, datetime.datetime):
+            return {self.DATETIME: value.isoformat()}
+        if isinstance(value, datetime.date):
+            return {self.DATE: value.isoformat()}
+        if isinstance(value, decimal.Decimal):
+            return {self.DECIMAL: str(value)}
+        return super(StateEncoder, self).default(value)
+
+    @classmethod
+    def decode(cls, value):
+        if cls.DATETIME in value.keys():
+            return datetime.datetime.fromisoformat(value[cls.DATETIME])
+        if cls.DATE in value.keys():
+            return datetime.date.fromisoformat(value[cls.DATE])
+        if cls.DECIMAL in value.keys():
+            return decimal.Decimal(value[cls.DECIMAL])
+        return value
+
+
+class IncrementalAggregate(object):
+    STATE_BOUNDARY = 'boundary'
+    STATE_ROWS = 'rows'
+    STATE_WATERMARK = 'watermark'
+    OPERATOR_FROM = '>='
+
+    NOT_MERGEABLE = "Value '{}({})' can not be refreshed incrementally"
+    NOT_SUPPORTED = "Definition with {} can not be refreshed incrementally"
+    WATERMARK_GROUPED = "Watermark column '{}' can not be a group field"
+
+    def __init__(self, composer, watermark, path):
+        self._boundary = None
+        self._composer = None
+        self._path = None
+        self._rows = None
+        self._watermark = None
+        self._watermarkValue = None
+        self._lock = threading.Lock()
+        self._setup(composer, watermark, path)
+
+    @property
+    def boundary(self):
+        return self._boundary
+    @boundary.setter
+    def boundary(self, boundary):
+        self._boundary = boundary
+
+    @property
+    def composer(self):
+        return self._composer
+    @composer.setter
+    def composer(self, composer):
+        self._composer = composer
+
+    @property
+    def path(self):
+        return self._path
+    @path.setter
+    def path(self, path):
+        self._path = str(path)
+
+    @property
+    def rows(self):
+        return self._rows
+    @rows.setter
+    def rows(self, rows):
+        self._rows = rows
+
+    @property
+    def watermark(self):
+        return self._watermark
+    @watermark.setter
+    def watermark(self, watermark):
+        self._watermark = watermark
+
+    @property
+    def watermarkValue(self):
+        return self._watermarkValue
+    @watermarkValue.setter
+    def watermarkValue(self, watermarkValue):
+        self._watermarkValue = watermarkValue
+
+    def _setup(self, composer, watermark, path):
+        self.composer = composer
+        self.watermark = watermark
+        self.path = path
+        self._validate()
+        self._load()
+
+    def _fail(self, message):
+        logger.error(message)
+        raise Exception(message)
+
+    def _validate(self):
+        if self.composer.havingClauses.clauses:
+            self._fail(self.NOT_SUPPORTED.format(ConfigHandlerQuery.HAVING))
+        if self.composer.offset:
+            self._fail(self.NOT_SUPPORTED.format(ConfigHandlerQuery.OFFSET))
+        for position, clause in self.composer.groupByClauses.clauses.items():
+            if clause.aggregation:
+                self._fail(self.NOT_SUPPORTED.format(ConfigHandlerGroupBy.DATE_AGGREGATION))
+            if clause.limit:
+                self._fail(self.NOT_SUPPORTED.format(ConfigHandlerGroupBy.LIMIT))
+            if clause.field == self.watermark:
+                self._fail(self.WATERMARK_GROUPED.format(self.watermark))
+        for position, clause in self.composer.valueClauses.clauses.items():
+            mergeable = clause.operation in Rollup.MERGE.keys()
+            if not mergeable or clause.modifier is not None or clause.order is not None:
+                self._fail(self.NOT_MERGEABLE.format(clause.operation, clause.field))
+
+    def _load(self):
+        self.rows = {}
+        self.boundary = {}
+        self.watermarkValue = None
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as handle:
+            state = json.load(handle, object_hook=StateEncoder.decode)
+        self.watermarkValue = state[self.STATE_WATERMARK]
+        for row in state[self.STATE_ROWS]:
+            self.rows[tuple(row[:self._width()])] = list(row[self._width():])
+        for row in state.get(self.STATE_BOUNDARY, []):
+            self.boundary[tuple(row[:self._width()])] = list(row[self._width():])
+
+    def _store(self):
+        state = {
+            self.STATE_WATERMARK: self.watermarkValue,
+            self.STATE_ROWS: [list(key) + values for key, values in self.rows.items()],
+            self.STATE_BOUNDARY: [list(key) + values for key, values in self.boundary.items()],
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temporary = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(handle, 'w') as stream:
+                json.dump(state, stream, cls=StateEncoder)
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def _width(self):
+        return len(self.composer.groupByClauses.clauses)
+
+    def deltaComposer(self):
+        definition = copy.deepcopy(self.composer.config.config)
+        for key in (ConfigHandlerQuery.LIMIT, ConfigHandlerQuery.OFFSET):
+            if key in definition.keys():
+                del definition[key]
+        definition[ConfigHandlerQuery.GROUPBY] = list(definition[ConfigHandlerQuery.GROUPBY]) + [{
+            ConfigHandlerGroupBy.FIELD: self.watermark,
+        }]
+        if self.watermarkValue is not None:
+            definition[ConfigHandlerQuery.WHERE] = list(definition.get(ConfigHandlerQuery.WHERE) or []) + [{
+                ConfigHandlerWhere.FIELD: self.watermark,
+                ConfigHandlerWhere.OPERATOR: self.OPERATOR_FROM,
+                ConfigHandlerWhere.OPERAND: self.watermarkValue,
+            }]
+        return Composer(definition)
+
+    def _merge(self, operation, current, delta):
+        if current is None:
+            return delta
+        if delta is None:
+            return current
+        operation = Rollup.MERGE[operation]
+        if operation == AggregationFunction.SUM:
+            return current + delta
+        if operation == AggregationFunction.MIN:
+            return min(current, delta)
+        return max(current, delta)
+
+    def _operations(self):
+        return [clause.operation for position, clause in sorted(self.composer.valueClauses.clauses.items())]
+
+    def _accumulate(self, rows, key, values):
+        if key in rows.keys():
+            values = [
+                self._merge(operation, current, value)
+                for operation, current, value in zip(self._operations(), rows[key], values)
+            ]
+        rows[key] = values
+
+    def refresh(self, client):
+        with self._lock:
+            client.query(self.deltaComposer().buildQuery())
+            delta = client.fetchall()
+            watermarkValue = self.watermarkValue
+            for row in delta:
+                if row[self._width()] is not None and (watermarkValue is None or row[self._width()] > watermarkValue):
+                    watermarkValue = row[self._width()]
+            boundary = {}
+            for row in delta:
+                key = tuple(row[:self._width()])
+                values = list(row[self._width() + 1:])
+                if row[self._width()] is not None and row[self._width()] == watermarkValue:
+                    self._accumulate(boundary, key, values)
+                else:
+                    self._accumulate(self.rows, key, values)
+            self.boundary = boundary
+            self.watermarkValue = watermarkValue
+            self._store()
+        return len(delta)
+
+    def fetchall(self):
+        with self._lock:
+            merged = dict((key, list(values)) for key, values in self.rows.items())
+            for key, values in self.boundary.items():
+                self._accumulate(merged, key, values)
+            rows = [key + tuple(values) for key, values in merged.items()]
+        self.composer.sortRows(rows)
+        if self.composer.limit:
+            return rows[:self.composer.limit]
+        return rows
+
+
+if "__main__" == __name__:
+    print("SQLIncremental is a package file, execution has no effects.\nTo execute tests suite run testsqlincremental.py")
@@ -0,0 +1,548 @@
+import logging
+
+try:
+    import pyarrow
+    import pyarrow.compute
+except ImportError:
+    pyarrow = None
+
+from sqlstore import ResultStore
+
+logger = logging.getLogger('SQLPipeline')
+
+class Step(object):
+    KEY_FIELD = 'Field'
+    KEY_FIELDS = 'Fields'
+    KEY_DIRECTION = 'SortDirection'
+    KEY_LIMIT = 'Limit'
+    KEY_NAME = 'Name'
+    KEY_OPERAND = 'Operand'
+    KEY_OPERATION = 'Operation'
+    KEY_OPERATOR = 'Operator'
+    KEY_INDEX = 'Index'
+    KEY_VALUE = 'Value'
+    ASCENDING = 'ascending'
+    DESCENDING = 'descending'
+    DIRECTION_DESC = 'DESC'
+
+    MISSING_KEY = "Post-processing step '{}' needs '{}'"
+
+    def __init__(self, config):
+        self._config = None
+        self._setup(config)
+
+    @property
+    def config(self):
+        return self._config
+    @config.setter
+    def config(self, config):
+        self._config = config
+
+    def _setup(self, config):
+        self.config = config
+        self._parse()
+        self.reset()
+
+    def _parse(self):
+        pass
+
+    def _require(self, key):
+        if key not in self.config.keys():
+            logger.error(self.MISSING_KEY.format(type(self).__name__, key))
+            raise Exception(self.MISSING_KEY.format(type(self).__name__, key))
+        return self.config[key]
+
+    def _sortKeys(self, fields):
+        keys = []
+        for field in fields:
+            if isinstance(field, dict):
+                direction = field.get(self.KEY_DIRECTION) or ''
+                descending = direction.upper() == self.DIRECTION_DESC
+                keys.append((field[self.KEY_FIELD], self.DESCENDING if descending else self.ASCENDING))
+            else:
+                keys.append((field, self.ASCENDING))
+        return keys
+
+    @classmethod
+    def concat(cls, tables):
+        return pyarrow.concat_tables(tables, promote_options='default')
+
+    def reset(self):
+        pass
+
+    def push(self, table):
+        return table
+
+    def finish(self):
+        return None
+
+    @property
+    def done(self):
+        return False
+
+
+class FilterStep(Step):
+
+    NOT_SUPPORTED = "Post-processing filter operator '{}' not supported"
+
+    def __init__(self, config):
+        self._field = None
+        self._operand = None
+        self._operator = None
+        super(FilterStep, self).__init__(config)
+
+    @property
+    def field(self):
+        return self._field
+    @field.setter
+    def field(self, field):
+        self._field = field
+
+    @property
+    def operand(self):
+        return self._operand
+    @operand.setter
+    def operand(self, operand):
+        self._operand = operand
+
+    @property
+    def operator(self):
+        return self._operator
+    @operator.setter
+    def operator(self, operator):
+        if operator not in ResultStore.COMPARISONS.keys():
+            logger.error(self.NOT_SUPPORTED.format(operator))
+            raise Exception(self.NOT_SUPPORTED.format(operator))
+        self._operator = operator
+
+    def _parse(self):
+        self.field = self._require(self.KEY_FIELD)
+        self.operator = self._require(self.KEY_OPERATOR)
+        self.operand = self.config.get(self.KEY_OPERAND)
+
+    def push(self, table):
+        function = getattr(pyarrow.compute, ResultStore.COMPARISONS[self.operator])
+        return table.filter(function(table[self.field], self.operand))
+
+
+class DeriveStep(Step):
+
+    NOT_SUPPORTED = "Post-processing operation '{}' not supported"
+
+    def __init__(self, config):
+        self._fields = None
+        self._name = None
+        self._operation = None
+        super(DeriveStep, self).__init__(config)
+
+    @property
+    def fields(self):
+        return self._fields
+    @fields.setter
+    def fields(self, fields):
+        self._fields = fields
+
+    @property
+    def name(self):
+        return self._name
+    @name.setter
+    def name(self, name):
+        self._name = name
+
+    @property
+    def operation(self):
+        return self._operation
+    @operation.setter
+    def operation(self, operation):
+        try:
+            pyarrow.compute.get_function(operation)
+        except (KeyError, pyarrow.ArrowKeyError):
+            logger.error(self.NOT_SUPPORTED.format(operation))
+            raise Exception(self.NOT_SUPPORTED.format(operation))
+        self._operation = operation
+
+    def _parse(self):
+        self.name = self._require(self.KEY_NAME)
+        self.fields = self._require(self.KEY_FIELDS)
+        self.operation = self._require(self.KEY_OPERATION).lower()
+
+    def push(self, table):
+        arguments = [table[field] for field in self.fields]
+        if self.KEY_OPERAND in self.config.keys():
+            arguments.append(self.config[self.KEY_OPERAND])
+        values = pyarrow.compute.call_function(self.operation, arguments)
+        if self.name in table.column_names:
+            return table.set_column(table.column_names.index(self.name), self.name, values)
+        return table.append_column(self.name, values)
+
+
+class TruncateStep(Step):
+
+    def __init__(self, config):
+        self._field = None
+        self._limit = None
+        super(TruncateStep, self).__init__(config)
+
+    @property
+    def field(self):
+        return self._field
+    @field.setter
+    def field(self, field):
+        self._field = field
+
+    @property
+    def limit(self):
+        return self._limit
+    @limit.setter
+    def limit(self, limit):
+        self._limit = limit
+
+    def _parse(self):
+        self.field = self._require(self.KEY_FIELD)
+        self.limit = self._require(self.KEY_LIMIT)
+
+    def push(self, table):
+        values = pyarrow.compute.list_slice(table[self.field], 0, self.limit)
+        return table.set_column(table.column_names.index(self.field), self.field, values)
+
+
+class SelectStep(Step):
+
+    def __init__(self, config):
+        self._fields = None
+        super(SelectStep, self).__init__(config)
+
+    @property
+    def fields(self):
+        return self._fields
+    @fields.setter
+    def fields(self, fields):
+        self._fields = fields
+
+    def _parse(self):
+        self.fields = self._require(self.KEY_FIELDS)
+
+    def push(self, table):
+        return table.select(self.fields)
+
+
+class LimitStep(Step):
+
+    def __init__(self, config):
+        self._count = None
+        self._limit = None
+        super(LimitStep, self).__init__(config)
+
+    @property
+    def limit(self):
+        return self._limit
+    @limit.setter
+    def limit(self, limit):
+        self._limit = limit
+
+    def _parse(self):
+        self.limit = self._require(self.KEY_LIMIT)
+
+    def reset(self):
+        self._count = 0
+
+    @property
+    def done(self):
+        return self._count >= self.limit
+
+    def push(self, table):
+        table = table.slice(0, max(0, self.limit - self._count))
+        self._count += table.num_rows
+        return table
+
+
+class SortStep(Step):
+
+    def __init__(self, config):
+        self._keys = None
+        self._tables = None
+        super(SortStep, self).__init__(config)
+
+    @property
+    def keys(self):
+        return self._keys
+    @keys.setter
+    def keys(self, keys):
+        self._keys = keys
+
+    def _parse(self):
+        self.keys = self._sortKeys(self._require(self.KEY_FIELDS))
+
+    def reset(self):
+        self._tables = []
+
+    def push(self, table):
+        self._tables.append(table)
+        return None
+
+    def finish(self):
+        if not self._tables:
+            return None
+        table = self.concat(self._tables)
+        self._tables = []
+        return table.take(pyarrow.compute.sort_indices(table, sort_keys=self.keys))
+
+
+class TopStep(SortStep):
+
+    def __init__(self, config):
+        self._buffered = None
+        self._limit = None
+        self._top = None
+        super(TopStep, self).__init__(config)
+
+    @property
+    def limit(self):
+        return self._limit
+    @limit.setter
+    def limit(self, limit):
+        self._limit = limit
+
+    def _parse(self):
+        super(TopStep, self)._parse()
+        self.limit = self._require(self.KEY_LIMIT)
+
+    def reset(self):
+        super(TopStep, self).reset()
+        self._top = None
+        self._buffered = 0
+
+    def _compact(self):
+        if self._top is None and not self._tables:
+            return
+        table = self.concat(([] if self._top is None else [self._top]) + self._tables)
+        self._tables = []
+        self._buffered = 0
+        if table.num_rows > self.limit:
+            table = table.take(pyarrow.compute.select_k_unstable(table, self.limit, sort_keys=self.keys))
+        self._top = table
+
+    def push(self, table):
+        self._tables.append(table)
+        self._buffered += table.num_rows
+        if self._buffered >= self.limit:
+            self._compact()
+        return None
+
+    def finish(self):
+        self._compact()
+        if self._top is None:
+            return None
+        table, self._top = self._top, None
+        return table.take(pyarrow.compute.sort_indices(table, sort_keys=self.keys))
+
+
+class PivotStep(Step):
+    OPERATIONS = {'COUNT': ('count', 'sum'), 'MAX': ('max', 'max'), 'MIN': ('min', 'min'), 'SUM': ('sum', 'sum')}
+    OPERATION_DEFAULT = 'SUM'
+    AGGREGATED = '{}_{}'
+    COLUMN = '{}_{}'
+
+    NOT_SUPPORTED = "Post-processing pivot operation '{}' not supported"
+
+    def __init__(self, config):
+        self._field = None
+        self._index = None
+        self._operation = None
+        self._partials = None
+        self._value = None
+        super(PivotStep, self).__init__(config)
+
+    @property
+    def field(self):
+        return self._field
+    @field.setter
+    def field(self, field):
+        self._field = field
+
+    @property
+    def index(self):
+        return self._index
+    @index.setter
+    def index(self, index):
+        self._index = index
+
+    @property
+    def operation(self):
+        return self._operation
+    @operation.setter
+    def operation(self, operation):
+        if operation not in self.OPERATIONS.keys():
+            logger.error(self.NOT_SUPPORTED.format(operation))
+            raise Exception(self.NOT_SUPPORTED.format(operation))
+        self._operation = operation
+
+    @property
+    def value(self):
+        return self._value
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+    def _parse(self):
+        self.index = self._require(self.KEY_INDEX)
+        self.field = self._require(self.KEY_FIELD)
+        self.value = self._require(self.KEY_VALUE)
+        self.operation = self.config.get(self.KEY_OPERATION, self.OPERATION_DEFAULT).upper()
+
+    def reset(self):
+        self._partials = []
+
+    def _aggregate(self, table, function):
+        keys = list(self.index) + [self.field]
+        aggregated = table.group_by(keys).aggregate([(self.value, function)])
+        return aggregated.select(keys + [self.AGGREGATED.format(self.value, function)]).rename_columns(keys + [self.value])
+
+    def push(self, table):
+        self._partials.append(self._aggregate(table.select(list(self.index) + [self.field, self.value]),
+                                              self.OPERATIONS[self.operation][0]))
+        if len(self._partials) > 1:
+            self._partials = [self._aggregate(self.concat(self._partials), self.OPERATIONS[self.operation][1])]
+        return None
+
+    def finish(self):
+        if not self._partials:
+            return None
+        table = self._partials[0]
+        self._partials = []
+        pivoted = table.select(self.index).group_by(self.index).aggregate([])
+        for pivot in pyarrow.compute.unique(table[self.field]).sort().to_pylist():
+            column = table.filter(pyarrow.compute.equal(table[self.field], pivot)).select(list(self.index) + [self.value])
+            column = column.rename_columns(list(self.index) + [self.COLUMN.format(self.value, pivot)])
+            pivoted = pivoted.join(column, keys=self.index, join_type='left outer')
+        return pivoted.take(pyarrow.compute.sort_indices(pivoted, sort_keys=self._sortKeys(self.index)))
+
+
+class Pipeline(object):
+    BATCH_SIZE = 10000
+    KEY_STEP = 'Step'
+    STEPS = {
+        'DERIVE': DeriveStep,
+        'FILTER': FilterStep,
+        'LIMIT': LimitStep,
+        'PIVOT': PivotStep,
+        'SELECT': SelectStep,
+        'SORT': SortStep,
+        'TOP': TopStep,
+        'TRUNCATE': TruncateStep,
+    }
+
+    MISSING_DEPENDENCY = "Pipeline requires pyarrow, install it to post-process results"
+    NOT_SUPPORTED = "Post-processing step '{}' not supported"
+
+    def __init__(self, steps, batchSize=BATCH_SIZE):
+        self._batchSize = None
+        self._steps = None
+        self._setup(steps, batchSize)
+
+    @property
+    def batchSize(self):
+        return self._batchSize
+    @batchSize.setter
+    def batchSize(self, batchSize):
+        self._batchSize = batchSize
+
+    @property
+    def steps(self):
+        return self._steps
+    @steps.setter
+    def steps(self, steps):
+        self._steps = steps
+
+    def _setup(self, steps, batchSize):
+        if pyarrow is None:
+            logger.error(self.MISSING_DEPENDENCY)
+            raise Exception(self.MISSING_DEPENDENCY)
+        self.batchSize = batchSize
+        self.steps = [config if isinstance(config, Step) else self._step(config) for config in steps]
+
+    def _step(self, config):
+        name = str(config.get(self.KEY_STEP, '')).upper()
+        if name not in self.STEPS.keys():
+            logger.error(self.NOT_SUPPORTED.format(name))
+            raise Exception(self.NOT_SUPPORTED.format(name))
+        return self.STEPS[name](config)
+
+    def _table(self, columns, records):
+        arrays = [pyarrow.array(list(column)) for column in zip(*records)] if records else None
+        if arrays is None:
+            arrays = [pyarrow.array([], pyarrow.null()) for column in columns]
+        return pyarrow.Table.from_arrays(arrays, names=list(columns))
+
+    def batches(self, handle):
+        if handle.records is None and handle.streams == 1:
+            rows = handle.rows()
+            if hasattr(rows, 'to_arrow_iterable'):
+                for batch in handle._checked(rows.to_arrow_iterable()):
+                    yield batch
+                return
+        records = iter(handle)
+        try:
+            chunk = []
+            for record in records:
+                chunk.append(record)
+                if len(chunk) >= self.batchSize:
+                    yield self._table(handle.columns, chunk)
+                    chunk = []
+            if chunk or handle.columns is not None:
+                yield self._table(handle.columns, chunk)
+        finally:
+            records.close()
+
+    def _propagate(self, table, start, output):
+        for step in self.steps[start:]:
+            if table is None:
+                return
+            table = step.push(table)
+        if table is not None:
+            output.append(table)
+
+    def _exhausted(self):
+        for step in self.steps:
+            if step.done:
+                return True
+            if isinstance(step, SortStep) or isinstance(step, PivotStep):
+                return False
+        return False
+
+    def reset(self):
+        for step in self.steps:
+            step.reset()
+
+    def process(self, batches):
+        self.reset()
+        output = []
+        batches = iter(batches)
+        try:
+            for table in batches:
+                if isinstance(table, pyarrow.RecordBatch):
+                    table = pyarrow.Table.from_batches([table])
+                self._propagate(table, 0, output)
+                if self._exhausted():
+                    break
+        finally:
+            if hasattr(batches, 'close'):
+                batches.close()
+        for position, step in enumerate(self.steps):
+            self._propagate(step.finish(), position + 1, output)
+        if not output:
+            return None
+        return Step.concat(output)
+
+    def run(self, handle):
+        return self.process(self.batches(handle))
+
+    @classmethod
+    def records(cls, table):
+        if table is None:
+            return []
+        return list(zip(*[column.to_pylist() for column in table.columns]))
+
+
+if "__main__" == __name__:
+    print("SQLPipeline is a package file, execution has no effects.\nTo execute tests suite run testsqlpipeline.py")
@@ -0,0 +1,362 @@
+from collections import OrderedDict
+import logging
+
+from sqlbuilder import Composer, FieldCollection, NumberingFunction
+
+logger = logging.getLogger('SQLPlanner')
+
+class FusedScan(object):
+    GROUPING = "GROUPING({})"
+    GROUPING_ALIAS = "_grouping_{}"
+    GROUPING_SETS = "GROUPING SETS ({})"
+    GROUPING_SET = "({})"
+    GROUPING_FLAG = "{} = {}"
+    MEMBER_CONDITION = "({})"
+    SEPARATOR_MEMBERS = " OR "
+    VALUE_ALIAS = "_value_{}"
+    SPLIT_MISMATCH = "Fused scan on '{}' returned a row of {} columns, expected {}"
+
+    def __init__(self, table, composers):
+        self._composers = None
+        self._fields = None
+        self._sql = None
+        self._table = None
+        self._values = None
+        self._setup(table, composers)
+
+    @property
+    def composers(self):
+        return self._composers
+    @composers.setter
+    def composers(self, composers):
+        self._composers = composers
+
+    @property
+    def fields(self):
+        return self._fields
+    @fields.setter
+    def fields(self, fields):
+        self._fields = fields
+
+    @property
+    def sql(self):
+        return self._sql
+    @sql.setter
+    def sql(self, sql):
+        self._sql = sql
+
+    @property
+    def table(self):
+        return self._table
+    @table.setter
+    def table(self, table):
+        self._table = table
+
+    @property
+    def values(self):
+        return self._values
+    @values.setter
+    def values(self, values):
+        self._values = values
+
+    def _setup(self, table, composers):
+        self.table = table
+        self.composers = list(composers)
+        self._collect()
+        self.sql = self._build()
+
+    def _collect(self):
+        self.fields = []
+        self.values = []
+        for composer in self.composers:
+            for field in self._groupFields(composer):
+                if field not in self.fields:
+                    self.fields.append(field)
+            for expression in composer.valueExpressions.values():
+                if expression not in self.values:
+                    self.values.append(expression)
+
+    def _groupFields(self, composer):
+        return [clause.field for clause in composer.groupByClauses.clauses.values()]
+
+    def _groupingSets(self):
+        groupingSets = []
+        for composer in self.composers:
+            groupingSet = Composer.SEPARATOR_FIELDS.join(self._groupFields(composer))
+            groupingSet = self.GROUPING_SET.format(groupingSet)
+            if groupingSet not in groupingSets:
+                groupingSets.append(groupingSet)
+        return groupingSets
+
+    def _build(self):
+        if len(self.composers) == 1:
+            return self.composers[0].buildQuery()
+        columns = list(self.fields)
+        for position, field in enumerate(self.fields):
+            columns.append(FieldCollection.FIELD_ALIAS.format(
+                self.GROUPING.format(field),
+                self.GROUPING_ALIAS.format(position)
+            ))
+        for position, expression in enumerate(self.values):
+            columns.append(FieldCollection.FIELD_ALIAS.format(
+                expression,
+                self.VALUE_ALIAS.format(position)
+            ))
+        withClause, fromClause, whereClause = self.composers[0].scanClauses()
+        sql = [
+            withClause,
+            Composer.EXPRESSION.format(
+                Composer.STATEMENT_SELECT,
+                Composer.SEPARATOR_FIELDS.join(columns)
+            ),
+            fromClause,
+            whereClause,
+            Composer.EXPRESSION.format(
+                Composer.STATEMENT_GROUPBY,
+                self.GROUPING_SETS.format(
+                    Composer.SEPARATOR_FIELDS.join(self._groupingSets())
+                )
+            ),
+            self._qualify(),
+        ]
+        return Composer.SEPARATOR_CLAUSES.join([partial for partial in sql if len(partial)])
+
+    def _memberSet(self, composer):
+        fields = self._groupFields(composer)
+        return [
+            self.GROUPING_FLAG.format(self.GROUPING.format(field), 0 if field in fields else 1)
+            for field in self.fields
+        ]
+
+    def _memberRank(self, composer):
+        window = [Composer.EXPRESSION.format(
+            Composer.STATEMENT_PARTITIONBY,
+            Composer.SEPARATOR_FIELDS.join([self.GROUPING.format(field) for field in self.fields])
+        )]
+        orderBy = composer.orderBy()
+        if orderBy:
+            window.append(Composer.EXPRESSION.format(
+                Composer.STATEMENT_ORDERBY,
+                Composer.SEPARATOR_FIELDS.join(
+                    [Composer.EXPRESSION.format(expression, direction) for expression, direction in orderBy]
+                )
+            ))
+        return Composer.CONDITION_TOP.format(
+            Composer.WINDOW.format(
+                NumberingFunction(NumberingFunction.ROW_NUMBER, "").apply(),
+                Composer.SEPARATOR_CLAUSES.join(window)
+            ),
+            composer.limit
+        )
+
+    def _qualify(self):
+        if not any(composer.limit for composer in self.composers):
+            return ""
+        unlimited = [
+            frozenset(self._groupFields(composer)) for composer in self.composers if not composer.limit
+        ]
+        conditions = []
+        for composer in self.composers:
+            if composer.limit and frozenset(self._groupFields(composer)) in unlimited:
+                continue
+            condition = self._memberSet(composer)
+            if composer.limit:
+                condition.append(self._memberRank(composer))
+            condition = self.MEMBER_CONDITION.format(Composer.SEPARATOR_CONDITIONS.join(condition))
+            if condition not in conditions:
+                conditions.append(condition)
+        return Composer.EXPRESSION.format(
+            Composer.STATEMENT_QUALIFY,
+            self.SEPARATOR_MEMBERS.join(conditions)
+        )
+
+    def split(self, rows):
+        if len(self.composers) == 1:
+            return [list(rows)]
+        width = 2 * len(self.fields) + len(self.values)
+        bySet = {}
+        for row in rows:
+            if len(row) != width:
+                logger.error(self.SPLIT_MISMATCH.format(self.table, len(row), width))
+                raise Exception(self.SPLIT_MISMATCH.format(self.table, len(row), width))
+            groupingSet = frozenset(
+                field for position, field in enumerate(self.fields)
+                if not row[len(self.fields) + position]
+            )
+            bySet.setdefault(groupingSet, []).append(row)
+        results = []
+        for composer in self.composers:
+            fields = self._groupFields(composer)
+            positions = [self.fields.index(field) for field in fields]
+            positions += [
+                2 * len(self.fields) + self.values.index(expression)
+                for expression in composer.valueExpressions.values()
+            ]
+            result = [
+                tuple(row[position] for position in positions)
+                for row in bySet.get(frozenset(fields), [])
+            ]
+            composer.sortRows(result)
+            if composer.limit:
+                result = result[:composer.limit]
+            results.append(result)
+        return results
+
+
+
+class ScanPlanner(object):
+
+    def __init__(self, composers):
+        self._composers = None
+        self._scans = None
+        self._setup(composers)
+
+    @property
+    def composers(self):
+        return self._composers
+    @composers.setter
+    def composers(self, composers):
+        self._composers = composers
+
+    @property
+    def scans(self):
+        return self._scans
+    @scans.setter
+    def scans(self, scans):
+        self._scans = scans
+
+    def _setup(self, composers):
+        self.composers = list(composers)
+        self._plan()
+
+    def _fusable(self, composer):
+        if composer.offset or composer.havingClauses.clauses:
+            return False
+        for clause in composer.groupByClauses.clauses.values():
+            if clause.aggregation or clause.limit:
+                return False
+        return True
+
+    def _scanKey(self, position, composer):
+        if self._fusable(composer):
+            return (composer.table, composer.scanClauses())
+        return (composer.table, position)
+
+    def _plan(self):
+        groups = OrderedDict()
+        for position, composer in enumerate(self.composers):
+            key = self._scanKey(position, composer)
+            groups.setdefault(key, []).append(position)
+        self.scans = []
+        for key, positions in groups.items():
+            scan = FusedScan(key[0], [self.composers[position] for position in positions])
+            self.scans.append((positions, scan))
+
+    def queries(self):
+        return [scan.sql for positions, scan in self.scans]
+
+    def run(self, client):
+        results = [None] * len(self.composers)
+        for positions, scan in self.scans:
+            client.query(scan.sql)
+            for position, rows in zip(positions, scan.split(client.fetchall())):
+                results[position] = rows
+        return results
+
+
+class ScriptBatch(object):
+    STATEMENT = "BEGIN\n{};\nEXCEPTION WHEN ERROR THEN\nSELECT {} AS {}, @@error.message AS {};\nEND;"
+    STATEMENT_ALIAS = "_statement"
+    ERROR_ALIAS = "_error"
+    SEPARATOR_STATEMENTS = "\n"
+    SIZE = 50
+
+    UNMATCHED = "Script job {} returned {} result sets for {} statements"
+
+    def __init__(self, composers, size=SIZE):
+        self._composers = None
+        self._errors = None
+        self._size = None
+        self._setup(composers, size)
+
+    @property
+    def composers(self):
+        return self._composers
+    @composers.setter
+    def composers(self, composers):
+        self._composers = composers
+
+    @property
+    def errors(self):
+        return self._errors
+    @errors.setter
+    def errors(self, errors):
+        self._errors = errors
+
+    @property
+    def size(self):
+        return self._size
+    @size.setter
+    def size(self, size):
+        self._size = size
+
+    def _setup(self, composers, size):
+        self.composers = list(composers)
+        self.size = size
+        self.errors = {}
+
+    def _chunks(self):
+        positions = list(range(len(self.composers)))
+        return [positions[start:start + self.size] for start in range(0, len(positions), self.size)]
+
+    def _statement(self, offset, composer):
+        return self.STATEMENT.format(
+            composer.buildQuery(),
+            offset,
+            self.STATEMENT_ALIAS,
+            self.ERROR_ALIAS
+        )
+
+    def scripts(self):
+        return [
+            self.SEPARATOR_STATEMENTS.join(
+                self._statement(offset, self.composers[position]) for offset, position in enumerate(chunk)
+            )
+            for chunk in self._chunks()
+        ]
+
+    def _children(self, client, job):
+        children = [child for child in client.client.list_jobs(parent_job=job.job_id) if not child.error_result]
+        return sorted(children, key=lambda child: child.created)
+
+    def _collect(self, client, job, positions, results):
+        failed = {}
+        succeeded = []
+        for child in self._children(client, job):
+            rows = child.result()
+            columns = [field.name for field in rows.schema]
+            records = [item.values() for item in rows]
+            if columns == [self.STATEMENT_ALIAS, self.ERROR_ALIAS] and records:
+                failed[records[0][0]] = records[0][1]
+            else:
+                succeeded.append(records)
+        pending = [offset for offset in range(len(positions)) if offset not in failed.keys()]
+        if len(pending) != len(succeeded):
+            logger.error(self.UNMATCHED.format(job.job_id, len(succeeded), len(pending)))
+            raise Exception(self.UNMATCHED.format(job.job_id, len(succeeded), len(pending)))
+        for offset, message in failed.items():
+            self.errors[positions[offset]] = message
+        for offset, records in zip(pending, succeeded):
+            results[positions[offset]] = records
+
+    def run(self, client):
+        results = [None] * len(self.composers)
+        self.errors = {}
+        for positions, script in zip(self._chunks(), self.scripts()):
+            handle = client.submit(script).result()
+            self._collect(client, handle.job, positions, results)
+        return results
+
+
+if "__main__" == __name__:
+    print("SQLPlanner is a package file, execution has no effects.\nTo execute tests suite run testsqlplanner.py")
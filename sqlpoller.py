@@ -0,0 +1,150 @@
+from concurrent.futures import Future
+import datetime
+import logging
+import threading
+import traceback
+
+logger = logging.getLogger('SQLPoller')
+
+class BatchPoller(object):
+    STATE_DONE = 'done'
+    MIN_INTERVAL = 0.5
+    MAX_INTERVAL = 30.0
+    BACKOFF = 2.0
+
+    JOB_FAILED = "Batch job {} failed: {}"
+
+    def __init__(self, client, minInterval=MIN_INTERVAL, maxInterval=MAX_INTERVAL, backoff=BACKOFF):
+        self._backoff = None
+        self._client = None
+        self._interval = None
+        self._maxInterval = None
+        self._minInterval = None
+        self._pending = None
+        self._rounds = 0
+        self._thread = None
+        self._condition = threading.Condition()
+        self._setup(client, minInterval, maxInterval, backoff)
+
+    @property
+    def backoff(self):
+        return self._backoff
+    @backoff.setter
+    def backoff(self, backoff):
+        self._backoff = backoff
+
+    @property
+    def client(self):
+        return self._client
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    @property
+    def interval(self):
+        return self._interval
+
+    @property
+    def maxInterval(self):
+        return self._maxInterval
+    @maxInterval.setter
+    def maxInterval(self, maxInterval):
+        self._maxInterval = maxInterval
+
+    @property
+    def minInterval(self):
+        return self._minInterval
+    @minInterval.setter
+    def minInterval(self, minInterval):
+        self._minInterval = minInterval
+
+    @property
+    def rounds(self):
+        return self._rounds
+
+    def _setup(self, client, minInterval, maxInterval, backoff):
+        self.client = client
+        self.minInterval = minInterval
+        self.maxInterval = maxInterval
+        self.backoff = backoff
+        self._interval = minInterval
+        self._pending = {}
+
+    def pending(self):
+        with self._condition:
+            return len(self._pending)
+
+    def watch(self, handle):
+        future = Future()
+        if handle.job is None:
+            future.set_result(handle)
+            return future
+        with self._condition:
+            self._pending[handle.job.job_id] = (handle, future, self._now())
+            self._interval = self.minInterval
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll, name='SQLPoller')
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+        return future
+
+    def _now(self):
+        return datetime.datetime.now(datetime.timezone.utc)
+
+    def _finished(self, pending):
+        if hasattr(self.client, 'list_jobs'):
+            since = min(created for handle, future, created in pending.values())
+            done = dict(
+                (job.job_id, job) for job in self.client.list_jobs(
+                    min_creation_time=since - datetime.timedelta(seconds=1),
+                    state_filter=self.STATE_DONE
+                )
+            )
+            return dict((jobId, done[jobId]) for jobId in pending.keys() if jobId in done.keys())
+        return dict(
+            (jobId, handle.job) for jobId, (handle, future, created) in pending.items() if handle.job.done()
+        )
+
+    def _resolve(self, handle, future, job):
+        if handle.cancelled:
+            future.cancel()
+            return
+        handle.finished = True
+        error = getattr(job, 'error_result', None)
+        if error:
+            logger.error(self.JOB_FAILED.format(job.job_id, error))
+            future.set_exception(Exception(self.JOB_FAILED.format(job.job_id, error)))
+            return
+        future.set_result(handle)
+
+    def _poll(self):
+        while True:
+            with self._condition:
+                if not self._pending:
+                    self._thread = None
+                    return
+                self._condition.wait(self._interval)
+                pending = dict(self._pending)
+            try:
+                finished = self._finished(pending)
+            except Exception:
+                logger.info(traceback.format_exc())
+                finished = {}
+            for jobId, (handle, future, created) in pending.items():
+                if handle.cancelled and jobId not in finished.keys():
+                    finished[jobId] = handle.job
+            with self._condition:
+                self._rounds += 1
+                for jobId in finished:
+                    del self._pending[jobId]
+                if finished:
+                    self._interval = self.minInterval
+                else:
+                    self._interval = min(self.maxInterval, self._interval * self.backoff)
+            for jobId, job in finished.items():
+                self._resolve(pending[jobId][0], pending[jobId][1], job)
+
+
+if "__main__" == __name__:
+    print("SQLPoller is a package file, execution has no effects.\nTo execute tests suite run testsqlpoller.py")
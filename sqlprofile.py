@@ -0,0 +1,212 @@
+import atexit
+import cProfile
+import functools
+import json
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+
+logger = logging.getLogger('SQLProfile')
+
+class Profiler(object):
+    ENVIRONMENT = 'SQLPROFILE'
+    ALLOCATIONS = 'allocations.txt'
+    SUMMARY = 'summary.json'
+    PROFILE = '{}.prof'
+    FILENAME_INVALID = re.compile(r'[^\w.-]')
+    FRAMES = 10
+    TOP = 25
+
+    METRIC_CALLS = 'calls'
+    METRIC_PEAK = 'peakBytes'
+    METRIC_SKIPPED = 'skipped'
+    METRIC_TIME = 'seconds'
+
+    ALREADY_ACTIVE = "A profiler is already active, writing to {}"
+
+    current = None
+
+    def __init__(self, directory, top=TOP, frames=FRAMES):
+        self._directory = None
+        self._frames = None
+        self._statistics = None
+        self._stats = None
+        self._top = None
+        self._tracing = False
+        self._lock = threading.Lock()
+        self._active = threading.local()
+        self._setup(directory, top, frames)
+
+    @property
+    def directory(self):
+        return self._directory
+    @directory.setter
+    def directory(self, directory):
+        self._directory = str(directory)
+
+    @property
+    def frames(self):
+        return self._frames
+    @frames.setter
+    def frames(self, frames):
+        self._frames = frames
+
+    @property
+    def statistics(self):
+        return self._statistics
+
+    @property
+    def top(self):
+        return self._top
+    @top.setter
+    def top(self, top):
+        self._top = top
+
+    def _setup(self, directory, top, frames):
+        self.directory = directory
+        self.top = top
+        self.frames = frames
+        self._statistics = {}
+        self._stats = {}
+
+    @classmethod
+    def profile(cls, label):
+        def decorator(method):
+            @functools.wraps(method)
+            def wrapper(*args, **kwargs):
+                profiler = cls.current
+                if profiler is None:
+                    return method(*args, **kwargs)
+                return profiler.call(label, method, args, kwargs)
+            return wrapper
+        return decorator
+
+    @classmethod
+    def profileIterator(cls, label):
+        def decorator(method):
+            @functools.wraps(method)
+            def wrapper(*args, **kwargs):
+                iterator = method(*args, **kwargs)
+                if cls.current is None:
+                    yield from iterator
+                    return
+                try:
+                    while True:
+                        profiler = cls.current
+                        try:
+                            if profiler is None:
+                                item = next(iterator)
+                            else:
+                                item = profiler.call(label, next, (iterator,), {})
+                        except StopIteration:
+                            return
+                        yield item
+                finally:
+                    iterator.close()
+            return wrapper
+        return decorator
+
+    @classmethod
+    def environment(cls):
+        directory = os.environ.get(cls.ENVIRONMENT)
+        if not directory or cls.current is not None:
+            return None
+        profiler = cls(directory).start()
+        atexit.register(profiler.stop)
+        return profiler
+
+    def _record(self, label, profile, elapsed, peak):
+        with self._lock:
+            statistics = self._statistics.setdefault(label, {
+                self.METRIC_CALLS: 0,
+                self.METRIC_PEAK: 0,
+                self.METRIC_SKIPPED: 0,
+                self.METRIC_TIME: 0.0,
+            })
+            if profile is None:
+                statistics[self.METRIC_SKIPPED] += 1
+                return
+            statistics[self.METRIC_CALLS] += 1
+            statistics[self.METRIC_TIME] += elapsed
+            statistics[self.METRIC_PEAK] = max(statistics[self.METRIC_PEAK], peak)
+            if label in self._stats.keys():
+                self._stats[label].add(profile)
+            else:
+                self._stats[label] = pstats.Stats(profile)
+
+    def call(self, label, method, args, kwargs):
+        if getattr(self._active, 'label', None) is not None:
+            self._record(label, None, 0.0, 0)
+            return method(*args, **kwargs)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            self._record(label, None, 0.0, 0)
+            return method(*args, **kwargs)
+        self._active.label = label
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - start
+            peak = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+            self._active.label = None
+            self._record(label, profile, elapsed, peak)
+
+    def start(self):
+        if Profiler.current is not None:
+            logger.error(self.ALREADY_ACTIVE.format(Profiler.current.directory))
+            raise Exception(self.ALREADY_ACTIVE.format(Profiler.current.directory))
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        self._tracing = not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start(self.frames)
+        Profiler.current = self
+        return self
+
+    def _filename(self, label):
+        return os.path.join(self.directory, self.PROFILE.format(self.FILENAME_INVALID.sub('_', label)))
+
+    def stop(self):
+        if Profiler.current is not self:
+            return
+        Profiler.current = None
+        snapshot = tracemalloc.take_snapshot()
+        if self._tracing:
+            tracemalloc.stop()
+        with self._lock:
+            for label, stats in self._stats.items():
+                stats.dump_stats(self._filename(label))
+            with open(os.path.join(self.directory, self.SUMMARY), 'w') as handle:
+                json.dump(self._statistics, handle, indent=4, sort_keys=True)
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        with open(os.path.join(self.directory, self.ALLOCATIONS), 'w') as handle:
+            for statistic in snapshot.statistics('traceback')[:self.top]:
+                handle.write("{} blocks, {} bytes\n".format(statistic.count, statistic.size))
+                for line in statistic.traceback.format():
+                    handle.write(line + "\n")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, kind, value, traceback):
+        self.stop()
+        return False
+
+
+Profiler.environment()
+
+if "__main__" == __name__:
+    print("SQLProfile is a package file, execution has no effects.\nTo execute tests suite run testsqlprofile.py")
@@ -0,0 +1,314 @@
+from array import array
+import logging
+
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.types
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger('SQLRagged')
+
+class RaggedView(object):
+    __slots__ = ('_column', '_start', '_stop')
+
+    def __init__(self, column, start, stop):
+        self._column = column
+        self._start = start
+        self._stop = stop
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return self.tolist()[index]
+            return RaggedView(self._column, self._start + start, self._start + max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._column.value(self._start + index)
+
+    def __iter__(self):
+        for position in range(self._start, self._stop):
+            yield self._column.value(position)
+
+    def __eq__(self, other):
+        if isinstance(other, RaggedView):
+            other = other.tolist()
+        return self.tolist() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+    def memory(self):
+        return self._column.memory(self._start, self._stop)
+
+    def tolist(self):
+        return self._column.values(self._start, self._stop)
+
+
+class RaggedColumn(object):
+    KIND_FLOAT = 'd'
+    KIND_INTEGER = 'q'
+    KIND_OBJECT = 'object'
+    KIND_STRING = 'string'
+    ENCODING = 'utf-8'
+    ARROW_KINDS = {'double': KIND_FLOAT, 'float': KIND_FLOAT, 'int64': KIND_INTEGER, 'string': KIND_STRING}
+
+    NOT_BUFFERED = "Ragged column of kind '{}' has no flat buffer"
+
+    def __init__(self):
+        self._bounds = None
+        self._data = None
+        self._kind = None
+        self._offsets = array(self.KIND_INTEGER, [0])
+
+    @property
+    def kind(self):
+        return self._kind
+
+    @property
+    def offsets(self):
+        return self._offsets
+
+    @property
+    def buffer(self):
+        return self._data
+
+    @property
+    def nbytes(self):
+        size = self._offsets.itemsize * len(self._offsets)
+        if self._kind in (self.KIND_FLOAT, self.KIND_INTEGER):
+            size += self._data.itemsize * len(self._data)
+        elif self._kind == self.KIND_STRING:
+            size += len(self._data) + self._bounds.itemsize * len(self._bounds)
+        return size
+
+    def _infer(self, values):
+        kinds = set()
+        for value in values:
+            if isinstance(value, bool) or value is None:
+                return self.KIND_OBJECT
+            if isinstance(value, int):
+                kinds.add(self.KIND_INTEGER)
+            elif isinstance(value, float):
+                kinds.add(self.KIND_FLOAT)
+            elif isinstance(value, str):
+                kinds.add(self.KIND_STRING)
+            else:
+                return self.KIND_OBJECT
+        if kinds == set([self.KIND_INTEGER, self.KIND_FLOAT]):
+            return self.KIND_FLOAT
+        if len(kinds) != 1:
+            return self.KIND_OBJECT
+        return kinds.pop()
+
+    def _convert(self, kind):
+        values = self.values(0, self._count())
+        self._kind = kind
+        self._data = None
+        self._bounds = None
+        self._allocate()
+        self._extend(values)
+
+    def _allocate(self):
+        if self._kind in (self.KIND_FLOAT, self.KIND_INTEGER):
+            self._data = array(self._kind)
+        elif self._kind == self.KIND_STRING:
+            self._data = bytearray()
+            self._bounds = array(self.KIND_INTEGER, [0])
+        else:
+            self._data = []
+
+    def _count(self):
+        return self._offsets[-1]
+
+    def _extend(self, values):
+        if self._kind == self.KIND_STRING:
+            for value in values:
+                self._data += value.encode(self.ENCODING)
+                self._bounds.append(len(self._data))
+        else:
+            self._data.extend(values)
+
+    def append(self, values):
+        if values is None:
+            values = ()
+        if values:
+            kind = self._infer(values)
+            if self._kind is None:
+                self._kind = kind
+                self._allocate()
+            elif kind != self._kind and self._kind != self.KIND_OBJECT:
+                if self._kind == self.KIND_INTEGER and kind == self.KIND_FLOAT:
+                    self._convert(self.KIND_FLOAT)
+                elif not (self._kind == self.KIND_FLOAT and kind == self.KIND_INTEGER):
+                    self._convert(self.KIND_OBJECT)
+            if self._kind == self.KIND_FLOAT:
+                values = [float(value) for value in values]
+            self._extend(values)
+        self._offsets.append(self._count() + len(values))
+
+    @classmethod
+    def _flat(cls, chunk, typecode):
+        target = array(typecode)
+        width = target.itemsize
+        target.frombytes(chunk.buffers()[1].to_pybytes()[chunk.offset * width:(chunk.offset + len(chunk)) * width])
+        return target
+
+    def extendArrow(self, chunk):
+        values = chunk.flatten()
+        kind = self.ARROW_KINDS.get(str(values.type), self.KIND_OBJECT)
+        if kind == self.KIND_FLOAT and values.type != pyarrow.float64():
+            values = values.cast(pyarrow.float64())
+        if values.null_count or (self._kind is not None and kind != self._kind):
+            for row in chunk.to_pylist():
+                self.append(row)
+            return
+        if self._kind is None:
+            self._kind = kind
+            self._allocate()
+        offsets = pyarrow.compute.cast(chunk.offsets, pyarrow.int64())
+        offsets = pyarrow.compute.add(pyarrow.compute.subtract(offsets, offsets[0]), self._count())
+        self._offsets.extend(self._flat(offsets, self.KIND_INTEGER)[1:])
+        if kind in (self.KIND_FLOAT, self.KIND_INTEGER):
+            self._data.extend(self._flat(values, kind))
+        elif kind == self.KIND_STRING:
+            bounds = pyarrow.compute.cast(pyarrow.Array.from_buffers(
+                pyarrow.int32(), len(values) + 1, [None, values.buffers()[1]], offset=values.offset
+            ), pyarrow.int64())
+            start = bounds[0].as_py()
+            data = values.buffers()[2].to_pybytes()[start:bounds[len(values)].as_py()]
+            bounds = pyarrow.compute.add(pyarrow.compute.subtract(bounds, start), len(self._data))
+            self._data += data
+            self._bounds.extend(self._flat(bounds, self.KIND_INTEGER)[1:])
+        else:
+            self._data.extend(values.to_pylist())
+
+    @classmethod
+    def fromArrow(cls, column):
+        ragged = cls()
+        for chunk in getattr(column, 'chunks', [column]):
+            ragged.extendArrow(chunk)
+        return ragged
+
+    def value(self, position):
+        if self._kind == self.KIND_STRING:
+            return self._data[self._bounds[position]:self._bounds[position + 1]].decode(self.ENCODING)
+        return self._data[position]
+
+    def values(self, start, stop):
+        if self._kind == self.KIND_STRING:
+            return [self.value(position) for position in range(start, stop)]
+        if self._data is None:
+            return []
+        return list(self._data[start:stop])
+
+    def memory(self, start, stop):
+        if self._kind not in (self.KIND_FLOAT, self.KIND_INTEGER):
+            logger.error(self.NOT_BUFFERED.format(self._kind))
+            raise Exception(self.NOT_BUFFERED.format(self._kind))
+        return memoryview(self._data)[start:stop]
+
+    def lengths(self):
+        offsets = self._offsets
+        return [offsets[index + 1] - offsets[index] for index in range(len(self))]
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return RaggedView(self, self._offsets[index], self._offsets[index + 1])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class ColumnarResult(object):
+
+    def __init__(self, columns, data):
+        self._columns = list(columns)
+        self._data = data
+
+    @property
+    def columns(self):
+        return self._columns
+
+    @property
+    def data(self):
+        return self._data
+
+    def column(self, name):
+        return self._data[self._columns.index(name)]
+
+    @classmethod
+    def fromRecords(cls, records, columns=None):
+        data = None
+        for record in records:
+            if data is None:
+                data = [RaggedColumn() if isinstance(value, (list, tuple)) else [] for value in record]
+            for column, value in zip(data, record):
+                column.append(value)
+        if data is None:
+            data = [[] for column in columns or []]
+        if columns is None:
+            columns = [None] * len(data)
+        return cls(columns, data)
+
+    @classmethod
+    def readable(cls, rows):
+        return pyarrow is not None and hasattr(rows, 'to_arrow_iterable')
+
+    @classmethod
+    def fromArrow(cls, batches, columns=None):
+        data = None
+        for batch in batches:
+            if data is None:
+                columns = batch.schema.names
+                data = [
+                    RaggedColumn() if pyarrow.types.is_list(field.type) or pyarrow.types.is_large_list(field.type) else []
+                    for field in batch.schema
+                ]
+            for column, values in zip(data, batch.columns):
+                if isinstance(column, RaggedColumn):
+                    column.extendArrow(values)
+                else:
+                    column.extend(values.to_pylist())
+        if data is None:
+            data = [[] for column in columns or []]
+        return cls(columns or [], data)
+
+    def __len__(self):
+        return len(self._data[0]) if self._data else 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        return tuple(column[index] for column in self._data)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+
+if "__main__" == __name__:
+    print("SQLRagged is a package file, execution has no effects.\nTo execute tests suite run testsqlragged.py")
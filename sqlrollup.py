@@ -0,0 +1,299 @@
+from collections import OrderedDict
+import copy
+import hashlib
+import logging
+import re
+
+from sqlbuilder import (
+    AggregationFunction,
+    Composer,
+    ConfigHandlerQuery,
+    FieldCollection,
+)
+
+logger = logging.getLogger('SQLRollup')
+
+class Rollup(object):
+    COLUMN = "{}_{}"
+    COLUMN_INVALID = re.compile(r'\W')
+    NAME = "{}.rollup_{}"
+    MATERIALIZED_VIEW = "CREATE MATERIALIZED VIEW IF NOT EXISTS {} AS {}"
+    TABLE = "CREATE OR REPLACE TABLE {} AS {}"
+    DIVIDE = "SAFE_DIVIDE({}, {})"
+    ROW_COUNT = "SELECT COUNT(*) FROM {}"
+
+    MERGE = {
+        AggregationFunction.COUNT: AggregationFunction.SUM,
+        AggregationFunction.MAX: AggregationFunction.MAX,
+        AggregationFunction.MIN: AggregationFunction.MIN,
+        AggregationFunction.SUM: AggregationFunction.SUM,
+    }
+    PARTIALS = {
+        AggregationFunction.AVG: (AggregationFunction.SUM, AggregationFunction.COUNT),
+        AggregationFunction.COUNT: (AggregationFunction.COUNT,),
+        AggregationFunction.MAX: (AggregationFunction.MAX,),
+        AggregationFunction.MIN: (AggregationFunction.MIN,),
+        AggregationFunction.SUM: (AggregationFunction.SUM,),
+    }
+
+    MISSING_MEASURE = "Rollup '{}' has no measure {}({})"
+
+    def __init__(self, dataset, base, dimensions, measures):
+        self._base = None
+        self._dataset = None
+        self._dimensions = None
+        self._measures = None
+        self._name = None
+        self._rows = None
+        self._setup(dataset, base, dimensions, measures)
+
+    @property
+    def base(self):
+        return self._base
+    @base.setter
+    def base(self, base):
+        self._base = base
+
+    @property
+    def dataset(self):
+        return self._dataset
+    @dataset.setter
+    def dataset(self, dataset):
+        self._dataset = dataset
+
+    @property
+    def dimensions(self):
+        return self._dimensions
+    @dimensions.setter
+    def dimensions(self, dimensions):
+        self._dimensions = dimensions
+
+    @property
+    def measures(self):
+        return self._measures
+    @measures.setter
+    def measures(self, measures):
+        self._measures = measures
+
+    @property
+    def name(self):
+        return self._name
+    @name.setter
+    def name(self, name):
+        self._name = name
+
+    @property
+    def rows(self):
+        return self._rows
+    @rows.setter
+    def rows(self, rows):
+        self._rows = rows
+
+    def _setup(self, dataset, base, dimensions, measures):
+        self.dataset = dataset
+        self.base = base
+        self.dimensions = list(dimensions)
+        self.measures = OrderedDict()
+        for operation, field in measures:
+            self.measures[(operation, field)] = self.COLUMN.format(
+                operation.lower(),
+                self.COLUMN_INVALID.sub('_', field)
+            )
+        digest = hashlib.sha1(repr((base, self.dimensions, sorted(self.measures.keys()))).encode('utf-8')).hexdigest()
+        self.name = self.NAME.format(dataset, digest[:12])
+
+    @classmethod
+    def partials(cls, valueClause):
+        return [(operation, valueClause.field) for operation in cls.PARTIALS[valueClause.operation]]
+
+    def table(self):
+        return Composer.TABLE_NAME_ESC.format(self.name)
+
+    def covers(self, base, dimensions, measures):
+        if base != self.base:
+            return False
+        if not set(dimensions).issubset(self.dimensions):
+            return False
+        return set(measures).issubset(self.measures.keys())
+
+    def size(self):
+        if self.rows is None:
+            return (float('inf'), len(self.dimensions))
+        return (self.rows, len(self.dimensions))
+
+    def sql(self):
+        withClause, fromClause, whereClause = self.base
+        columns = list(self.dimensions)
+        for (operation, field), column in self.measures.items():
+            columns.append(FieldCollection.FIELD_ALIAS.format(
+                AggregationFunction(operation, field).apply(),
+                column
+            ))
+        sql = [
+            withClause,
+            Composer.EXPRESSION.format(
+                Composer.STATEMENT_SELECT,
+                Composer.SEPARATOR_FIELDS.join(columns)
+            ),
+            fromClause,
+            whereClause,
+        ]
+        if self.dimensions:
+            sql.append(Composer.EXPRESSION.format(
+                Composer.STATEMENT_GROUPBY,
+                Composer.SEPARATOR_FIELDS.join(self.dimensions)
+            ))
+        return Composer.SEPARATOR_CLAUSES.join([partial for partial in sql if len(partial)])
+
+    def statement(self, materialized=False):
+        if materialized:
+            return self.MATERIALIZED_VIEW.format(self.table(), self.sql())
+        return self.TABLE.format(self.table(), self.sql())
+
+    def _column(self, operation, field):
+        if (operation, field) not in self.measures.keys():
+            logger.error(self.MISSING_MEASURE.format(self.name, operation, field))
+            raise Exception(self.MISSING_MEASURE.format(self.name, operation, field))
+        return self.measures[(operation, field)]
+
+    def expression(self, valueClause):
+        if valueClause.operation == AggregationFunction.AVG:
+            return self.DIVIDE.format(
+                AggregationFunction(
+                    AggregationFunction.SUM,
+                    self._column(AggregationFunction.SUM, valueClause.field)
+                ).apply(),
+                AggregationFunction(
+                    AggregationFunction.SUM,
+                    self._column(AggregationFunction.COUNT, valueClause.field)
+                ).apply()
+            )
+        return AggregationFunction(
+            self.MERGE[valueClause.operation],
+            self._column(valueClause.operation, valueClause.field)
+        ).apply()
+
+
+class RollupComposer(Composer):
+
+    def __init__(self, path, rollup):
+        self._rollup = rollup
+        super(RollupComposer, self).__init__(path)
+
+    @property
+    def rollup(self):
+        return self._rollup
+    @rollup.setter
+    def rollup(self, rollup):
+        self._rollup = rollup
+
+    def _valueExpression(self, valueClause):
+        return self.rollup.expression(valueClause)
+
+
+class RollupManager(object):
+
+    def __init__(self, composers, dataset):
+        self._composers = None
+        self._dataset = None
+        self._rollups = None
+        self._setup(composers, dataset)
+
+    @property
+    def composers(self):
+        return self._composers
+    @composers.setter
+    def composers(self, composers):
+        self._composers = composers
+
+    @property
+    def dataset(self):
+        return self._dataset
+    @dataset.setter
+    def dataset(self, dataset):
+        self._dataset = dataset
+
+    @property
+    def rollups(self):
+        return self._rollups
+    @rollups.setter
+    def rollups(self, rollups):
+        self._rollups = rollups
+
+    def _setup(self, composers, dataset):
+        self.composers = list(composers)
+        self.dataset = dataset
+        self._derive()
+
+    def _requirements(self, composer):
+        dimensions = []
+        for position, clause in sorted(composer.groupByClauses.clauses.items()):
+            if clause.aggregation:
+                return None
+            dimensions.append(clause.field)
+        measures = []
+        for position, clause in sorted(composer.valueClauses.clauses.items()):
+            if clause.operation not in Rollup.PARTIALS.keys():
+                return None
+            if clause.modifier is not None or clause.order is not None:
+                return None
+            for measure in Rollup.partials(clause):
+                if measure not in measures:
+                    measures.append(measure)
+        return composer.scanClauses(), dimensions, measures
+
+    def _derive(self):
+        bases = OrderedDict()
+        for composer in self.composers:
+            requirements = self._requirements(composer)
+            if requirements is None:
+                continue
+            base, dimensions, measures = requirements
+            bases.setdefault(base, []).append((dimensions, measures))
+        self.rollups = []
+        for base, requirements in bases.items():
+            measures = []
+            for dimensions, required in requirements:
+                measures += [measure for measure in required if measure not in measures]
+            covering = []
+            for dimensions, required in requirements:
+                if any(set(dimensions) < set(other) for other, unused in requirements):
+                    continue
+                if any(set(dimensions) == set(other) for other in covering):
+                    continue
+                covering.append(dimensions)
+            for dimensions in covering:
+                self.rollups.append(Rollup(self.dataset, base, dimensions, measures))
+
+    def statements(self, materialized=False):
+        return [rollup.statement(materialized) for rollup in self.rollups]
+
+    def build(self, client, materialized=False):
+        for rollup in self.rollups:
+            client.query(rollup.statement(materialized))
+            client.query(Rollup.ROW_COUNT.format(rollup.table()))
+            rollup.rows = client.fetchall()[0][0]
+
+    def route(self, composer):
+        requirements = self._requirements(composer)
+        if requirements is None:
+            return None
+        candidates = [rollup for rollup in self.rollups if rollup.covers(*requirements)]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda rollup: rollup.size())
+
+    def rewrite(self, composer):
+        rollup = self.route(composer)
+        if rollup is None:
+            return composer
+        definition = copy.deepcopy(composer.config.config)
+        definition[ConfigHandlerQuery.TABLE] = rollup.name
+        for key in (ConfigHandlerQuery.WITH, ConfigHandlerQuery.WHERE):
+            if key in definition.keys():
+                del definition[key]
+        return RollupComposer(definition, rollup)
+
+
+if "__main__" == __name__:
+    print("SQLRollup is a package file, execution has no effects.\nTo execute tests suite run testsqlrollup.py")
@@ -0,0 +1,119 @@
+import logging
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger('SQLRow')
+
+class RecordPage(object):
+
+    def __init__(self, records, columns, positions=None):
+        self._columns = list(columns)
+        self._decoded = [None] * len(self._columns)
+        self._index = dict((name, position) for position, name in enumerate(self._columns))
+        self._positions = list(range(len(self._columns))) if positions is None else list(positions)
+        self._records = records
+
+    @property
+    def columns(self):
+        return self._columns
+
+    def position(self, key):
+        if isinstance(key, int):
+            return key
+        return self._index[key]
+
+    def _decode(self, position):
+        source = self._positions[position]
+        return [record[source] for record in self._records]
+
+    def column(self, position):
+        values = self._decoded[position]
+        if values is None:
+            values = self._decoded[position] = self._decode(position)
+        return values
+
+    def rows(self):
+        return [LazyRow(self, index) for index in range(len(self))]
+
+    def records(self):
+        return list(zip(*[self.column(position) for position in range(len(self.columns))]))
+
+    def __len__(self):
+        return len(self._records)
+
+
+class ArrowPage(RecordPage):
+
+    def __init__(self, batch, columns=None):
+        if columns is not None:
+            batch = pyarrow.RecordBatch.from_arrays([batch.column(name) for name in columns], names=list(columns))
+        super(ArrowPage, self).__init__(batch, batch.schema.names)
+
+    def _decode(self, position):
+        return self._records.column(position).to_pylist()
+
+    def __len__(self):
+        return self._records.num_rows
+
+
+class LazyRow(object):
+    __slots__ = ('_page', '_index')
+
+    def __init__(self, page, index):
+        self._page = page
+        self._index = index
+
+    @classmethod
+    def readable(cls, rows):
+        return pyarrow is not None and hasattr(rows, 'to_arrow_iterable')
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.values()[key]
+        if isinstance(key, int):
+            if key < 0:
+                key += len(self)
+            return self._page.column(key)[self._index]
+        return self._page.column(self._page.position(key))[self._index]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except (IndexError, KeyError):
+            return default
+
+    def keys(self):
+        return list(self._page.columns)
+
+    def values(self):
+        return tuple(self._page.column(position)[self._index] for position in range(len(self)))
+
+    def items(self):
+        return list(zip(self.keys(), self.values()))
+
+    def __len__(self):
+        return len(self._page.columns)
+
+    def __iter__(self):
+        return iter(self.values())
+
+    def __eq__(self, other):
+        if isinstance(other, LazyRow):
+            other = other.values()
+        return self.values() == tuple(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.values())
+
+    def __repr__(self):
+        return repr(self.values())
+
+
+if "__main__" == __name__:
+    print("SQLRow is a package file, execution has no effects.\nTo execute tests suite run testsqlrow.py")
@@ -0,0 +1,277 @@
+from collections import deque
+from concurrent.futures import Future
+import logging
+import threading
+import time
+
+logger = logging.getLogger('SQLScheduler')
+
+class TokenBucket(object):
+
+    def __init__(self, rate, capacity=None):
+        self._capacity = None
+        self._rate = None
+        self._tokens = None
+        self._updated = None
+        self._lock = threading.Lock()
+        self._setup(rate, capacity)
+
+    @property
+    def capacity(self):
+        return self._capacity
+    @capacity.setter
+    def capacity(self, capacity):
+        self._capacity = capacity
+
+    @property
+    def rate(self):
+        return self._rate
+    @rate.setter
+    def rate(self, rate):
+        self._rate = rate
+
+    def _setup(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1.0):
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class Ticket(object):
+
+    def __init__(self, sqlQuery, priority, kwargs):
+        self._future = None
+        self._kwargs = None
+        self._priority = None
+        self._queued = None
+        self._sqlQuery = None
+        self._setup(sqlQuery, priority, kwargs)
+
+    @property
+    def future(self):
+        return self._future
+    @future.setter
+    def future(self, future):
+        self._future = future
+
+    @property
+    def kwargs(self):
+        return self._kwargs
+    @kwargs.setter
+    def kwargs(self, kwargs):
+        self._kwargs = kwargs
+
+    @property
+    def priority(self):
+        return self._priority
+    @priority.setter
+    def priority(self, priority):
+        self._priority = priority
+
+    @property
+    def queued(self):
+        return self._queued
+    @queued.setter
+    def queued(self, queued):
+        self._queued = queued
+
+    @property
+    def sqlQuery(self):
+        return self._sqlQuery
+    @sqlQuery.setter
+    def sqlQuery(self, sqlQuery):
+        self._sqlQuery = sqlQuery
+
+    def _setup(self, sqlQuery, priority, kwargs):
+        self.sqlQuery = sqlQuery
+        self.priority = priority
+        self.kwargs = kwargs
+        self.future = Future()
+        self.queued = time.monotonic()
+
+
+class Scheduler(object):
+    INTERACTIVE = 'INTERACTIVE'
+    BACKGROUND = 'BACKGROUND'
+    PRIORITIES = (INTERACTIVE, BACKGROUND)
+    WEIGHTS = {INTERACTIVE: 4, BACKGROUND: 1}
+
+    METRIC_COMPLETED = 'completed'
+    METRIC_FAILED = 'failed'
+    METRIC_QUEUED = 'queued'
+    METRIC_RUNNING = 'running'
+    METRIC_SUBMITTED = 'submitted'
+    METRIC_WAIT_MAX = 'waitMax'
+    METRIC_WAIT_MEAN = 'waitMean'
+    METRIC_WAIT_TOTAL = 'waitTotal'
+
+    INVALID_PRIORITY = "Priority '{}' not supported, use one of {}"
+    SHUT_DOWN = "Scheduler is shut down, no new queries accepted"
+
+    def __init__(self, client, slots=4, rate=None, burst=None, weights=None):
+        self._bucket = None
+        self._client = None
+        self._credits = None
+        self._queues = None
+        self._slots = None
+        self._statistics = None
+        self._weights = None
+        self._workers = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._setup(client, slots, rate, burst, weights)
+
+    @property
+    def bucket(self):
+        return self._bucket
+    @bucket.setter
+    def bucket(self, bucket):
+        self._bucket = bucket
+
+    @property
+    def client(self):
+        return self._client
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    @property
+    def slots(self):
+        return self._slots
+    @slots.setter
+    def slots(self, slots):
+        self._slots = slots
+
+    @property
+    def weights(self):
+        return self._weights
+    @weights.setter
+    def weights(self, weights):
+        self._weights = weights
+
+    def _setup(self, client, slots, rate, burst, weights):
+        self.client = client
+        self.slots = slots
+        self.weights = dict(self.WEIGHTS)
+        self.weights.update(weights or {})
+        if rate is not None:
+            self.bucket = TokenBucket(rate, burst)
+        self._queues = dict((priority, deque()) for priority in self.PRIORITIES)
+        self._credits = dict(self.weights)
+        self._statistics = dict((priority, {
+            self.METRIC_COMPLETED: 0,
+            self.METRIC_FAILED: 0,
+            self.METRIC_RUNNING: 0,
+            self.METRIC_SUBMITTED: 0,
+            self.METRIC_WAIT_MAX: 0.0,
+            self.METRIC_WAIT_TOTAL: 0.0,
+        }) for priority in self.PRIORITIES)
+        self._workers = []
+        for slot in range(self.slots):
+            worker = threading.Thread(target=self._work, name='SQLScheduler-{}'.format(slot))
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, sqlQuery, priority=INTERACTIVE, **kwargs):
+        if priority not in self.PRIORITIES:
+            logger.error(self.INVALID_PRIORITY.format(priority, self.PRIORITIES))
+            raise Exception(self.INVALID_PRIORITY.format(priority, self.PRIORITIES))
+        ticket = Ticket(sqlQuery, priority, kwargs)
+        with self._condition:
+            if self._closed:
+                logger.error(self.SHUT_DOWN)
+                raise Exception(self.SHUT_DOWN)
+            self._queues[priority].append(ticket)
+            self._statistics[priority][self.METRIC_SUBMITTED] += 1
+            self._condition.notify()
+        return ticket.future
+
+    def query(self, sqlQuery, priority=INTERACTIVE, **kwargs):
+        return self.submit(sqlQuery, priority, **kwargs).result()
+
+    def _next(self):
+        waiting = [priority for priority in self.PRIORITIES if self._queues[priority]]
+        if not waiting:
+            return None
+        if not any(self._credits[priority] > 0 for priority in waiting):
+            self._credits = dict(self.weights)
+        for priority in waiting:
+            if self._credits[priority] > 0:
+                self._credits[priority] -= 1
+                return self._queues[priority].popleft()
+
+    def _work(self):
+        while True:
+            with self._condition:
+                ticket = self._next()
+                while ticket is None:
+                    if self._closed:
+                        return
+                    self._condition.wait()
+                    ticket = self._next()
+            if not ticket.future.set_running_or_notify_cancel():
+                continue
+            if self.bucket is not None:
+                self.bucket.acquire()
+            self._run(ticket)
+
+    def _run(self, ticket):
+        statistics = self._statistics[ticket.priority]
+        waited = time.monotonic() - ticket.queued
+        with self._condition:
+            statistics[self.METRIC_RUNNING] += 1
+            statistics[self.METRIC_WAIT_TOTAL] += waited
+            statistics[self.METRIC_WAIT_MAX] = max(statistics[self.METRIC_WAIT_MAX], waited)
+        try:
+            records = self.client.submit(ticket.sqlQuery, **ticket.kwargs).fetchall()
+        except Exception as error:
+            with self._condition:
+                statistics[self.METRIC_RUNNING] -= 1
+                statistics[self.METRIC_FAILED] += 1
+            ticket.future.set_exception(error)
+            return
+        with self._condition:
+            statistics[self.METRIC_RUNNING] -= 1
+            statistics[self.METRIC_COMPLETED] += 1
+        ticket.future.set_result(records)
+
+    def metrics(self):
+        with self._condition:
+            metrics = {}
+            for priority in self.PRIORITIES:
+                statistics = dict(self._statistics[priority])
+                started = statistics[self.METRIC_SUBMITTED] - len(self._queues[priority])
+                statistics[self.METRIC_QUEUED] = len(self._queues[priority])
+                statistics[self.METRIC_WAIT_MEAN] = statistics[self.METRIC_WAIT_TOTAL] / started if started else 0.0
+                metrics[priority] = statistics
+        return metrics
+
+    def shutdown(self, wait=True):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+
+if "__main__" == __name__:
+    print("SQLScheduler is a package file, execution has no effects.\nTo execute tests suite run testsqlscheduler.py")
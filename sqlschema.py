@@ -0,0 +1,277 @@
+from collections import OrderedDict, namedtuple
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from sqlbuilder import AggregationFunction, Composer, ConfigHandlerWhere
+
+logger = logging.getLogger('SQLSchema')
+
+Column = namedtuple('Column', 'name type mode')
+
+class BigQuerySchemaSource(object):
+    NESTED = ('RECORD', 'STRUCT')
+    NESTED_NAME = '{}.{}'
+
+    def __init__(self, client):
+        self._client = client
+
+    @property
+    def client(self):
+        return self._client
+
+    def _columns(self, fields, prefix=None):
+        columns = []
+        for field in fields:
+            name = field.name if prefix is None else self.NESTED_NAME.format(prefix, field.name)
+            columns.append(Column(name, field.field_type, field.mode))
+            if field.field_type in self.NESTED:
+                columns += self._columns(field.fields, name)
+        return columns
+
+    def fetch(self, table):
+        return self._columns(self.client.get_table(table).schema)
+
+
+class JSONSchemaSource(object):
+    NAME = 'name'
+    TYPE = 'type'
+    MODE = 'mode'
+    MODE_DEFAULT = 'NULLABLE'
+
+    ERROR_ACCESS = "Can not open schema file: {}"
+    MISSING_TABLE = "Schema for table '{}' not found"
+
+    def __init__(self, schemas):
+        self._schemas = None
+        self._setup(schemas)
+
+    @property
+    def schemas(self):
+        return self._schemas
+    @schemas.setter
+    def schemas(self, schemas):
+        self._schemas = schemas
+
+    def _setup(self, schemas):
+        if isinstance(schemas, dict):
+            self.schemas = schemas
+            return
+        try:
+            with open(schemas) as handle:
+                self.schemas = json.load(handle)
+        except (IOError, ValueError):
+            logger.error(self.ERROR_ACCESS.format(schemas))
+            raise Exception(self.ERROR_ACCESS.format(schemas))
+
+    def fetch(self, table):
+        if table not in self.schemas.keys():
+            logger.error(self.MISSING_TABLE.format(table))
+            raise Exception(self.MISSING_TABLE.format(table))
+        return [
+            Column(field[self.NAME], field[self.TYPE].upper(), field.get(self.MODE, self.MODE_DEFAULT).upper())
+            for field in self.schemas[table]
+        ]
+
+
+class SchemaRegistry(object):
+    TTL = 3600.0
+    FILENAME = '{}.json'
+    STATE_FETCHED = 'fetched'
+    STATE_FIELDS = 'fields'
+    STATE_TABLE = 'table'
+    MODE_REPEATED = 'REPEATED'
+
+    NUMERIC = ('BIGNUMERIC', 'FLOAT', 'FLOAT64', 'INT64', 'INTEGER', 'NUMERIC')
+    TEMPORAL = ('DATE', 'DATETIME', 'TIMESTAMP')
+    UNORDERED = ('GEOGRAPHY', 'JSON', 'RECORD', 'STRUCT')
+    NUMERIC_OPERATIONS = (AggregationFunction.AVG, AggregationFunction.SUM)
+    ORDERED_OPERATIONS = (AggregationFunction.MAX, AggregationFunction.MIN)
+    IDENTIFIER = re.compile(r'^[A-Za-z_][\w.]*$')
+    ALIAS = re.compile(r'\s+AS\s+(\w+)\s*$', re.IGNORECASE)
+
+    INVALID_DEFINITION = "Definition on '{}' is not valid:\n{}"
+    MISSING_FIELD = "{} field '{}' not found in '{}'"
+    NOT_NUMERIC = "{}({}) needs a numeric column, '{}' is {}"
+    NOT_ORDERED = "{}({}) needs an orderable column, '{}' is {}"
+    NOT_TEMPORAL = "DateAggregation on '{}' needs a DATE, DATETIME or TIMESTAMP column, found {}"
+    NESTED_ARRAY = "ARRAY_AGG({}) over repeated column '{}' would build an array of arrays"
+    NOT_DISTINCT = "{}(DISTINCT {}) needs a groupable column, '{}' is {}"
+
+    def __init__(self, source, directory=None, ttl=TTL):
+        self._directory = None
+        self._schemas = None
+        self._source = None
+        self._ttl = None
+        self._lock = threading.Lock()
+        self._setup(source, directory, ttl)
+
+    @property
+    def directory(self):
+        return self._directory
+    @directory.setter
+    def directory(self, directory):
+        self._directory = None if directory is None else str(directory)
+
+    @property
+    def source(self):
+        return self._source
+    @source.setter
+    def source(self, source):
+        self._source = source
+
+    @property
+    def ttl(self):
+        return self._ttl
+    @ttl.setter
+    def ttl(self, ttl):
+        self._ttl = ttl
+
+    def _setup(self, source, directory, ttl):
+        self.source = source
+        self.directory = directory
+        self.ttl = ttl
+        self._schemas = {}
+        if self.directory is not None and not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+    def _path(self, table):
+        digest = hashlib.sha1(table.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, self.FILENAME.format(digest))
+
+    def _fresh(self, fetched):
+        return self.ttl is None or time.time() - fetched < self.ttl
+
+    def _load(self, table):
+        if self.directory is None or not os.path.exists(self._path(table)):
+            return None
+        with open(self._path(table)) as handle:
+            state = json.load(handle)
+        if state[self.STATE_TABLE] != table or not self._fresh(state[self.STATE_FETCHED]):
+            return None
+        return state[self.STATE_FETCHED], [Column(*field) for field in state[self.STATE_FIELDS]]
+
+    def _store(self, table, fetched, columns):
+        if self.directory is None:
+            return
+        state = {
+            self.STATE_TABLE: table,
+            self.STATE_FETCHED: fetched,
+            self.STATE_FIELDS: [list(column) for column in columns],
+        }
+        handle, temporary = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(handle, 'w') as stream:
+                json.dump(state, stream)
+            os.replace(temporary, self._path(table))
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def schema(self, table):
+        with self._lock:
+            cached = self._schemas.get(table)
+            if cached is None or not self._fresh(cached[0]):
+                cached = self._load(table)
+                if cached is None:
+                    cached = (time.time(), self.source.fetch(table))
+                    self._store(table, *cached)
+                self._schemas[table] = cached
+        return OrderedDict((column.name, column) for column in cached[1])
+
+    def invalidate(self, table=None):
+        with self._lock:
+            tables = list(self._schemas.keys()) if table is None else [table]
+            for name in tables:
+                self._schemas.pop(name, None)
+                if self.directory is not None and os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+
+    def _cteSchema(self, clause, schemas):
+        source = schemas[clause.table] if clause.table in schemas.keys() else self.schema(clause.table)
+        if not clause.fields:
+            return source
+        columns = OrderedDict()
+        for field in clause.fields:
+            alias = self.ALIAS.search(field)
+            if alias is not None:
+                columns[alias.group(1)] = Column(alias.group(1), None, None)
+            elif field in source.keys():
+                columns[field] = source[field]
+            else:
+                columns[field] = Column(field, None, None)
+        return columns
+
+    def _field(self, errors, schema, table, kind, field):
+        if not self.IDENTIFIER.match(field):
+            return None
+        if field not in schema.keys():
+            errors.append(self.MISSING_FIELD.format(kind, field, table))
+            return None
+        return schema[field]
+
+    def _checkWith(self, errors, composer):
+        schemas = OrderedDict()
+        for position, clause in sorted((composer.withClauses.clauses or {}).items()):
+            source = schemas[clause.table] if clause.table in schemas.keys() else self.schema(clause.table)
+            for field in clause.fields or []:
+                if self.ALIAS.search(field) is None:
+                    self._field(errors, source, clause.table, 'With', field)
+            for where in clause.where or []:
+                self._field(errors, source, clause.table, 'With condition', ConfigHandlerWhere(where)().field)
+            schemas[clause.name] = self._cteSchema(clause, schemas)
+        return schemas
+
+    def _checkTemporal(self, errors, column):
+        if column is not None and column.type is not None and column.type not in self.TEMPORAL:
+            errors.append(self.NOT_TEMPORAL.format(column.name, column.type))
+
+    def _checkValue(self, errors, clause, column):
+        if column is None or column.type is None:
+            return
+        operation = clause.operation
+        if operation in self.NUMERIC_OPERATIONS and column.type not in self.NUMERIC:
+            errors.append(self.NOT_NUMERIC.format(operation, clause.field, column.name, column.type))
+        if operation in self.ORDERED_OPERATIONS:
+            if column.type in self.UNORDERED or column.mode == self.MODE_REPEATED:
+                errors.append(self.NOT_ORDERED.format(operation, clause.field, column.name, column.type))
+        if operation == AggregationFunction.ARRAY_AGG and column.mode == self.MODE_REPEATED:
+            errors.append(self.NESTED_ARRAY.format(clause.field, column.name))
+        if clause.modifier is not None and (column.type in self.UNORDERED or column.mode == self.MODE_REPEATED):
+            errors.append(self.NOT_DISTINCT.format(operation, clause.field, column.name, column.type))
+
+    def validate(self, composer):
+        errors = []
+        schemas = self._checkWith(errors, composer)
+        table = composer.table
+        schema = schemas[table] if table in schemas.keys() else self.schema(table)
+        for position, clause in sorted(composer.groupByClauses.clauses.items()):
+            column = self._field(errors, schema, table, 'Group', clause.field)
+            if clause.aggregation:
+                self._checkTemporal(errors, column)
+        for position, clause in sorted(composer.valueClauses.clauses.items()):
+            if clause.field == Composer.QUALIFIER_ALL:
+                continue
+            column = self._field(errors, schema, table, 'Value', clause.field)
+            self._checkValue(errors, clause, column)
+            if clause.dateAggregation:
+                self._checkTemporal(errors, column)
+        for position, clause in sorted((composer.whereClauses.clauses or {}).items()):
+            self._field(errors, schema, table, 'Where', clause.field)
+        return errors
+
+    def check(self, composer):
+        errors = self.validate(composer)
+        if errors:
+            logger.error(self.INVALID_DEFINITION.format(composer.table, '\n'.join(errors)))
+            raise Exception(self.INVALID_DEFINITION.format(composer.table, '\n'.join(errors)))
+        return composer
+
+
+if "__main__" == __name__:
+    print("SQLSchema is a package file, execution has no effects.\nTo execute tests suite run testsqlschema.py")
@@ -0,0 +1,376 @@
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import datetime
+import decimal
+import json
+import logging
+import queue
+import threading
+
+from sqlbuilder import Composer
+from sqlcache import ResultCache
+from sqlclient import SQLClient
+from sqlstore import ResultStore
+
+logger = logging.getLogger('SQLService')
+
+class ClientPool(object):
+    SIZE = 4
+
+    def __init__(self, factory=SQLClient, size=SIZE):
+        self._clients = None
+        self._factory = None
+        self._size = None
+        self._setup(factory, size)
+
+    @property
+    def factory(self):
+        return self._factory
+    @factory.setter
+    def factory(self, factory):
+        self._factory = factory
+
+    @property
+    def size(self):
+        return self._size
+    @size.setter
+    def size(self, size):
+        self._size = size
+
+    def _setup(self, factory, size):
+        self.factory = factory
+        self.size = size
+        self._clients = queue.Queue()
+        for index in range(self.size):
+            self._clients.put(self.factory())
+
+    def available(self):
+        return self._clients.qsize()
+
+    def acquire(self):
+        return self._clients.get()
+
+    def release(self, client):
+        self._clients.put(client)
+
+    @contextmanager
+    def client(self):
+        client = self.acquire()
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+
+class QueryService(object):
+    CHUNK_SIZE = 500
+    KEY_DEFINITION = 'definition'
+    KEY_SQL = 'sql'
+    KEY_CACHE = 'cache'
+
+    MISSING_QUERY = "Request needs either '{}' or '{}'".format(KEY_DEFINITION, KEY_SQL)
+
+    def __init__(self, pool, results=None, definitions=None, chunkSize=CHUNK_SIZE):
+        self._chunkSize = None
+        self._definitions = None
+        self._pool = None
+        self._results = None
+        self._setup(pool, results, definitions, chunkSize)
+
+    @property
+    def chunkSize(self):
+        return self._chunkSize
+    @chunkSize.setter
+    def chunkSize(self, chunkSize):
+        self._chunkSize = chunkSize
+
+    @property
+    def definitions(self):
+        return self._definitions
+    @definitions.setter
+    def definitions(self, definitions):
+        self._definitions = definitions
+
+    @property
+    def pool(self):
+        return self._pool
+    @pool.setter
+    def pool(self, pool):
+        self._pool = pool
+
+    @property
+    def results(self):
+        return self._results
+    @results.setter
+    def results(self, results):
+        self._results = results
+
+    def _setup(self, pool, results, definitions, chunkSize):
+        self.pool = pool
+        self.results = ResultCache() if results is None else results
+        self.definitions = ResultCache(ttl=None) if definitions is None else definitions
+        self.chunkSize = chunkSize
+
+    def compile(self, definition):
+        key = json.dumps(definition, sort_keys=True)
+        sql = self.definitions.get(key)
+        if sql is None:
+            sql = Composer(definition).buildQuery()
+            self.definitions.put(key, sql)
+        return sql
+
+    def sql(self, request):
+        if request.get(self.KEY_SQL):
+            return request[self.KEY_SQL]
+        if request.get(self.KEY_DEFINITION):
+            return self.compile(request[self.KEY_DEFINITION])
+        logger.error(self.MISSING_QUERY)
+        raise Exception(self.MISSING_QUERY)
+
+    def execute(self, sql, cache=True):
+        key = ResultStore.fingerprint(sql)
+        cached = self.results.get(key) if cache else None
+        if cached is not None:
+            columns, records = cached
+            return ResultStream(self, key, columns, records=records)
+        client = self.pool.acquire()
+        try:
+            handle = client.submit(sql).result()
+        except Exception:
+            self.pool.release(client)
+            raise
+        return ResultStream(self, key, handle.columns, client, handle)
+
+
+class ResultStream(object):
+
+    def __init__(self, service, key, columns, client=None, handle=None, records=None):
+        self._cached = None
+        self._client = None
+        self._columns = None
+        self._handle = None
+        self._key = None
+        self._records = None
+        self._service = None
+        self._setup(service, key, columns, client, handle, records)
+
+    @property
+    def cached(self):
+        return self._cached
+    @cached.setter
+    def cached(self, cached):
+        self._cached = cached
+
+    @property
+    def client(self):
+        return self._client
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    @property
+    def columns(self):
+        return self._columns
+    @columns.setter
+    def columns(self, columns):
+        self._columns = columns
+
+    @property
+    def handle(self):
+        return self._handle
+    @handle.setter
+    def handle(self, handle):
+        self._handle = handle
+
+    @property
+    def key(self):
+        return self._key
+    @key.setter
+    def key(self, key):
+        self._key = key
+
+    @property
+    def records(self):
+        return self._records
+    @records.setter
+    def records(self, records):
+        self._records = records
+
+    @property
+    def service(self):
+        return self._service
+    @service.setter
+    def service(self, service):
+        self._service = service
+
+    def _setup(self, service, key, columns, client, handle, records):
+        self.service = service
+        self.key = key
+        self.columns = columns
+        self.client = client
+        self.handle = handle
+        self.records = records
+        self.cached = records is not None
+
+    def __iter__(self):
+        chunkSize = self.service.chunkSize
+        if self.cached:
+            for start in range(0, len(self.records), chunkSize):
+                yield self.records[start:start + chunkSize]
+            return
+        records = []
+        chunk = []
+        try:
+            for record in self.handle:
+                chunk.append(record)
+                if len(chunk) >= chunkSize:
+                    records += chunk
+                    yield chunk
+                    chunk = []
+        finally:
+            self.close()
+        if chunk:
+            records += chunk
+            yield chunk
+        self.service.results.put(self.key, (self.columns, records))
+
+    def close(self):
+        if self.client is not None:
+            self.service.pool.release(self.client)
+            self.client = None
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    PATH_COMPILE = '/compile'
+    PATH_HEALTH = '/health'
+    PATH_QUERY = '/query'
+    CONTENT_JSON = 'application/json'
+    CONTENT_NDJSON = 'application/x-ndjson'
+    CHUNK = '{:x}\r\n'
+    CHUNK_END = b'0\r\n\r\n'
+
+    NOT_FOUND = "Path '{}' not found"
+
+    def log_message(self, format, *args):
+        logger.info(format % args)
+
+    def _default(self, value):
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.isoformat()
+        if isinstance(value, decimal.Decimal):
+            return str(value)
+        return repr(value)
+
+    def _encode(self, document):
+        return json.dumps(document, default=self._default).encode('utf-8')
+
+    def _respond(self, status, document):
+        body = self._encode(document)
+        self.send_response(status)
+        self.send_header('Content-Type', self.CONTENT_JSON)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, document):
+        line = self._encode(document) + b'\n'
+        self.wfile.write(self.CHUNK.format(len(line)).encode('ascii') + line + b'\r\n')
+        self.wfile.flush()
+
+    def _request(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+
+    def do_GET(self):
+        if self.path != self.PATH_HEALTH:
+            self._respond(404, {'error': self.NOT_FOUND.format(self.path)})
+            return
+        service = self.server.service
+        self._respond(200, {
+            'status': 'ok',
+            'clients': service.pool.available(),
+            'results': service.results.statistics(),
+            'definitions': service.definitions.statistics(),
+        })
+
+    def do_POST(self):
+        if self.path not in (self.PATH_COMPILE, self.PATH_QUERY):
+            self._respond(404, {'error': self.NOT_FOUND.format(self.path)})
+            return
+        service = self.server.service
+        try:
+            request = self._request()
+            sql = service.sql(request)
+            if self.path == self.PATH_COMPILE:
+                self._respond(200, {'sql': sql})
+                return
+            stream = service.execute(sql, request.get(QueryService.KEY_CACHE, True))
+        except Exception as error:
+            self._respond(400, {'error': str(error)})
+            return
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', self.CONTENT_NDJSON)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            self._chunk({'columns': stream.columns, 'sql': sql, 'cached': stream.cached})
+            rows = 0
+            try:
+                for chunk in stream:
+                    rows += len(chunk)
+                    self._chunk({'rows': [list(record) for record in chunk]})
+            except Exception as error:
+                self._chunk({'error': str(error)})
+            else:
+                self._chunk({'done': True, 'count': rows})
+            self.wfile.write(self.CHUNK_END)
+            self.wfile.flush()
+        finally:
+            stream.close()
+
+class QueryServer(object):
+    HOST = '127.0.0.1'
+    PORT = 8080
+
+    def __init__(self, service, host=HOST, port=PORT):
+        self._server = None
+        self._service = None
+        self._thread = None
+        self._setup(service, host, port)
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    @property
+    def service(self):
+        return self._service
+    @service.setter
+    def service(self, service):
+        self._service = service
+
+    def _setup(self, service, host, port):
+        self.service = service
+        self._server = ThreadingHTTPServer((host, port), QueryRequestHandler)
+        self._server.daemon_threads = True
+        self._server.service = service
+
+    def serve(self):
+        self._server.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve, name='SQLService')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+if "__main__" == __name__:
+    print("SQLService is a package file, execution has no effects.\nTo execute tests suite run testsqlservice.py")
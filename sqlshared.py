@@ -0,0 +1,314 @@
+from array import array
+from collections import namedtuple
+from multiprocessing import resource_tracker, shared_memory
+import logging
+import pickle
+import threading
+
+logger = logging.getLogger('SQLShared')
+
+SharedColumnLayout = namedtuple('SharedColumnLayout', 'name kind data size bounds validity')
+SharedHandle = namedtuple('SharedHandle', 'segment length columns')
+
+class SharedColumn(object):
+    KIND_FLOAT = 'd'
+    KIND_INTEGER = 'q'
+    KIND_OBJECT = 'object'
+    KIND_STRING = 'string'
+    ENCODING = 'utf-8'
+
+    def __init__(self, table, layout):
+        self._layout = layout
+        self._objects = None
+        self._table = table
+        self._bounds = None
+        self._validity = None
+        self._values = None
+        self._setup()
+
+    @property
+    def kind(self):
+        return self._layout.kind
+
+    @property
+    def name(self):
+        return self._layout.name
+
+    @property
+    def values(self):
+        return self._values
+
+    def _setup(self):
+        layout = self._layout
+        if layout.validity is not None:
+            self._validity = self._table.view(layout.validity, len(self))
+        if layout.kind in (self.KIND_FLOAT, self.KIND_INTEGER):
+            self._values = self._table.view(layout.data, layout.size, layout.kind)
+        elif layout.kind == self.KIND_STRING:
+            self._bounds = self._table.view(layout.bounds, (len(self) + 1) * 8, self.KIND_INTEGER)
+            self._values = self._table.view(layout.data, layout.size)
+
+    def __len__(self):
+        return self._table.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if self.kind == self.KIND_OBJECT:
+            if self._objects is None:
+                self._objects = pickle.loads(self._table.view(self._layout.data, self._layout.size))
+            return self._objects[index]
+        if self._validity is not None and not self._validity[index]:
+            return None
+        if self.kind == self.KIND_STRING:
+            return bytes(self._values[self._bounds[index]:self._bounds[index + 1]]).decode(self.ENCODING)
+        return self._values[index]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def tolist(self):
+        if self.kind in (self.KIND_FLOAT, self.KIND_INTEGER) and self._validity is None:
+            return self._values.tolist()
+        return list(self)
+
+
+class SharedTable(object):
+
+    def __init__(self, handle, memory):
+        self._columns = None
+        self._handle = handle
+        self._memory = memory
+        self._views = []
+        self._setup()
+
+    @property
+    def columns(self):
+        return [layout.name for layout in self._handle.columns]
+
+    @property
+    def handle(self):
+        return self._handle
+
+    @property
+    def length(self):
+        return self._handle.length
+
+    def _setup(self):
+        self._columns = [SharedColumn(self, layout) for layout in self._handle.columns]
+
+    def view(self, offset, size, format=None):
+        view = self._memory.buf[offset:offset + size]
+        self._views.append(view)
+        if format is None:
+            return view
+        view = view.cast(format)
+        self._views.append(view)
+        return view
+
+    def column(self, name):
+        return self._columns[self.columns.index(name)]
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        return tuple(column[index] for column in self._columns)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def close(self):
+        self._columns = []
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._memory.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        self.close()
+        return False
+
+
+class SharedResult(object):
+    ALIGNMENT = 8
+
+    _published = set()
+
+    RELEASED = "Shared result {} already released"
+
+    def __init__(self, columns, records):
+        self._handle = None
+        self._memory = None
+        self._references = 1
+        self._lock = threading.Lock()
+        self._released = threading.Event()
+        self._setup(columns, records)
+
+    @property
+    def handle(self):
+        return self._handle
+
+    @property
+    def name(self):
+        return self._handle.segment
+
+    @property
+    def references(self):
+        return self._references
+
+    @property
+    def released(self):
+        return self._released.is_set()
+
+    def _kind(self, values):
+        kinds = set()
+        for value in values:
+            if value is None:
+                continue
+            if isinstance(value, bool):
+                return SharedColumn.KIND_OBJECT
+            if isinstance(value, int):
+                kinds.add(SharedColumn.KIND_INTEGER)
+            elif isinstance(value, float):
+                kinds.add(SharedColumn.KIND_FLOAT)
+            elif isinstance(value, str):
+                kinds.add(SharedColumn.KIND_STRING)
+            else:
+                return SharedColumn.KIND_OBJECT
+        if kinds == set([SharedColumn.KIND_INTEGER, SharedColumn.KIND_FLOAT]):
+            return SharedColumn.KIND_FLOAT
+        if len(kinds) > 1:
+            return SharedColumn.KIND_OBJECT
+        return kinds.pop() if kinds else SharedColumn.KIND_OBJECT
+
+    def _encode(self, values):
+        kind = self._kind(values)
+        if kind == SharedColumn.KIND_OBJECT:
+            return kind, pickle.dumps(list(values), pickle.HIGHEST_PROTOCOL), None, None
+        validity = None
+        if any(value is None for value in values):
+            validity = bytes(value is not None for value in values)
+        if kind == SharedColumn.KIND_STRING:
+            encoded = [b'' if value is None else value.encode(SharedColumn.ENCODING) for value in values]
+            bounds = array(SharedColumn.KIND_INTEGER, [0])
+            total = 0
+            for item in encoded:
+                total += len(item)
+                bounds.append(total)
+            return kind, b''.join(encoded), bounds.tobytes(), validity
+        default = 0.0 if kind == SharedColumn.KIND_FLOAT else 0
+        try:
+            data = array(kind, [default if value is None else value for value in values])
+        except OverflowError:
+            return SharedColumn.KIND_OBJECT, pickle.dumps(list(values), pickle.HIGHEST_PROTOCOL), None, None
+        return kind, data.tobytes(), None, validity
+
+    def _aligned(self, offset):
+        return -(-offset // self.ALIGNMENT) * self.ALIGNMENT
+
+    def _setup(self, columns, records):
+        records = records if isinstance(records, list) else list(records)
+        columns = list(columns)
+        data = list(zip(*records)) if records else [() for column in columns]
+        encoded = [self._encode(values) for values in data]
+        layouts = []
+        offset = 0
+        for name, (kind, payload, bounds, validity) in zip(columns, encoded):
+            positions = []
+            for part in (payload, bounds, validity):
+                if part is None:
+                    positions.append(None)
+                    continue
+                positions.append(offset)
+                offset = self._aligned(offset + len(part))
+            layouts.append(SharedColumnLayout(name, kind, positions[0], len(payload), positions[1], positions[2]))
+        self._memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for layout, (kind, payload, bounds, validity) in zip(layouts, encoded):
+            for position, part in ((layout.data, payload), (layout.bounds, bounds), (layout.validity, validity)):
+                if part is not None:
+                    self._memory.buf[position:position + len(part)] = part
+        self._handle = SharedHandle(self._memory.name, len(records), tuple(layouts))
+        self._published.add(self._memory.name)
+
+    @classmethod
+    def publish(cls, columns, records):
+        return cls(columns, records)
+
+    @classmethod
+    def _open(cls, segment):
+        try:
+            return shared_memory.SharedMemory(name=segment, track=False)
+        except TypeError:
+            pass
+        memory = shared_memory.SharedMemory(name=segment)
+        if memory.name not in cls._published:
+            resource_tracker.unregister(memory._name, 'shared_memory')
+        return memory
+
+    @classmethod
+    def attach(cls, handle):
+        return SharedTable(handle, cls._open(handle.segment))
+
+    def acquire(self):
+        with self._lock:
+            if self._references == 0:
+                logger.error(self.RELEASED.format(self.name))
+                raise Exception(self.RELEASED.format(self.name))
+            self._references += 1
+        return self._handle
+
+    def release(self, *args):
+        with self._lock:
+            if self._references == 0:
+                return
+            self._references -= 1
+            if self._references > 0:
+                return
+        self._memory.close()
+        self._memory.unlink()
+        self._published.discard(self.name)
+        self._released.set()
+
+    def wait(self, timeout=None):
+        return self._released.wait(timeout)
+
+    @classmethod
+    def _run(cls, function, handle, args):
+        with cls.attach(handle) as table:
+            return function(table, *args)
+
+    def submit(self, pool, function, *args):
+        handle = self.acquire()
+
+        def done(result):
+            self.release()
+
+        return pool.apply_async(self._run, (function, handle, args), callback=done, error_callback=done)
+
+    def map(self, pool, function, arguments):
+        results = [self.submit(pool, function, *argument) for argument in arguments]
+        return [result.get() for result in results]
+
+    def close(self):
+        self.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        self.close()
+        return False
+
+
+if "__main__" == __name__:
+    print("SQLShared is a package file, execution has no effects.\nTo execute tests suite run testsqlshared.py")
@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.feather
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger('SQLStore')
+
+class ResultStore(object):
+    FORMAT_FEATHER = 'feather'
+    FORMAT_PARQUET = 'parquet'
+    FORMATS = (FORMAT_FEATHER, FORMAT_PARQUET)
+    COMPRESSION = 'zstd'
+    UNCOMPRESSED = 'uncompressed'
+    WHITESPACE = re.compile(r'\s+')
+    QUOTED = re.compile(r"('''.*?'''|\"\"\".*?\"\"\"|'(?:\\.|[^'\\])*'|\"(?:\\.|[^\"\\])*\"|`[^`]*`)", re.DOTALL)
+    FILENAME = '{}.{}'
+    COMPARISONS = {
+        '=': 'equal',
+        '==': 'equal',
+        '!=': 'not_equal',
+        '<': 'less',
+        '<=': 'less_equal',
+        '>': 'greater',
+        '>=': 'greater_equal',
+    }
+
+    MISSING_DEPENDENCY = "ResultStore requires pyarrow, install it to persist results"
+    NOT_SUPPORTED = "Result store format '{}' not supported"
+    NOT_SUPPORTED_FILTER = "Result store filter operator '{}' not supported"
+
+    def __init__(self, directory, format=FORMAT_PARQUET, compression=COMPRESSION):
+        self._compression = None
+        self._directory = None
+        self._format = None
+        self._setup(directory, format, compression)
+
+    @property
+    def compression(self):
+        return self._compression
+    @compression.setter
+    def compression(self, compression):
+        self._compression = compression
+
+    @property
+    def directory(self):
+        return self._directory
+    @directory.setter
+    def directory(self, directory):
+        self._directory = str(directory)
+
+    @property
+    def format(self):
+        return self._format
+    @format.setter
+    def format(self, format):
+        if format not in self.FORMATS:
+            logger.error(self.NOT_SUPPORTED.format(format))
+            raise Exception(self.NOT_SUPPORTED.format(format))
+        self._format = format
+
+    def _setup(self, directory, format, compression):
+        if pyarrow is None:
+            logger.error(self.MISSING_DEPENDENCY)
+            raise Exception(self.MISSING_DEPENDENCY)
+        self.directory = directory
+        self.format = format
+        self.compression = compression
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+    @classmethod
+    def fingerprint(cls, sqlQuery):
+        parts = cls.QUOTED.split(str(sqlQuery))
+        normalized = ''.join(
+            part if position % 2 else cls.WHITESPACE.sub(' ', part) for position, part in enumerate(parts)
+        ).strip()
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def path(self, sqlQuery):
+        return os.path.join(
+            self.directory,
+            self.FILENAME.format(self.fingerprint(sqlQuery), self.format)
+        )
+
+    def __contains__(self, sqlQuery):
+        return os.path.exists(self.path(sqlQuery))
+
+    def save(self, sqlQuery, columns, records):
+        if records:
+            arrays = [list(column) for column in zip(*records)]
+        else:
+            arrays = [[] for column in columns]
+        table = pyarrow.table(dict(zip(columns, arrays)))
+        path = self.path(sqlQuery)
+        handle, temporary = tempfile.mkstemp(dir=self.directory)
+        os.close(handle)
+        try:
+            if self.format == self.FORMAT_FEATHER:
+                pyarrow.feather.write_feather(table, temporary, compression=self.compression)
+            else:
+                pyarrow.parquet.write_table(table, temporary, compression=self.compression)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        return path
+
+    def load(self, sqlQuery, columns=None, filters=None):
+        if sqlQuery not in self:
+            return None
+        path = self.path(sqlQuery)
+        if self.format == self.FORMAT_PARQUET:
+            return pyarrow.parquet.read_table(
+                path,
+                columns=columns,
+                filters=filters or None,
+                memory_map=True
+            )
+        table = pyarrow.ipc.open_file(pyarrow.memory_map(path)).read_all()
+        if filters:
+            table = table.filter(self._mask(table, filters))
+        if columns is not None:
+            table = table.select(columns)
+        return table
+
+    def _mask(self, table, filters):
+        mask = None
+        for column, operator, value in filters:
+            if operator not in self.COMPARISONS.keys():
+                logger.error(self.NOT_SUPPORTED_FILTER.format(operator))
+                raise Exception(self.NOT_SUPPORTED_FILTER.format(operator))
+            comparison = getattr(pyarrow.compute, self.COMPARISONS[operator])(table[column], value)
+            mask = comparison if mask is None else pyarrow.compute.and_(mask, comparison)
+        return mask
+
+    def records(self, sqlQuery, columns=None, filters=None):
+        table = self.load(sqlQuery, columns, filters)
+        if table is None:
+            return None
+        return list(zip(*[column.to_pylist() for column in table.columns]))
+
+    def remove(self, sqlQuery):
+        if sqlQuery in self:
+            os.remove(self.path(sqlQuery))
+
+
+if "__main__" == __name__:
+    print("SQLStore is a package file, execution has no effects.\nTo execute tests suite run testsqlstore.py")
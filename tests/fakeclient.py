@@ -0,0 +1,234 @@
+import concurrent.futures
+import copy
+import datetime
+import itertools
+import re
+import sqlite3
+import threading
+import time
+
+class FakeRow():
+
+    def __init__(self, keys, values):
+        self._keys = keys
+        self._values = tuple(values)
+
+    def keys(self):
+        return list(self._keys)
+
+    def values(self):
+        return self._values
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+
+class FakeSchemaField():
+
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeRowIterator():
+
+    def __init__(self, keys, rows, pageSize=None, latency=0.0):
+        self._keys = keys
+        self._latency = latency
+        self._pageSize = pageSize
+        self._rows = rows
+        self.schema = [FakeSchemaField(key) for key in keys]
+        self.total_rows = len(rows)
+
+    def __iter__(self):
+        for row in self._rows:
+            yield FakeRow(self._keys, row)
+
+    @property
+    def pages(self):
+        pageSize = self._pageSize or max(1, len(self._rows))
+        for start in range(0, len(self._rows), pageSize):
+            time.sleep(self._latency)
+            yield [FakeRow(self._keys, row) for row in self._rows[start:start + pageSize]]
+
+
+class FakeQueryJob():
+
+    def __init__(self, client, sql, job_config=None, parent=None, result=None):
+        self.client = client
+        self.parent_job_id = parent
+        self.query = sql
+        self.job_config = job_config
+        self.job_id = client._jobId()
+        self.destination = getattr(job_config, 'destination', None) or '_results.{}'.format(self.job_id)
+        self.cancelled = False
+        self.created = datetime.datetime.now(datetime.timezone.utc)
+        self.error_result = None
+        self.priority = getattr(job_config, 'priority', None)
+        self.total_bytes_processed = client._bytes(sql)
+        self._finished = time.time() + client.duration
+        self._keys = []
+        self._rows = []
+        if getattr(job_config, 'dry_run', False):
+            return
+        if result is not None:
+            self._keys, self._rows = result
+        else:
+            self._run()
+        self.client._results[self.destination] = (self._keys, self._rows)
+
+    def _run(self):
+        try:
+            self._keys, self._rows = self.client._execute(self.query)
+        except sqlite3.Error as error:
+            if self.parent_job_id is None:
+                raise
+            self.error_result = {'message': str(error)}
+
+    def _done(self):
+        return self.cancelled or time.time() >= self._finished
+
+    def done(self):
+        return self._done()
+
+    def cancel(self):
+        self.cancelled = True
+        self.client.cancelled.append(self.job_id)
+        return True
+
+    def result(self, timeout=None, **kwargs):
+        start = time.time()
+        while not self._done():
+            if timeout is not None and time.time() - start >= timeout:
+                raise concurrent.futures.TimeoutError()
+            time.sleep(0.01)
+        if self.cancelled:
+            raise Exception('Job {} was cancelled'.format(self.job_id))
+        if self.error_result:
+            raise Exception(self.error_result['message'])
+        return FakeRowIterator(self._keys, self._rows, self.client.pageSize, self.client.latency)
+
+
+class FakeCountDistinct():
+
+    def __init__(self):
+        self.values = set()
+
+    def step(self, value):
+        if value is not None:
+            self.values.add(value)
+
+    def finalize(self):
+        return len(self.values)
+
+
+class FakeClient():
+    REPLACE_TABLE = re.compile(r'^\s*CREATE OR REPLACE TABLE\s+(`[^`]+`)', re.IGNORECASE)
+    TABLESAMPLE = re.compile(r'(`[^`]+`)\s+TABLESAMPLE SYSTEM \((\d+) PERCENT\)', re.IGNORECASE)
+    SAMPLED = '(SELECT * FROM {} WHERE (rowid - 1) % {} = 0)'
+    TABLE = re.compile(r'`([^`]+)`')
+    SCRIPT_BLOCK = re.compile(r'BEGIN\n(.*?);\nEXCEPTION WHEN ERROR THEN\n(.*?);\nEND;', re.DOTALL)
+    ERROR_MESSAGE = '@@error.message'
+
+    def __init__(self, latency=0.0, pageSize=1000, duration=0.0, bytesPerRow=100):
+        self._lock = threading.Lock()
+        self.bytesPerRow = bytesPerRow
+        self.cancelled = []
+        self.duration = duration
+        self.jobs = []
+        self.listCalls = 0
+        self.selected = None
+        self._jobs = itertools.count(1)
+        self._results = {}
+        self.connection = sqlite3.connect(':memory:', check_same_thread=False)
+        self.connection.create_function('SAFE_DIVIDE', 2, self._safeDivide)
+        self.connection.create_aggregate('APPROX_COUNT_DISTINCT', 1, FakeCountDistinct)
+        self._sizes = {}
+        self.latency = latency
+        self.pageSize = pageSize
+        self.queries = []
+        self.ranges = []
+
+    def _jobId(self):
+        return 'job_{}'.format(next(self._jobs))
+
+    @staticmethod
+    def _safeDivide(numerator, denominator):
+        if numerator is None or not denominator:
+            return None
+        return float(numerator) / denominator
+
+    def load(self, table, columns, rows):
+        with self._lock:
+            self.connection.execute('DROP TABLE IF EXISTS `{}`'.format(table))
+            self.connection.execute('CREATE TABLE `{}` ({})'.format(table, ', '.join(columns)))
+            self.connection.executemany(
+                'INSERT INTO `{}` VALUES ({})'.format(table, ', '.join('?' * len(columns))),
+                rows
+            )
+            self._sizes[table] = len(rows)
+
+    def _bytes(self, sql):
+        size = sum(self._sizes.get(table, 0) for table in set(self.TABLE.findall(sql)))
+        sample = self.TABLESAMPLE.search(sql)
+        percent = int(sample.group(2)) if sample else 100
+        return size * self.bytesPerRow * percent // 100
+
+    def _execute(self, sql):
+        sql = self.TABLESAMPLE.sub(lambda match: self.SAMPLED.format(match.group(1), 100 // int(match.group(2))), sql)
+        with self._lock:
+            replace = self.REPLACE_TABLE.match(sql)
+            if replace:
+                self.connection.execute('DROP TABLE IF EXISTS {}'.format(replace.group(1)))
+                sql = 'CREATE TABLE' + sql[replace.end() - len(replace.group(1)) - 1:]
+            cursor = self.connection.execute(sql)
+            keys = [column[0] for column in cursor.description or []]
+            rows = cursor.fetchall()
+        return keys, rows
+
+    def query(self, sql, job_config=None):
+        self.queries.append(sql)
+        if self.SCRIPT_BLOCK.match(sql):
+            return self._script(sql, job_config)
+        job = FakeQueryJob(self, sql, job_config)
+        self.jobs.append(job)
+        return copy.copy(job)
+
+    def _script(self, sql, job_config):
+        parentId = self._jobId()
+        child = None
+        for statement, handler in self.SCRIPT_BLOCK.findall(sql):
+            child = FakeQueryJob(self, statement, parent=parentId)
+            self.jobs.append(child)
+            if child.error_result:
+                message = child.error_result['message'].replace("'", "''")
+                child = FakeQueryJob(self, handler.replace(self.ERROR_MESSAGE, "'{}'".format(message)), parent=parentId)
+                self.jobs.append(child)
+        job = FakeQueryJob(self, sql, job_config, result=(child._keys, child._rows))
+        job.job_id = parentId
+        self.jobs.append(job)
+        return copy.copy(job)
+
+    def list_jobs(self, min_creation_time=None, state_filter=None, parent_job=None, **kwargs):
+        self.listCalls += 1
+        jobs = [job for job in self.jobs if job.parent_job_id == parent_job]
+        if min_creation_time is not None:
+            jobs = [job for job in jobs if job.created >= min_creation_time]
+        if state_filter == 'done':
+            jobs = [job for job in jobs if job.done()]
+        return iter([copy.copy(job) for job in jobs])
+
+    def list_rows(self, table, start_index=0, max_results=None, page_size=None, selected_fields=None):
+        keys, rows = self._results[table]
+        end = len(rows) if max_results is None else min(len(rows), start_index + max_results)
+        pageSize = page_size or self.pageSize
+        with self._lock:
+            self.ranges.append((start_index, end))
+        pages = max(1, -(-(end - start_index) // pageSize))
+        time.sleep(self.latency * pages)
+        rows = rows[start_index:end]
+        if selected_fields is not None:
+            positions = [keys.index(field.name) for field in selected_fields]
+            keys = [keys[position] for position in positions]
+            rows = [tuple(row[position] for position in positions) for row in rows]
+        self.selected = selected_fields
+        return FakeRowIterator(keys, rows)
@@ -0,0 +1,158 @@
+import csv
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from fakeclient import FakeClient
+import query
+from query import BatchRunner, CommandLine, CSVWriter, NDJSONWriter
+from sqlclient import SQLClient
+
+class TestCommandLine(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+    DEFINITIONS = {
+        "category": {
+            "TABLE_NAME": TABLE,
+            "GROUP_BY": [{"Field": "category", "Sort": -1, "SortDirection": "ASC"}],
+            "VALUES": [{"Field": "id", "Operation": "COUNT"}],
+        },
+        "total": {
+            "TABLE_NAME": TABLE,
+            "GROUP_BY": [{"Field": "category", "Sort": -1, "SortDirection": "DESC"}],
+            "VALUES": [{"Field": "id", "Operation": "SUM"}],
+        },
+    }
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.definitions = os.path.join(self.directory, "defs")
+        os.makedirs(self.definitions)
+        for name, definition in self.DEFINITIONS.items():
+            with open(os.path.join(self.definitions, name + ".json"), "w") as handle:
+                json.dump(definition, handle)
+        self.fake = FakeClient(bytesPerRow=10)
+        self.fake.load(self.TABLE, ["id", "category"], [(1, "web"), (2, "web"), (3, "mobile")])
+        self.client = SQLClient(self.fake)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_cli(self, *arguments):
+        return CommandLine(self.client).main(["run", self.definitions, "--quiet"] + list(arguments))
+
+    def read(self, name):
+        with open(os.path.join(self.directory, name)) as handle:
+            return handle.read()
+
+    def records(self, name):
+        return [json.loads(line) for line in self.read(name).splitlines()]
+
+    def test_ndjson(self):
+        out = os.path.join(self.directory, "results.ndjson")
+        status = self.run_cli("--workers", "8", "--out", out)
+        records = sorted(self.records("results.ndjson"), key=lambda record: (record["definition"], record["category"]))
+
+        self.assertEqual(status, 0)
+        self.assertEqual(records, [
+            {"definition": "category", "category": "mobile", "COUNT(id)": 1},
+            {"definition": "category", "category": "web", "COUNT(id)": 2},
+            {"definition": "total", "category": "mobile", "SUM(id)": 3},
+            {"definition": "total", "category": "web", "SUM(id)": 3},
+        ])
+
+    def test_csv(self):
+        out = os.path.join(self.directory, "results.csv")
+        status = self.run_cli("--workers", "8", "--out", out)
+        rows = list(csv.reader(io.StringIO(self.read("results.csv"))))
+        records = sorted(csv.DictReader(io.StringIO(self.read("results.csv"))),
+                         key=lambda record: (record["definition"], record["category"]))
+
+        self.assertEqual(status, 0)
+        self.assertEqual(rows[0], ["definition", "category", rows[0][2], rows[0][3]])
+        self.assertEqual(sorted(rows[0][2:]), ["COUNT(id)", "SUM(id)"])
+        self.assertTrue(all(len(row) == 4 for row in rows))
+        self.assertEqual([dict(record) for record in records], [
+            {"definition": "category", "category": "mobile", "COUNT(id)": "1", "SUM(id)": ""},
+            {"definition": "category", "category": "web", "COUNT(id)": "2", "SUM(id)": ""},
+            {"definition": "total", "category": "mobile", "COUNT(id)": "", "SUM(id)": "3"},
+            {"definition": "total", "category": "web", "COUNT(id)": "", "SUM(id)": "3"},
+        ])
+
+    def test_csvInterleaved(self):
+        stream = io.StringIO()
+        writer = CSVWriter(stream)
+        writer.writeRow("category", ["category", "COUNT(id)"], ("web", 2))
+        writer.writeRow("total", ["category", "SUM(id)"], ("web", 3))
+        writer.writeRecord({"definition": "broken", "error": "failed"})
+        writer.writeRow("category", ["category", "COUNT(id)"], ("mobile", 1))
+        writer.writeRow("total", ["category", "SUM(id)"], ("mobile", 3))
+        writer.flush()
+        rows = list(csv.reader(io.StringIO(stream.getvalue())))
+
+        self.assertEqual(rows[0], ["definition", "category", "COUNT(id)", "SUM(id)", "error"])
+        self.assertEqual([row[0] for row in rows[1:]], ["category", "category", "total", "total", "broken"])
+        self.assertEqual(rows[1:3], [["category", "web", "2", "", ""], ["category", "mobile", "1", "", ""]])
+        self.assertEqual(rows[5], ["broken", "", "", "", "failed"])
+
+    def test_dry_run(self):
+        out = os.path.join(self.directory, "plan.ndjson")
+        status = CommandLine().main(["run", self.definitions, "--quiet", "--dry-run", "--out", out])
+        records = sorted(self.records("plan.ndjson"), key=lambda record: record["definition"])
+
+        self.assertEqual(status, 0)
+        self.assertEqual(records[0]["sql"], "SELECT category, COUNT(id) FROM `project.dataset.inv` GROUP BY category ORDER BY category ASC")
+        self.assertEqual(self.fake.queries, [])
+
+    def test_estimate(self):
+        out = os.path.join(self.directory, "estimate.ndjson")
+        status = self.run_cli("--estimate", "--out", out)
+
+        self.assertEqual(status, 0)
+        self.assertEqual([record["bytes"] for record in self.records("estimate.ndjson")], [30, 30])
+        self.assertEqual(self.fake._results, {})
+
+    def test_dry_run_estimate(self):
+        out = os.path.join(self.directory, "estimate.ndjson")
+        factory = query.SQLClient
+        query.SQLClient = lambda: self.client
+        try:
+            status = CommandLine().main(["run", self.definitions, "--quiet", "--dry-run", "--estimate", "--out", out])
+        finally:
+            query.SQLClient = factory
+
+        self.assertEqual(status, 0)
+        self.assertEqual([record["bytes"] for record in self.records("estimate.ndjson")], [30, 30])
+
+    def test_failure(self):
+        with open(os.path.join(self.definitions, "broken.json"), "w") as handle:
+            handle.write("{ not json")
+        out = os.path.join(self.directory, "results.ndjson")
+        status = self.run_cli("--out", out)
+        errors = [record for record in self.records("results.ndjson") if "error" in record]
+
+        self.assertEqual(status, 1)
+        self.assertEqual([record["definition"] for record in errors], ["broken"])
+
+    def test_progress(self):
+        progress = io.StringIO()
+        runner = BatchRunner(self.client, workers=2, progress=progress)
+        failed = runner.run([self.definitions], NDJSONWriter(io.StringIO()))
+
+        self.assertEqual(failed, 0)
+        self.assertEqual(runner.rows, 4)
+        self.assertIn("[2/2]", progress.getvalue())
+        self.assertIn("2 definitions, 4 rows, 0 failed", progress.getvalue())
+
+    def test_no_definitions(self):
+        with self.assertRaises(Exception):
+            BatchRunner.definitions([self.directory])
+
+if "__main__" == __name__:
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from fakeclient import FakeClient
+from sqlaggregate import LocalAggregator
+from sqlbuilder import Composer
+from sqlclient import SQLClient
+
+class TestLocalAggregator(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+    COLUMNS = ["category", "state", "raisedAmt", "round"]
+    RECORDS = [
+        ("web", "CA", 100, "a"),
+        ("web", "CA", 50, "b"),
+        ("web", "NY", 25, "a"),
+        ("mobile", "NY", 10, None),
+        ("mobile", "WA", None, "c"),
+        ("hardware", "CA", 7, "seed"),
+    ]
+    FINE_VALUES = [
+        ("SUM", "raisedAmt"),
+        ("COUNT", "raisedAmt"),
+        ("COUNT", "round"),
+        ("MIN", "raisedAmt"),
+        ("MAX", "raisedAmt"),
+    ]
+
+    def definition(self, groups, values, **extra):
+        definition = {
+            "TABLE_NAME": self.TABLE,
+            "GROUP_BY": [{"Field": field} for field in groups],
+            "VALUES": [{"Field": field, "Operation": operation} for operation, field in values],
+        }
+        definition.update(extra)
+        return definition
+
+    def setUp(self):
+        self.fake = FakeClient()
+        self.fake.load(self.TABLE, self.COLUMNS, self.RECORDS)
+        self.client = SQLClient(self.fake)
+        self.aggregator = LocalAggregator()
+        self.fine = Composer(self.definition(["category", "state"], self.FINE_VALUES))
+        self.aggregator.query(self.client, self.fine)
+
+    def direct(self, composer):
+        self.client.query(composer.buildQuery())
+        return self.client.fetchall()
+
+    def test_drillUp(self):
+        coarse = Composer(self.definition(
+            ["category"],
+            [("SUM", "raisedAmt"), ("COUNT", "round"), ("MIN", "raisedAmt"), ("MAX", "raisedAmt"), ("AVG", "raisedAmt")]
+        ))
+        queries = len(self.fake.queries)
+        rows = self.aggregator.query(self.client, coarse)
+
+        self.assertEqual(len(self.fake.queries), queries)
+        self.assertEqual(sorted(rows), sorted(self.direct(coarse)))
+
+    def test_sortHavingLimit(self):
+        coarse = Composer(self.definition(
+            ["state"],
+            [("SUM", "raisedAmt")],
+            HAVING=[{"Value": 0, "Operator": ">", "Operand": 10}],
+            TOTAL_LIMIT=1
+        ))
+        coarse.groupByClauses.clauses[0] = coarse.groupByClauses.clauses[0]._replace(sort=0, direction="DESC")
+
+        self.assertEqual(self.aggregator.answer(coarse), [("CA", 157)])
+        self.assertEqual(self.aggregator.answer(coarse), self.direct(coarse))
+
+    def test_globalAggregate(self):
+        total = Composer(self.definition([], [("SUM", "raisedAmt"), ("COUNT", "round")]))
+
+        self.assertEqual(self.aggregator.answer(total), [(192, 5)])
+        self.assertEqual(self.aggregator.answer(total), self.direct(total))
+
+    def test_emptyEntry(self):
+        definition = self.definition(["category", "state"], [("COUNT", "round"), ("SUM", "raisedAmt")])
+        definition["VALUES"][0]["Modifier"] = "DISTINCT"
+        aggregator = LocalAggregator()
+        aggregator.remember(Composer(definition), [])
+
+        self.assertEqual(aggregator.answer(Composer(self.definition(["category"], [("SUM", "raisedAmt")]))), [])
+        self.assertEqual(aggregator.answer(Composer(self.definition([], [("SUM", "raisedAmt")]))), [(None,)])
+
+    def test_notAnswerable(self):
+        finer = Composer(self.definition(["category", "round"], [("SUM", "raisedAmt")]))
+        filtered = Composer(self.definition(
+            ["category"],
+            [("SUM", "raisedAmt")],
+            WHERE=[{"Field": "state", "Operator": "=", "Operand": "CA"}]
+        ))
+        distinct = Composer(self.definition(["category"], [("SUM", "round")]))
+
+        self.assertIsNone(self.aggregator.answer(finer))
+        self.assertIsNone(self.aggregator.answer(filtered))
+        self.assertIsNone(self.aggregator.answer(distinct))
+
+    def test_truncatedNotRemembered(self):
+        truncated = Composer(self.definition(["category"], [("SUM", "raisedAmt")], TOTAL_LIMIT=2))
+        aggregator = LocalAggregator()
+
+        self.assertFalse(aggregator.remember(truncated, self.direct(truncated)))
+        self.assertEqual(len(aggregator.entries), 0)
+
+    def test_capacity(self):
+        aggregator = LocalAggregator(capacity=1)
+        aggregator.remember(self.fine, self.direct(self.fine))
+        other = Composer(self.definition(["state"], [("SUM", "raisedAmt")]))
+        aggregator.remember(other, self.direct(other))
+
+        self.assertEqual(len(aggregator.entries), 1)
+        self.assertIsNone(aggregator.answer(Composer(self.definition(["category"], [("SUM", "raisedAmt")]))))
+
+
+if "__main__" == __name__:
+    unittest.main()
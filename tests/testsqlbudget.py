@@ -0,0 +1,147 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from fakeclient import FakeClient
+from sqlbudget import BytesBudget, LedgerEntry
+from sqlclient import SQLClient
+
+class TestBytesBudget(unittest.TestCase):
+
+    QUERY = "SELECT category, COUNT(id) FROM `project.dataset.inv` GROUP BY category"
+    DISTINCT = "SELECT category, COUNT(DISTINCT id) FROM `project.dataset.inv` GROUP BY category"
+
+    def estimator(self, sizes):
+        return lambda sqlQuery: sizes[sqlQuery]
+
+    def test_allow(self):
+        budget = BytesBudget(1000)
+        entry = budget.admit(self.QUERY, lambda sqlQuery: 300)
+
+        self.assertEqual(entry.action, BytesBudget.ALLOW)
+        self.assertEqual(budget.remaining(), 700)
+        budget.settle(entry, 250)
+        self.assertEqual(budget.remaining(), 750)
+
+    def test_degraded(self):
+        budget = BytesBudget(1000, samplePercent=5)
+
+        self.assertEqual(
+            budget.degraded(self.QUERY),
+            "SELECT category, CAST(ROUND(COUNT(id) * 20.0) AS INT64) "
+            "FROM `project.dataset.inv` TABLESAMPLE SYSTEM (5 PERCENT) GROUP BY category"
+        )
+
+    def test_scaled(self):
+        budget = BytesBudget(1000, samplePercent=10)
+
+        self.assertEqual(
+            budget.degraded("SELECT a, SUM(x), AVG(x) FROM `t` WHERE s = 'SUM(y)' GROUP BY a HAVING SUM(x) > 5"),
+            "SELECT a, (SUM(x) * 10.0), AVG(x) FROM `t` TABLESAMPLE SYSTEM (10 PERCENT) "
+            "WHERE s = 'SUM(y)' GROUP BY a HAVING (SUM(x) * 10.0) > 5"
+        )
+
+    def test_notScalable(self):
+        budget = BytesBudget(1000)
+
+        for sqlQuery in (
+            self.DISTINCT,
+            "SELECT a, MAX(x), SUM(x) FROM `t` GROUP BY a",
+            "SELECT a, SUM(x) OVER (PARTITION BY a) FROM `t`",
+            "SELECT a, x FROM `t`",
+        ):
+            self.assertEqual(budget.degraded(sqlQuery), sqlQuery)
+        entry = budget.admit(self.DISTINCT, lambda sqlQuery: 90 if "TABLESAMPLE" in sqlQuery else 900)
+
+        self.assertEqual(entry.action, BytesBudget.ALLOW)
+        self.assertEqual(entry.sqlquery, self.DISTINCT)
+
+    def test_degrade(self):
+        budget = BytesBudget(1000)
+        sizes = {self.QUERY: 900, budget.degraded(self.QUERY): 90}
+        entry = budget.admit(self.QUERY, self.estimator(sizes))
+
+        self.assertEqual(entry.action, BytesBudget.DEGRADE)
+        self.assertEqual(entry.original, self.QUERY)
+        self.assertEqual(entry.sqlquery, budget.degraded(self.QUERY))
+        self.assertEqual(budget.remaining(), 910)
+
+    def test_near_limit_without_degrade(self):
+        budget = BytesBudget(1000, degrade=False)
+        entry = budget.admit(self.QUERY, lambda sqlQuery: 900)
+
+        self.assertEqual(entry.action, BytesBudget.ALLOW)
+
+    def test_refuse(self):
+        budget = BytesBudget(1000)
+        budget.admit(self.QUERY, lambda sqlQuery: 600)
+
+        with self.assertRaises(Exception):
+            budget.admit(self.QUERY, lambda sqlQuery: 600)
+        self.assertEqual([entry.action for entry in budget.ledger], [BytesBudget.ALLOW, BytesBudget.REFUSE])
+        self.assertEqual(budget.remaining(), 400)
+
+    def test_entry(self):
+        entry = LedgerEntry(self.QUERY, 10, BytesBudget.REFUSE)
+
+        self.assertEqual(entry.charged(), 0)
+        self.assertEqual(entry.original, self.QUERY)
+
+class TestClientBudget(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+    QUERY = "SELECT category, COUNT(id) FROM `project.dataset.inv` GROUP BY category"
+
+    def setUp(self):
+        self.fake = FakeClient(bytesPerRow=10)
+        self.fake.load(self.TABLE, ["id", "category"], [(index, "web" if index % 2 else "mobile") for index in range(100)])
+
+    def test_estimate(self):
+        client = SQLClient(self.fake)
+
+        self.assertEqual(client.estimate(self.QUERY), 1000)
+        self.assertEqual(self.fake._results, {})
+
+    def test_ledger(self):
+        budget = BytesBudget(5000)
+        client = SQLClient(self.fake, budget=budget)
+        client.query(self.QUERY)
+
+        self.assertEqual(sorted(client.fetchall()), [("mobile", 50), ("web", 50)])
+        self.assertFalse(client.degraded)
+        self.assertEqual(len(budget.ledger), 1)
+        self.assertEqual(budget.ledger[0].estimate, 1000)
+        self.assertEqual(budget.ledger[0].actual, 1000)
+        self.assertEqual(budget.remaining(), 4000)
+
+    def test_degrade(self):
+        budget = BytesBudget(2400, samplePercent=10)
+        client = SQLClient(self.fake, budget=budget)
+        client.query(self.QUERY)
+        client.query(self.QUERY)
+        client.query(self.QUERY)
+
+        self.assertEqual(
+            [entry.action for entry in budget.ledger],
+            [BytesBudget.ALLOW, BytesBudget.DEGRADE, BytesBudget.DEGRADE]
+        )
+        self.assertEqual(client.sqlquery, self.QUERY)
+        self.assertIn("TABLESAMPLE", client.handle.sqlquery)
+        self.assertTrue(client.degraded)
+        self.assertEqual(client.fetchall(), [("mobile", 100)])
+        self.assertEqual(budget.remaining(), 1200)
+
+    def test_refuse(self):
+        budget = BytesBudget(1500, degrade=False)
+        client = SQLClient(self.fake, budget=budget)
+        client.query(self.QUERY)
+
+        with self.assertRaises(Exception):
+            client.query(self.QUERY)
+        self.assertEqual(len([query for query in self.fake.queries if "TABLESAMPLE" not in query]), 3)
+        self.assertEqual(budget.remaining(), 500)
+
+if "__main__" == __name__:
+    unittest.main()
@@ -9,16 +9,21 @@ from sqlbuilder import (
     AggregationFunction,
     Composer,
     ConfigHandlerGroupBy,
+    ConfigHandlerHaving,
     ConfigHandlerValue,
     ConfigHandlerQuery,
+    Condition,
     Configuration,
     GroupByClause,
     GroupByClauses,
+    HavingClauses,
     NumberingFunction,
     ValueClause,
     ValueClauses,
     QueryClause,
     StandardSqlFunction,
+    WhereClauses,
+    WithClauses,
 )
 
 class ConfigurationStub():
@@ -279,6 +284,72 @@ class TestValueClauses(unittest.TestCase):
         self.assertEqual(configHandlerQuery.config, valueClauses.config)
 
 
+class TestHavingClauses(unittest.TestCase):
+
+    TEST_CONFIG_PATH_BASE = os.path.join('config', 'testCase7.json')
+
+    def setUp(self):
+        if not os.path.exists(self.TEST_CONFIG_PATH_BASE):
+            raise Exception("Having test JSON file not found")
+        config = ConfigurationStub(self.TEST_CONFIG_PATH_BASE)
+        self.config = config()
+
+    def test_clauses(self):
+        configHandlerQuery = ConfigHandlerQuery(self.config)
+        havingClauses = HavingClauses(configHandlerQuery())
+
+        self.assertEqual(len(configHandlerQuery().having), len(havingClauses.clauses))
+        for position, havingClause in havingClauses.clauses.items():
+            self.assertEqual(havingClause.value, self.config[ConfigHandlerQuery.HAVING][position][ConfigHandlerHaving.VALUE])
+
+    def test_missing(self):
+        configHandlerQuery = ConfigHandlerQuery(self.config)
+
+        self.assertIsNone(HavingClauses(configHandlerQuery()._replace(having=None)).clauses)
+
+
+class TestWithClauses(unittest.TestCase):
+
+    TEST_CONFIG_PATH_BASE = os.path.join('config', 'testCase8.json')
+
+    def setUp(self):
+        if not os.path.exists(self.TEST_CONFIG_PATH_BASE):
+            raise Exception("With test JSON file not found")
+        config = ConfigurationStub(self.TEST_CONFIG_PATH_BASE)
+        self.config = config()
+
+    def test_clauses(self):
+        configHandlerQuery = ConfigHandlerQuery(self.config)
+        withClauses = WithClauses(configHandlerQuery())
+
+        self.assertEqual(len(configHandlerQuery().ctes), len(withClauses.clauses))
+        self.assertEqual(withClauses.clauses[1].table, "funded")
+        self.assertIsNone(withClauses.clauses[1].fields)
+
+    def test_where(self):
+        configHandlerQuery = ConfigHandlerQuery(self.config)
+        whereClauses = WhereClauses(configHandlerQuery())
+
+        self.assertEqual(len(configHandlerQuery().where), len(whereClauses.clauses))
+        self.assertEqual(whereClauses.clauses[0].field, "state")
+
+
+class TestCondition(unittest.TestCase):
+
+    def test_number(self):
+        self.assertEqual(Condition("SUM(x)", ">", 10).apply(), "SUM(x) > 10")
+
+    def test_string(self):
+        self.assertEqual(Condition("state", "=", 'N"Y').apply(), 'state = "N\\"Y"')
+
+    def test_null(self):
+        self.assertEqual(Condition("state", "!=", None).apply(), "state IS NOT NULL")
+
+    def test_operator(self):
+        with self.assertRaises(Exception):
+            Condition("state", "LIKE", "N%")
+
+
 class TestStandardSqlFunction(unittest.TestCase):
 
     def setUp(self):
@@ -430,6 +501,70 @@ class TestComposer(unittest.TestCase):
         sqlQuery = composer.buildQuery()
         self.assertEqual(sqlQuery, expectedQuery)
 
+    def test_qualify(self):
+        TEST_CONFIG_PATH_BASE = os.path.join('config', 'testCase6.json')
+
+        if not os.path.exists(TEST_CONFIG_PATH_BASE):
+            raise Exception("GroupByField test JSON file not found")
+        config = ConfigurationStub(TEST_CONFIG_PATH_BASE)
+
+        composer = Composer(TEST_CONFIG_PATH_BASE)
+
+        expectedQuery = config.expected_query()
+        sqlQuery = composer.buildQuery()
+        self.assertEqual(sqlQuery, expectedQuery)
+
+    def test_having(self):
+        TEST_CONFIG_PATH_BASE = os.path.join('config', 'testCase7.json')
+        config = ConfigurationStub(TEST_CONFIG_PATH_BASE)
+        composer = Composer(TEST_CONFIG_PATH_BASE)
+
+        self.assertEqual(composer.buildQuery(), config.expected_query())
+
+    def test_havingInvalidReference(self):
+        TEST_CONFIG_PATH_BASE = os.path.join('config', 'testCase7.json')
+        composer = Composer(TEST_CONFIG_PATH_BASE)
+        clauses = composer.havingClauses.clauses
+        clauses[0] = clauses[0]._replace(value="missing")
+
+        with self.assertRaises(Exception):
+            composer.buildQuery()
+
+    def test_with(self):
+        TEST_CONFIG_PATH_BASE = os.path.join('config', 'testCase8.json')
+        config = ConfigurationStub(TEST_CONFIG_PATH_BASE)
+        composer = Composer(TEST_CONFIG_PATH_BASE)
+
+        self.assertEqual(composer.buildQuery(), config.expected_query())
+        self.assertEqual(composer.withNames(), ["funded", "recent"])
+
+    def test_withDuplicate(self):
+        TEST_CONFIG_PATH_BASE = os.path.join('config', 'testCase8.json')
+        composer = Composer(TEST_CONFIG_PATH_BASE)
+        clauses = composer.withClauses.clauses
+        clauses[1] = clauses[1]._replace(name="funded")
+
+        with self.assertRaises(Exception):
+            composer.buildQuery()
+
+    def test_qualifyIntermediateValueSort(self):
+        TEST_CONFIG_PATH_BASE = os.path.join('config', 'testCase6.json')
+        composer = Composer(TEST_CONFIG_PATH_BASE)
+        clauses = composer.groupByClauses.clauses
+        clauses[0] = clauses[0]._replace(sort=0)
+
+        with self.assertRaises(Exception):
+            composer.buildQuery()
+
+    def test_qualifyInvalidSort(self):
+        TEST_CONFIG_PATH_BASE = os.path.join('config', 'testCase6.json')
+        composer = Composer(TEST_CONFIG_PATH_BASE)
+        clauses = composer.groupByClauses.clauses
+        clauses[1] = clauses[1]._replace(sort=5)
+
+        with self.assertRaises(Exception):
+            composer.buildQuery()
+
 
 if "__main__" == __name__:
     unittest.main()
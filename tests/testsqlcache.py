@@ -0,0 +1,171 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from fakeclient import FakeClient
+from sqlcache import ResultCache, RevalidatingCache
+from sqlclient import SQLClient
+
+class TestResultCache(unittest.TestCase):
+
+    def test_lru(self):
+        cache = ResultCache(capacity=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.statistics()[ResultCache.METRIC_EVICTIONS], 1)
+
+    def test_ttl(self):
+        cache = ResultCache(ttl=0.05)
+        cache.put("a", 1)
+        cache.put("b", 2, ttl=10)
+
+        self.assertEqual(cache.get("a"), 1)
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+        self.assertEqual(cache.statistics()[ResultCache.METRIC_EXPIRED], 1)
+
+    def test_invalidate(self):
+        cache = ResultCache()
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.invalidate("a")
+
+        self.assertEqual(len(cache), 1)
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+    def test_client(self):
+        fake = FakeClient()
+        fake.load("project.dataset.inv", ["id"], [(1,), (2,)])
+        client = SQLClient(fake, cache=ResultCache())
+        query = "SELECT id FROM `project.dataset.inv` ORDER BY id"
+
+        client.query(query)
+        client.query(query)
+        self.assertEqual(client.fetchall(), [(1,), (2,)])
+        self.assertEqual(client.columns, ["id"])
+        self.assertEqual(len(fake.queries), 1)
+
+class TestRevalidatingCache(unittest.TestCase):
+
+    def setUp(self):
+        self.loads = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def tearDown(self):
+        self.release.set()
+        self.cache.close()
+
+    def loader(self, value):
+        def load():
+            self.release.wait(5)
+            self.loads.append(value)
+            return value
+        return load
+
+    def test_stale(self):
+        self.cache = RevalidatingCache(ttl=0.05, grace=5, hot=None)
+        self.cache.fetch("a", self.loader(1))
+        time.sleep(0.06)
+        self.release.clear()
+
+        start = time.monotonic()
+        values = [self.cache.fetch("a", self.loader(2)) for index in range(5)]
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(values, [1] * 5)
+
+        self.release.set()
+        self.cache.refresh("a").result(timeout=5)
+        self.assertEqual(self.cache.get("a"), 2)
+        self.assertEqual(self.loads, [1, 2])
+        statistics = self.cache.statistics()
+        self.assertEqual(statistics[RevalidatingCache.METRIC_STALE], 5)
+        self.assertEqual(statistics[RevalidatingCache.METRIC_REFRESHES], 1)
+
+    def test_grace(self):
+        self.cache = RevalidatingCache(ttl=0.02, grace=0.02, hot=None)
+        self.cache.fetch("a", self.loader(1))
+        time.sleep(0.06)
+
+        self.assertEqual(self.cache.fetch("a", self.loader(2)), 2)
+        self.assertEqual(self.cache.statistics()[RevalidatingCache.METRIC_EXPIRED], 1)
+
+    def test_deduplicated(self):
+        self.cache = RevalidatingCache(ttl=10)
+        self.release.clear()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.fetch("a", self.loader(1)))) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [1] * 8)
+        self.assertEqual(self.loads, [1])
+
+    def test_hot(self):
+        self.cache = RevalidatingCache(ttl=0.2, hot=3, lead=0.5, halfLife=10)
+        self.cache.fetch("hot", self.loader("hot"))
+        self.cache.fetch("cold", self.loader("cold"))
+        for index in range(4):
+            self.cache.get("hot")
+        time.sleep(0.12)
+        self.cache.get("hot")
+        self.cache.get("cold")
+        self.cache.close()
+
+        self.assertGreaterEqual(self.cache.frequency("hot"), 3)
+        self.assertEqual(self.loads, ["hot", "cold", "hot"])
+        self.assertIn("hot", self.cache)
+
+    def test_failure(self):
+        self.cache = RevalidatingCache(ttl=0.02, grace=5, hot=None)
+        self.cache.fetch("a", self.loader(1))
+        time.sleep(0.03)
+
+        def broken():
+            raise ValueError("unavailable")
+
+        self.assertEqual(self.cache.fetch("a", broken), 1)
+        self.cache.close()
+
+        self.assertEqual(self.cache.statistics()[RevalidatingCache.METRIC_REFRESH_FAILURES], 1)
+        self.assertEqual(self.cache.statistics()[RevalidatingCache.METRIC_SIZE], 1)
+
+    def test_client(self):
+        fake = FakeClient()
+        fake.load("project.dataset.inv", ["id"], [(1,), (2,)])
+        self.cache = RevalidatingCache(ttl=0.05, grace=5, hot=None)
+        client = SQLClient(fake, cache=self.cache)
+        query = "SELECT id FROM `project.dataset.inv` ORDER BY id"
+
+        client.query(query)
+        client.query(query)
+        self.assertEqual(client.fetchall(), [(1,), (2,)])
+        self.assertEqual(client.columns, ["id"])
+        self.assertEqual(len(fake.queries), 1)
+
+        time.sleep(0.06)
+        fake.load("project.dataset.inv", ["id"], [(3,)])
+        client.query(query)
+        self.assertEqual(client.fetchall(), [(1,), (2,)])
+        self.cache.close()
+        client.query(query)
+        self.assertEqual(client.fetchall(), [(3,)])
+        self.assertEqual(len(fake.queries), 2)
+
+if "__main__" == __name__:
+    unittest.main()
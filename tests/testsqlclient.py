@@ -1,7 +1,10 @@
 from google.cloud import bigquery
+import asyncio
 import json
 import os
 import sys
+import threading
+import time
 import unittest
 
 sys.path.append(os.path.dirname(os.getcwd()))
@@ -10,8 +13,9 @@ os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = os.path.join(
     "credentials.json"
 )
 
+from fakeclient import FakeClient
 from sqlbuilder import Composer
-from sqlclient import SQLClient
+from sqlclient import CancellationToken, QueryHandle, SQLClient
 
 class ConfigurationStub():
     EXPECTED_RESULT = 'EXPECTED RESULT'
@@ -91,6 +95,248 @@ class TestClientInstance(unittest.TestCase):
             pass
         self.assertEqual(client.sqlquery, query)
 
+class RowStub():
+
+    def __init__(self, values):
+        self._values = values
+
+    def values(self):
+        return self._values
+
+
+class RowsStub(list):
+    schema = []
+
+
+class JobStub():
+
+    def __init__(self, records):
+        self._records = records
+
+    def done(self):
+        return True
+
+    def result(self):
+        return RowsStub(RowStub(record) for record in self._records)
+
+
+class ClientStub():
+
+    def __init__(self, records):
+        self._records = records
+
+    def query(self, sqlQuery):
+        return JobStub(self._records)
+
+
+class TestStream(unittest.TestCase):
+
+    RECORDS = [("web", 1208), ("software", 102)]
+
+    def test_stream(self):
+        query = "Test Sql Query String"
+        client = SQLClient(ClientStub(self.RECORDS))
+        stream = client.stream(query)
+
+        self.assertEqual(next(stream), self.RECORDS[0])
+        self.assertEqual(list(stream), self.RECORDS[1:])
+        self.assertEqual(client.sqlquery, query)
+
+class TestParallelDownload(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+    QUERY = "SELECT id, category FROM `project.dataset.inv` ORDER BY id"
+
+    def setUp(self):
+        self.fake = FakeClient(latency=0.05, pageSize=10)
+        self.fake.load(self.TABLE, ["id", "category"], [(index, "web") for index in range(80)])
+        self.client = SQLClient(self.fake)
+
+    def test_ordered(self):
+        self.client.query(self.QUERY)
+        expected = self.client.fetchall()
+        self.client.query(self.QUERY, streams=3)
+
+        self.assertEqual(self.client.fetchall(), expected)
+
+    def test_unordered(self):
+        self.client.query(self.QUERY)
+        expected = self.client.fetchall()
+        self.client.query(self.QUERY, streams=4, ordered=False)
+
+        self.assertEqual(sorted(self.client.fetchall()), expected)
+
+    def test_stream(self):
+        records = list(self.client.stream(self.QUERY, streams=4))
+
+        self.assertEqual(records, [(index, "web") for index in range(80)])
+
+    def test_ranges(self):
+        self.client.query(self.QUERY, streams=8)
+
+        self.assertEqual(sorted(self.fake.ranges), [(start, start + 10) for start in range(0, 80, 10)])
+
+    def test_destination(self):
+        self.client.query(self.QUERY, streams=2, destination="project.dataset.export")
+
+        self.assertEqual(str(self.client.result.destination), "project.dataset.export")
+        self.assertEqual(len(self.client.fetchall()), 80)
+
+class TestQueryHandle(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+    QUERY = "SELECT id, category FROM `project.dataset.inv` WHERE id < {} ORDER BY id"
+
+    def setUp(self):
+        self.fake = FakeClient(latency=0.01, pageSize=10)
+        self.fake.load(self.TABLE, ["id", "category"], [(index, "web") for index in range(80)])
+        self.client = SQLClient(self.fake)
+
+    def test_submit(self):
+        handle = self.client.submit(self.QUERY.format(3))
+
+        self.assertIsInstance(handle, QueryHandle)
+        self.assertEqual(handle.fetchall(), [(0, "web"), (1, "web"), (2, "web")])
+        self.assertEqual(handle.columns, ["id", "category"])
+        self.assertIsNone(self.client.sqlquery)
+        self.assertIsNone(self.client.records)
+
+    def test_independent(self):
+        first = self.client.submit(self.QUERY.format(2))
+        second = self.client.submit(self.QUERY.format(4), streams=2)
+
+        self.assertEqual(len(list(second)), 4)
+        self.assertEqual(list(first), [(0, "web"), (1, "web")])
+        self.assertEqual(first.fetchall(), [(0, "web"), (1, "web")])
+
+    def test_concurrent(self):
+        results = {}
+
+        def run(limit):
+            results[limit] = self.client.submit(self.QUERY.format(limit), streams=2).fetchall()
+
+        threads = [threading.Thread(target=run, args=(limit,)) for limit in range(1, 40)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for limit in range(1, 40):
+            self.assertEqual(results[limit], [(index, "web") for index in range(limit)])
+
+    def test_legacy(self):
+        self.client.query(self.QUERY.format(5))
+
+        self.assertEqual(self.client.sqlquery, self.QUERY.format(5))
+        self.assertEqual(self.client.columns, ["id", "category"])
+        self.assertEqual(len(self.client.fetchall()), 5)
+        self.assertIs(self.client.result, self.client.handle.job)
+
+class TestCancellation(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+    QUERY = "SELECT id, category FROM `project.dataset.inv` ORDER BY id"
+
+    def setUp(self):
+        self.fake = FakeClient(duration=5.0)
+        self.fake.load(self.TABLE, ["id", "category"], [(index, "web") for index in range(80)])
+        self.client = SQLClient(self.fake)
+
+    def test_timeout(self):
+        start = time.time()
+        with self.assertRaises(Exception) as context:
+            self.client.query(self.QUERY, timeout=0.2)
+
+        self.assertLess(time.time() - start, 1.0)
+        self.assertIn("deadline", str(context.exception))
+        self.assertEqual(self.fake.cancelled, ["job_1"])
+
+    def test_deadline(self):
+        handle = self.client.submit(self.QUERY, timeout=10.0, deadline=time.time() + 0.2)
+
+        self.assertLess(handle.remaining(), 0.3)
+        with self.assertRaises(Exception):
+            handle.fetchall()
+        self.assertTrue(handle.cancelled)
+
+    def test_token(self):
+        token = CancellationToken()
+        handle = self.client.submit(self.QUERY, token=token)
+        timer = threading.Timer(0.2, token.cancel)
+        timer.start()
+        with self.assertRaises(Exception) as context:
+            handle.fetchall()
+        timer.join()
+
+        self.assertIn("cancelled", str(context.exception))
+        self.assertEqual(self.fake.cancelled, ["job_1"])
+
+    def test_cancelled_token(self):
+        token = CancellationToken()
+        token.cancel()
+        handle = self.client.submit(self.QUERY, token=token)
+
+        self.assertTrue(handle.cancelled)
+        self.assertEqual(self.fake.cancelled, ["job_1"])
+
+    def test_pageDeadline(self):
+        self.fake.duration = 0.0
+        self.fake.latency = 0.1
+        self.fake.pageSize = 10
+        start = time.time()
+        with self.assertRaises(Exception) as context:
+            self.client.query(self.QUERY, timeout=0.35)
+
+        self.assertLess(time.time() - start, 0.7)
+        self.assertIn("deadline", str(context.exception))
+
+    def test_completedUnregistered(self):
+        self.fake.duration = 0.0
+        token = CancellationToken()
+        handles = [self.client.submit(self.QUERY, token=token) for index in range(3)]
+        handles[0].fetchall()
+        list(handles[1])
+        token.cancel()
+
+        self.assertFalse(handles[0].cancelled)
+        self.assertFalse(handles[1].cancelled)
+        self.assertTrue(handles[2].cancelled)
+
+    def test_blockingWait(self):
+        self.fake.duration = 0.3
+        handle = self.client.submit(self.QUERY)
+        calls = []
+        done = handle.job.done
+        handle.job.done = lambda: calls.append(True) or done()
+
+        self.assertEqual(len(handle.fetchall()), 80)
+        self.assertEqual(calls, [])
+
+    def test_abandoned_stream(self):
+        self.fake.duration = 0.0
+        stream = self.client.stream(self.QUERY, streams=4)
+        next(stream)
+        stream.close()
+
+        self.assertTrue(self.client.handle.cancelled)
+
+    def test_asyncio(self):
+        async def abandon():
+            handle = self.client.submit(self.QUERY)
+            task = asyncio.ensure_future(handle.fetchallAsync())
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return handle
+
+        start = time.time()
+        handle = asyncio.run(abandon())
+
+        self.assertTrue(handle.cancelled)
+        self.assertEqual(self.fake.cancelled, ["job_1"])
+        self.assertLess(time.time() - start, 1.0)
+
 class TestUseCases(unittest.TestCase):
 
     def setUp(self):
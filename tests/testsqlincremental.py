@@ -0,0 +1,117 @@
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from fakeclient import FakeClient
+from sqlbuilder import Composer, Condition
+from sqlclient import SQLClient
+from sqlincremental import IncrementalAggregate, StateEncoder
+
+class TestIncrementalAggregate(unittest.TestCase):
+
+    TABLE = "project.dataset.events"
+    COLUMNS = ["category", "raisedAmt", "ingested"]
+    RECORDS = [
+        ("web", 100, 1),
+        ("web", 50, 1),
+        ("mobile", 10, 2),
+    ]
+    APPENDED = [
+        ("web", 5, 3),
+        ("hardware", 7, 3),
+        ("mobile", 1, 4),
+    ]
+    DEFINITION = {
+        "TABLE_NAME": TABLE,
+        "GROUP_BY": [{"Field": "category", "Sort": -1, "SortDirection": "ASC"}],
+        "VALUES": [
+            {"Field": "raisedAmt", "Operation": "SUM"},
+            {"Field": "raisedAmt", "Operation": "COUNT"},
+            {"Field": "raisedAmt", "Operation": "MIN"},
+            {"Field": "raisedAmt", "Operation": "MAX"},
+        ],
+    }
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'state.json')
+        self.fake = FakeClient()
+        self.fake.load(self.TABLE, self.COLUMNS, self.RECORDS)
+        self.client = SQLClient(self.fake)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def full(self):
+        self.client.query(Composer(self.DEFINITION).buildQuery())
+        return self.client.fetchall()
+
+    def test_refresh(self):
+        aggregate = IncrementalAggregate(Composer(self.DEFINITION), "ingested", self.path)
+
+        self.assertEqual(aggregate.refresh(self.client), 2)
+        self.assertEqual(aggregate.watermarkValue, 2)
+        self.assertEqual(aggregate.fetchall(), self.full())
+
+        self.fake.load(self.TABLE, self.COLUMNS, self.RECORDS + self.APPENDED)
+        self.assertEqual(aggregate.refresh(self.client), 4)
+        self.assertIn("WHERE ingested >= 2", self.fake.queries[-1])
+        self.assertEqual(aggregate.watermarkValue, 4)
+        self.assertEqual(aggregate.fetchall(), self.full())
+
+    def test_boundaryAppend(self):
+        aggregate = IncrementalAggregate(Composer(self.DEFINITION), "ingested", self.path)
+        aggregate.refresh(self.client)
+        self.fake.load(self.TABLE, self.COLUMNS, self.RECORDS + [("mobile", 3, 2), ("web", 8, 1)])
+        aggregate.refresh(self.client)
+
+        self.assertEqual(aggregate.watermarkValue, 2)
+        self.assertEqual(aggregate.fetchall(), [("mobile", 13, 2, 3, 10), ("web", 150, 2, 50, 100)])
+
+        restored = IncrementalAggregate(Composer(self.DEFINITION), "ingested", self.path)
+        self.fake.load(self.TABLE, self.COLUMNS, self.RECORDS + [("mobile", 3, 2), ("mobile", 4, 2)])
+        restored.refresh(self.client)
+
+        self.assertEqual(restored.fetchall(), [("mobile", 17, 3, 3, 10), ("web", 150, 2, 50, 100)])
+
+    def test_persisted(self):
+        aggregate = IncrementalAggregate(Composer(self.DEFINITION), "ingested", self.path)
+        aggregate.refresh(self.client)
+        restored = IncrementalAggregate(Composer(self.DEFINITION), "ingested", self.path)
+
+        self.assertEqual(restored.watermarkValue, 2)
+        self.assertEqual(restored.fetchall(), aggregate.fetchall())
+
+    def test_emptyDelta(self):
+        aggregate = IncrementalAggregate(Composer(self.DEFINITION), "ingested", self.path)
+        aggregate.refresh(self.client)
+
+        rows = aggregate.fetchall()
+
+        self.assertEqual(aggregate.refresh(self.client), 1)
+        self.assertEqual(aggregate.watermarkValue, 2)
+        self.assertEqual(aggregate.fetchall(), rows)
+
+    def test_notMergeable(self):
+        definition = dict(self.DEFINITION, VALUES=[{"Field": "raisedAmt", "Operation": "AVG"}])
+
+        with self.assertRaises(Exception):
+            IncrementalAggregate(Composer(definition), "ingested", self.path)
+
+    def test_timestampWatermark(self):
+        watermark = datetime.datetime(2020, 1, 2, 3, 4, 5)
+
+        self.assertEqual(
+            Condition("ingested", ">", watermark).apply(),
+            'ingested > TIMESTAMP "2020-01-02T03:04:05"'
+        )
+        self.assertEqual(StateEncoder.decode(StateEncoder().default(watermark)), watermark)
+
+
+if "__main__" == __name__:
+    unittest.main()
@@ -0,0 +1,141 @@
+import os
+import sys
+import time
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from fakeclient import FakeClient
+from sqlclient import SQLClient
+import sqlpipeline
+from sqlpipeline import Pipeline
+
+@unittest.skipIf(sqlpipeline.pyarrow is None, "pyarrow not installed")
+class TestPipeline(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+    QUERY = "SELECT company, category, raisedAmt, employees FROM `project.dataset.inv` ORDER BY company, category"
+    RECORDS = [
+        ("acme", "web", 100, 10),
+        ("acme", "mobile", 40, 4),
+        ("beta", "web", 25, 5),
+        ("beta", "web", 75, 5),
+        ("gamma", "mobile", 10, 0),
+    ]
+
+    def setUp(self):
+        self.fake = FakeClient()
+        self.fake.load(self.TABLE, ["company", "category", "raisedAmt", "employees"], self.RECORDS)
+        self.client = SQLClient(self.fake)
+
+    def test_top(self):
+        pipeline = Pipeline([
+            {"Step": "FILTER", "Field": "employees", "Operator": ">", "Operand": 0},
+            {"Step": "DERIVE", "Name": "perEmployee", "Operation": "divide", "Fields": ["raisedAmt", "employees"]},
+            {"Step": "TOP", "Limit": 2, "Fields": [{"Field": "raisedAmt", "SortDirection": "DESC"}]},
+            {"Step": "SELECT", "Fields": ["company", "raisedAmt", "perEmployee"]},
+        ], batchSize=2)
+        self.client.query(self.QUERY, pipeline=pipeline)
+
+        self.assertEqual(self.client.columns, ["company", "raisedAmt", "perEmployee"])
+        self.assertEqual(self.client.fetchall(), [("acme", 100, 10), ("beta", 75, 15)])
+
+    def test_sort(self):
+        pipeline = Pipeline([
+            {"Step": "SORT", "Fields": [{"Field": "category"}, {"Field": "raisedAmt", "SortDirection": "DESC"}]},
+            {"Step": "LIMIT", "Limit": 3},
+        ], batchSize=2)
+        table = self.client.process(self.QUERY, pipeline)
+
+        self.assertEqual(table.column("raisedAmt").to_pylist(), [40, 10, 100])
+
+    def test_limit(self):
+        pipeline = Pipeline([{"Step": "LIMIT", "Limit": 3}], batchSize=2)
+        self.client.query(self.QUERY, pipeline=pipeline)
+
+        self.assertEqual(self.client.fetchall(), sorted(self.RECORDS)[:3])
+
+    def test_reused(self):
+        limited = Pipeline([{"Step": "LIMIT", "Limit": 3}], batchSize=2)
+        ranked = Pipeline([
+            {"Step": "PIVOT", "Index": ["company"], "Field": "category", "Value": "raisedAmt"},
+            {"Step": "TOP", "Limit": 2, "Fields": [{"Field": "company", "SortDirection": "DESC"}]},
+        ], batchSize=2)
+
+        for run in range(2):
+            self.assertEqual(Pipeline.records(self.client.process(self.QUERY, limited)), sorted(self.RECORDS)[:3])
+            self.assertEqual(Pipeline.records(self.client.process(self.QUERY, ranked)), [("gamma", 10, None), ("beta", None, 100)])
+
+    def test_pivot(self):
+        pipeline = Pipeline([
+            {"Step": "PIVOT", "Index": ["company"], "Field": "category", "Value": "raisedAmt", "Operation": "SUM"},
+        ], batchSize=2)
+        self.client.query(self.QUERY, pipeline=pipeline)
+
+        self.assertEqual(self.client.columns, ["company", "raisedAmt_mobile", "raisedAmt_web"])
+        self.assertEqual(self.client.fetchall(), [("acme", 40, 100), ("beta", None, 100), ("gamma", 10, None)])
+
+    def test_truncate(self):
+        table = sqlpipeline.pyarrow.table({"tags": [[1, 2, 3, 4], [5], []]})
+        pipeline = Pipeline([{"Step": "TRUNCATE", "Field": "tags", "Limit": 2}])
+
+        self.assertEqual(pipeline.process([table]).column("tags").to_pylist(), [[1, 2], [5], []])
+
+    def test_arrow_pages(self):
+        batches = [sqlpipeline.pyarrow.record_batch({"value": list(range(start, start + 3))}) for start in (0, 3)]
+
+        class Rows(object):
+            def to_arrow_iterable(self):
+                return iter(batches)
+
+        class Handle(object):
+            records = None
+            streams = 1
+
+            def rows(self):
+                return Rows()
+
+            def _checked(self, pages):
+                for page in pages:
+                    checked.append(page)
+                    yield page
+
+        checked = []
+        pipeline = Pipeline([{"Step": "TOP", "Limit": 2, "Fields": [{"Field": "value", "SortDirection": "DESC"}]}])
+        self.assertEqual(Pipeline.records(pipeline.run(Handle())), [(5,), (4,)])
+        self.assertEqual(checked, batches)
+
+    def test_empty(self):
+        pipeline = Pipeline([{"Step": "FILTER", "Field": "raisedAmt", "Operator": ">", "Operand": 1000}])
+        self.client.query(self.QUERY, pipeline=pipeline)
+
+        self.assertEqual(self.client.fetchall(), [])
+
+    def test_invalid(self):
+        with self.assertRaises(Exception):
+            Pipeline([{"Step": "EXPLODE"}])
+        with self.assertRaises(Exception):
+            Pipeline([{"Step": "DERIVE", "Name": "x", "Operation": "no_such_function", "Fields": []}])
+        with self.assertRaises(Exception):
+            Pipeline([{"Step": "TOP", "Fields": ["raisedAmt"]}])
+
+    def test_faster(self):
+        records = [(index % 97, index) for index in range(200000)]
+        table = sqlpipeline.pyarrow.table({"bucket": [record[0] for record in records], "value": [record[1] for record in records]})
+        pipeline = Pipeline([
+            {"Step": "DERIVE", "Name": "share", "Operation": "divide", "Fields": ["value"], "Operand": 3},
+            {"Step": "TOP", "Limit": 10, "Fields": [{"Field": "value", "SortDirection": "DESC"}]},
+        ])
+
+        start = time.perf_counter()
+        vectorized = Pipeline.records(pipeline.process(table.to_batches(max_chunksize=10000)))
+        vectorized = time.perf_counter() - start
+        start = time.perf_counter()
+        derived = [(bucket, value, value // 3) for bucket, value in records]
+        sorted(derived, key=lambda record: -record[1])[:10]
+        python = time.perf_counter() - start
+
+        self.assertLess(vectorized, python)
+
+if "__main__" == __name__:
+    unittest.main()
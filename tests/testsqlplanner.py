@@ -0,0 +1,202 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from fakeclient import FakeClient
+from sqlbuilder import Composer, ConfigHandlerWhere
+from sqlclient import SQLClient
+from sqlplanner import FusedScan, ScanPlanner, ScriptBatch
+
+class ClientStub():
+
+    def __init__(self, records):
+        self._records = records
+        self.queries = []
+
+    def query(self, sqlQuery):
+        self.queries.append(sqlQuery)
+
+    def fetchall(self):
+        return self._records
+
+
+class TestScanPlanner(unittest.TestCase):
+
+    TEST_CASE_CATEGORY = os.path.join('config', 'testCase4.json')
+    TEST_CASE_STATE = os.path.join('config', 'testCase5.json')
+    TEST_CASE_OTHER = os.path.join('config', 'testCase1.json')
+    TEST_CASE_SORTED = os.path.join('config', 'testCase3.json')
+
+    EXPECTED_QUERY = (
+        "SELECT category, state, "
+        "GROUPING(category) AS _grouping_0, GROUPING(state) AS _grouping_1, "
+        "SUM(raisedAmt) AS _value_0, COUNT(round) AS _value_1 "
+        "FROM `datadocs-163219.010ff92f6a62438aa47c10005fe98fc9.inv` "
+        "GROUP BY GROUPING SETS ((category), (category, state)) "
+        "QUALIFY (GROUPING(category) = 0 AND GROUPING(state) = 1 AND "
+        "ROW_NUMBER() OVER (PARTITION BY GROUPING(category), GROUPING(state)) <= 2) OR "
+        "(GROUPING(category) = 0 AND GROUPING(state) = 0 AND "
+        "ROW_NUMBER() OVER (PARTITION BY GROUPING(category), GROUPING(state)) <= 1000)"
+    )
+
+    RECORDS = [
+        ("web", None, 0, 1, 300, 30),
+        ("web", "CA", 0, 0, 200, 20),
+        ("web", "NY", 0, 0, 100, 10),
+        ("mobile", None, 0, 1, 50, 5),
+        (None, None, 0, 1, 7, 1),
+        ("mobile", None, 0, 0, 50, 5),
+    ]
+
+    def setUp(self):
+        self.composers = [
+            Composer(self.TEST_CASE_CATEGORY),
+            Composer(self.TEST_CASE_STATE),
+        ]
+
+    def test_fusedQuery(self):
+        planner = ScanPlanner(self.composers)
+
+        self.assertEqual(len(planner.scans), 1)
+        self.assertEqual(planner.queries(), [self.EXPECTED_QUERY])
+
+    def test_split(self):
+        planner = ScanPlanner(self.composers)
+        results = planner.run(ClientStub(self.RECORDS))
+
+        self.assertEqual(results[0], [("web", 300), ("mobile", 50)])
+        self.assertEqual(results[1], [
+            ("web", "CA", 200, 20),
+            ("web", "NY", 100, 10),
+            ("mobile", None, 50, 5),
+        ])
+
+    def test_splitSorted(self):
+        planner = ScanPlanner([Composer(self.TEST_CASE_SORTED), self.composers[1]])
+        records = [
+            ("mobile", None, 0, 1, 50, ["NY"], 5),
+            (None, None, 0, 1, 7, ["CA"], 1),
+            ("web", None, 0, 1, 300, ["CA", "NY"], 30),
+            ("web", "CA", 0, 0, 200, ["CA"], 20),
+        ]
+        results = planner.run(ClientStub(records))
+
+        self.assertEqual(results[0], [
+            ("web", 300, ["CA", "NY"]),
+            ("mobile", 50, ["NY"]),
+            (None, 7, ["CA"]),
+        ])
+        self.assertEqual(results[1], [("web", "CA", 200, 20)])
+
+    def test_memberLimits(self):
+        ranked = Composer(self.TEST_CASE_SORTED)
+        unlimited = Composer(self.TEST_CASE_STATE)
+        unlimited.limit = None
+        query = ScanPlanner([ranked, unlimited]).queries()[0]
+
+        self.assertIn(
+            "QUALIFY (GROUPING(category) = 0 AND GROUPING(state) = 1 AND "
+            "ROW_NUMBER() OVER (PARTITION BY GROUPING(category), GROUPING(state) ORDER BY category DESC) <= 10000) OR "
+            "(GROUPING(category) = 0 AND GROUPING(state) = 0)",
+            query
+        )
+
+    def test_unlimited(self):
+        for composer in self.composers:
+            composer.limit = None
+
+        self.assertNotIn("QUALIFY", ScanPlanner(self.composers).queries()[0])
+
+    def test_separateTables(self):
+        other = Composer(self.TEST_CASE_OTHER)
+        other.table = "other"
+        planner = ScanPlanner(self.composers + [other])
+
+        self.assertEqual(len(planner.scans), 2)
+        self.assertEqual(planner.queries()[1], other.buildQuery())
+
+    def test_separateFilters(self):
+        filtered = Composer(self.TEST_CASE_STATE)
+        filtered.whereClauses.clauses = {
+            0: ConfigHandlerWhere({"Field": "state", "Operator": "=", "Operand": "CA"})()
+        }
+        planner = ScanPlanner(self.composers + [filtered])
+
+        self.assertEqual(len(planner.scans), 2)
+        self.assertEqual(planner.queries()[1], filtered.buildQuery())
+
+    def test_singleDefinition(self):
+        scan = FusedScan(self.composers[0].table, self.composers[:1])
+
+        self.assertEqual(scan.sql, self.composers[0].buildQuery())
+        self.assertEqual(scan.split([("web", 300)]), [[("web", 300)]])
+
+    def test_rowMismatch(self):
+        scan = FusedScan(self.composers[0].table, self.composers)
+
+        with self.assertRaises(Exception):
+            scan.split([("web", 300)])
+
+
+class TestScriptBatch(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+
+    def setUp(self):
+        self.fake = FakeClient()
+        self.fake.load(self.TABLE, ["id", "category"], [
+            (1, "web"), (2, "web"), (3, "mobile"), (4, "hardware"),
+        ])
+        self.client = SQLClient(self.fake)
+
+    def composer(self, table=TABLE, field="category"):
+        return Composer({
+            "TABLE_NAME": table,
+            "GROUP_BY": [{"Field": field, "Sort": -1, "SortDirection": "ASC"}],
+            "VALUES": [{"Field": "id", "Operation": "COUNT"}],
+        })
+
+    def test_script(self):
+        batch = ScriptBatch([self.composer(), self.composer(field="id")])
+
+        self.assertEqual(batch.scripts(), [
+            "BEGIN\n" + self.composer().buildQuery() + ";\n"
+            "EXCEPTION WHEN ERROR THEN\nSELECT 0 AS _statement, @@error.message AS _error;\nEND;\n"
+            "BEGIN\n" + self.composer(field="id").buildQuery() + ";\n"
+            "EXCEPTION WHEN ERROR THEN\nSELECT 1 AS _statement, @@error.message AS _error;\nEND;"
+        ])
+
+    def test_run(self):
+        composers = [self.composer(), self.composer(field="id"), self.composer()]
+        results = ScriptBatch(composers).run(self.client)
+
+        self.assertEqual(len(self.fake.queries), 1)
+        self.assertEqual(results[0], [("hardware", 1), ("mobile", 1), ("web", 2)])
+        self.assertEqual(results[1], [(1, 1), (2, 1), (3, 1), (4, 1)])
+        self.assertEqual(results[2], results[0])
+
+    def test_errors(self):
+        composers = [self.composer(), self.composer(table="project.dataset.missing"), self.composer(field="id")]
+        batch = ScriptBatch(composers)
+        results = batch.run(self.client)
+
+        self.assertEqual(list(batch.errors.keys()), [1])
+        self.assertIn("missing", batch.errors[1])
+        self.assertIsNone(results[1])
+        self.assertEqual(results[0], [("hardware", 1), ("mobile", 1), ("web", 2)])
+        self.assertEqual(len(results[2]), 4)
+
+    def test_chunks(self):
+        composers = [self.composer() for index in range(5)]
+        batch = ScriptBatch(composers, size=2)
+        results = batch.run(self.client)
+
+        self.assertEqual(len(batch.scripts()), 3)
+        self.assertEqual(len(self.fake.queries), 3)
+        self.assertEqual(results, [results[0]] * 5)
+
+
+if "__main__" == __name__:
+    unittest.main()
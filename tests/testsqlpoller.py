@@ -0,0 +1,111 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from fakeclient import FakeClient
+from sqlclient import QueryHandle, SQLClient
+from sqlpoller import BatchPoller
+
+class TestBatchPoller(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+    QUERY = "SELECT id FROM `project.dataset.inv` WHERE id = {}"
+
+    def setUp(self):
+        self.fake = FakeClient(duration=0.2)
+        self.fake.load(self.TABLE, ["id"], [(index,) for index in range(50)])
+
+    def handle(self, index):
+        return QueryHandle(self.fake, self.QUERY.format(index), priority="BATCH")
+
+    def test_coalesced(self):
+        poller = BatchPoller(self.fake, minInterval=0.05, maxInterval=0.2)
+        handles = [self.handle(index) for index in range(30)]
+        threads = threading.active_count()
+        futures = [poller.watch(handle) for handle in handles]
+
+        self.assertLessEqual(threading.active_count(), threads + 1)
+        results = [future.result(timeout=5).fetchall() for future in futures]
+        self.assertEqual(results, [[(index,)] for index in range(30)])
+        self.assertEqual(self.fake.listCalls, poller.rounds)
+        self.assertLess(poller.rounds, 15)
+        self.assertEqual(poller.pending(), 0)
+
+    def test_backoff(self):
+        self.fake.duration = 0.6
+        poller = BatchPoller(self.fake, minInterval=0.05, maxInterval=1.0, backoff=2.0)
+        future = poller.watch(self.handle(1))
+        future.result(timeout=5)
+
+        self.assertLessEqual(poller.rounds, 5)
+        self.assertEqual(poller.interval, 0.05)
+
+    def test_fallback(self):
+        poller = BatchPoller(object(), minInterval=0.05)
+        handle = self.handle(2)
+
+        self.assertEqual(poller.watch(handle).result(timeout=5).fetchall(), [(2,)])
+
+    def test_cancelled(self):
+        poller = BatchPoller(self.fake, minInterval=0.05)
+        handle = self.handle(3)
+        future = poller.watch(handle)
+        handle.cancel()
+
+        time.sleep(0.2)
+        self.assertTrue(future.cancelled())
+
+    def test_failed(self):
+        poller = BatchPoller(self.fake, minInterval=0.05)
+        handle = self.handle(4)
+        self.fake.jobs[-1].error_result = {"reason": "invalidQuery"}
+
+        self.assertIsNone(handle.job.error_result)
+        with self.assertRaises(Exception):
+            poller.watch(handle).result(timeout=5)
+
+    def test_resolved(self):
+        poller = BatchPoller(self.fake, minInterval=0.05)
+        handle = poller.watch(self.handle(5)).result(timeout=5)
+        calls = []
+        done = handle.job.done
+        handle.job.done = lambda: calls.append(True) or done()
+
+        self.assertTrue(handle.finished)
+        self.assertEqual(handle.fetchall(), [(5,)])
+        self.assertEqual(calls, [])
+
+class TestSubmitBatch(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+    QUERY = "SELECT id FROM `project.dataset.inv` WHERE id < {} ORDER BY id"
+
+    def setUp(self):
+        self.fake = FakeClient(duration=0.1)
+        self.fake.load(self.TABLE, ["id"], [(index,) for index in range(50)])
+        self.client = SQLClient(self.fake)
+
+    def test_submit(self):
+        results = {}
+        done = threading.Event()
+
+        def callback(future):
+            results[future.result().sqlquery] = future.result().fetchall()
+            if len(results) == 10:
+                done.set()
+
+        futures = [self.client.submitBatch(self.QUERY.format(index), callback) for index in range(10)]
+
+        self.assertTrue(done.wait(5))
+        self.assertEqual([job.priority for job in self.fake.jobs], ["BATCH"] * 10)
+        self.assertEqual(results[self.QUERY.format(3)], [(0,), (1,), (2,)])
+        self.assertIs(self.client.poller, self.client.poller)
+        for future in futures:
+            self.assertTrue(future.done())
+
+if "__main__" == __name__:
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import os
+import pstats
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from fakeclient import FakeClient
+from sqlbuilder import Composer
+from sqlclient import SQLClient
+from sqlprofile import Profiler
+
+class TestProfiler(unittest.TestCase):
+
+    TEST_CASE = os.path.join('config', 'testCase1.json')
+    TABLE = "project.dataset.inv"
+    QUERY = "SELECT id, category FROM `project.dataset.inv` ORDER BY id"
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fake = FakeClient()
+        self.fake.load(self.TABLE, ["id", "category"], [(index, "web") for index in range(100)])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_context(self):
+        with Profiler(self.directory) as profiler:
+            for index in range(3):
+                Composer(self.TEST_CASE).buildQuery()
+            SQLClient(self.fake).submit(self.QUERY, streams=2).fetchall()
+
+        self.assertIsNone(Profiler.current)
+        with open(os.path.join(self.directory, Profiler.SUMMARY)) as handle:
+            summary = json.load(handle)
+        self.assertEqual(summary["Composer.__init__"][Profiler.METRIC_CALLS], 3)
+        self.assertEqual(summary["Composer.buildQuery"][Profiler.METRIC_CALLS], 3)
+        self.assertEqual(summary["QueryHandle.fetchall"][Profiler.METRIC_CALLS], 1)
+        self.assertGreater(summary["QueryHandle.fetchall"][Profiler.METRIC_PEAK], 0)
+        self.assertEqual(summary["QueryHandle._readShard"][Profiler.METRIC_CALLS], 2)
+        stats = pstats.Stats(os.path.join(self.directory, "Composer.buildQuery.prof"))
+        self.assertTrue(any(function[2] == "buildQuery" for function in stats.stats.keys()))
+        self.assertTrue(os.path.exists(os.path.join(self.directory, "Composer.__init__.prof")))
+        with open(os.path.join(self.directory, Profiler.ALLOCATIONS)) as handle:
+            self.assertIn("bytes", handle.read())
+
+    def test_nested(self):
+        with Profiler(self.directory) as profiler:
+            Profiler.profile("outer")(lambda: Composer(self.TEST_CASE))()
+
+        self.assertEqual(profiler.statistics["outer"][Profiler.METRIC_CALLS], 1)
+        self.assertEqual(profiler.statistics["Composer.__init__"][Profiler.METRIC_SKIPPED], 1)
+
+    def test_fetchPaths(self):
+        client = SQLClient(self.fake)
+        with Profiler(self.directory) as profiler:
+            records = list(client.stream(self.QUERY))
+            client.submit(self.QUERY).fetchLazy(["id"])
+            lazy = list(client.submit(self.QUERY).iterLazy())
+
+        self.assertEqual(len(records), 100)
+        self.assertEqual(len(lazy), 100)
+        self.assertEqual(profiler.statistics["QueryHandle.__iter__"][Profiler.METRIC_CALLS], 101)
+        self.assertEqual(profiler.statistics["QueryHandle.fetchLazy"][Profiler.METRIC_CALLS], 1)
+        self.assertEqual(profiler.statistics["QueryHandle.iterLazy"][Profiler.METRIC_CALLS], 101)
+
+    def test_single(self):
+        with Profiler(self.directory):
+            with self.assertRaises(Exception):
+                Profiler(self.directory).start()
+
+    def test_disabled(self):
+        calls = []
+
+        def method(*args, **kwargs):
+            calls.append((args, kwargs))
+            return len(calls)
+
+        profiler = Profiler(self.directory)
+        wrapped = Profiler.profile("method")(method)
+        composer = Composer(self.TEST_CASE)
+
+        self.assertIsNone(Profiler.current)
+        self.assertIs(wrapped.__wrapped__, method)
+        self.assertEqual(wrapped(1, key="value"), 1)
+        self.assertEqual(calls, [((1,), {"key": "value"})])
+        self.assertEqual(composer.buildQuery(), Composer.buildQuery.__wrapped__(composer))
+        self.assertEqual(profiler.statistics, {})
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_environment(self):
+        script = "import sqlbuilder; sqlbuilder.Composer({!r}).buildQuery()".format(self.TEST_CASE)
+        environment = dict(os.environ)
+        environment[Profiler.ENVIRONMENT] = self.directory
+        environment["PYTHONPATH"] = os.pathsep.join(
+            [os.path.dirname(os.getcwd())] + [path for path in [os.environ.get("PYTHONPATH")] if path]
+        )
+        subprocess.check_call([sys.executable, "-c", script], env=environment)
+
+        self.assertIn("Composer.buildQuery.prof", os.listdir(self.directory))
+        self.assertIn(Profiler.SUMMARY, os.listdir(self.directory))
+
+if "__main__" == __name__:
+    unittest.main()
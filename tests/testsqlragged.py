@@ -0,0 +1,153 @@
+import json
+import os
+import sys
+import tracemalloc
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from sqlclient import SQLClient
+import sqlragged
+from sqlragged import ColumnarResult, RaggedColumn
+
+class RowStub():
+
+    def __init__(self, values):
+        self._values = values
+
+    def values(self):
+        return self._values
+
+
+class RowsStub(list):
+    schema = []
+
+
+class JobStub():
+
+    def __init__(self, records):
+        self._records = records
+
+    def done(self):
+        return True
+
+    def result(self):
+        return RowsStub(RowStub(record) for record in self._records)
+
+
+class ClientStub():
+
+    def __init__(self, records):
+        self._records = records
+
+    def query(self, sqlQuery):
+        return JobStub(self._records)
+
+
+class TestRaggedColumn(unittest.TestCase):
+
+    STATES = ["CA", "NY", "WA", "TX", "MA", "IL", "OR", "CO"]
+
+    def test_integers(self):
+        column = RaggedColumn()
+        for values in [[1, 2, 3], [], [4], None, [5, 6]]:
+            column.append(values)
+
+        self.assertEqual(column.kind, RaggedColumn.KIND_INTEGER)
+        self.assertEqual(list(column.offsets), [0, 3, 3, 4, 4, 6])
+        self.assertEqual(column[0], [1, 2, 3])
+        self.assertEqual(column[-1][1], 6)
+        self.assertEqual(column[0][1:], [2, 3])
+        self.assertEqual(column.lengths(), [3, 0, 1, 0, 2])
+        self.assertEqual(column[4].memory().tolist(), [5, 6])
+        with self.assertRaises(IndexError):
+            column[1][0]
+
+    def test_strings(self):
+        column = RaggedColumn()
+        column.append(["CA", "Zürich"])
+        column.append(["NY"])
+
+        self.assertEqual(column.kind, RaggedColumn.KIND_STRING)
+        self.assertEqual(list(column), [["CA", "Zürich"], ["NY"]])
+        with self.assertRaises(Exception):
+            column[0].memory()
+
+    def test_promotion(self):
+        column = RaggedColumn()
+        column.append([1, 2])
+        column.append([0.5])
+        self.assertEqual(column.kind, RaggedColumn.KIND_FLOAT)
+        column.append(["x", None])
+
+        self.assertEqual(column.kind, RaggedColumn.KIND_OBJECT)
+        self.assertEqual(list(column), [[1.0, 2.0], [0.5], ["x", None]])
+
+    def test_memory(self):
+        rows = [json.dumps([self.STATES[(index + offset) % 8] for offset in range(5)]) for index in range(20000)]
+
+        tracemalloc.start()
+        lists = [json.loads(row) for row in rows]
+        nested = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        tracemalloc.start()
+        column = RaggedColumn()
+        for row in rows:
+            column.append(json.loads(row))
+        ragged = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        self.assertEqual(column[123], lists[123])
+        self.assertLess(ragged * 3, nested)
+
+class TestColumnarResult(unittest.TestCase):
+
+    RECORDS = [("web", 1208, ["CA", "NY"]), ("software", 102, ["WA"]), ("mobile", 3, [])]
+
+    def test_client(self):
+        client = SQLClient(ClientStub(self.RECORDS))
+        client.query("SELECT category, SUM(raisedAmt), ARRAY_AGG(state) FROM `t`", ragged=True)
+        result = client.fetchall()
+
+        self.assertIsInstance(result, ColumnarResult)
+        self.assertEqual(len(result), 3)
+        self.assertEqual(list(result), self.RECORDS)
+        self.assertEqual(result[0], ("web", 1208, ["CA", "NY"]))
+        self.assertIsInstance(result.data[2], RaggedColumn)
+        self.assertEqual(result.data[0], ["web", "software", "mobile"])
+        self.assertIs(client.handle.fetchRagged(), result)
+
+    def test_empty(self):
+        result = ColumnarResult.fromRecords([], ["category", "state"])
+
+        self.assertEqual(len(result), 0)
+        self.assertEqual(list(result), [])
+
+    @unittest.skipIf(sqlragged.pyarrow is None, "pyarrow not installed")
+    def test_arrow(self):
+        pyarrow = sqlragged.pyarrow
+        table = pyarrow.table({
+            "category": ["web", "software", "mobile", "games"],
+            "amounts": [[1, 2], [3], [], [4, 5, 6]],
+            "states": [["CA", "NY"], ["WA"], [], ["TX"]],
+        })
+        batches = table.slice(1).to_batches(max_chunksize=2)
+        result = ColumnarResult.fromArrow(batches)
+
+        self.assertEqual(result.columns, ["category", "amounts", "states"])
+        self.assertEqual(list(result), [(row[0], row[1], row[2]) for row in zip(*table.slice(1).to_pydict().values())])
+        self.assertEqual(result.column("amounts").kind, RaggedColumn.KIND_INTEGER)
+        self.assertEqual(result.column("states").kind, RaggedColumn.KIND_STRING)
+
+    @unittest.skipIf(sqlragged.pyarrow is None, "pyarrow not installed")
+    def test_arrowFloat32(self):
+        pyarrow = sqlragged.pyarrow
+        values = pyarrow.array([[1.5, 2.25], [], [0.1, -3.0, 4.75]], pyarrow.list_(pyarrow.float32()))
+        column = RaggedColumn.fromArrow(values.slice(1))
+
+        self.assertEqual(column.kind, RaggedColumn.KIND_FLOAT)
+        self.assertEqual(len(column), 2)
+        self.assertEqual([list(column[index]) for index in range(2)], values.slice(1).to_pylist())
+
+if "__main__" == __name__:
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from fakeclient import FakeClient
+from sqlbuilder import Composer
+from sqlclient import SQLClient
+from sqlrollup import Rollup, RollupComposer, RollupManager
+
+class TestRollupManager(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+    DATASET = "project.rollups"
+    COLUMNS = ["category", "state", "raisedAmt", "round"]
+    RECORDS = [
+        ("web", "CA", 100, "a"),
+        ("web", "CA", 50, "b"),
+        ("web", "NY", 25, "a"),
+        ("mobile", "NY", 10, None),
+        ("mobile", "WA", None, "c"),
+        ("hardware", "CA", 7, "seed"),
+    ]
+
+    def definition(self, groups, values, **extra):
+        definition = {
+            "TABLE_NAME": self.TABLE,
+            "GROUP_BY": [{"Field": field} for field in groups],
+            "VALUES": [{"Field": field, "Operation": operation} for operation, field in values],
+        }
+        definition.update(extra)
+        return definition
+
+    def setUp(self):
+        self.fake = FakeClient()
+        self.fake.load(self.TABLE, self.COLUMNS, self.RECORDS)
+        self.client = SQLClient(self.fake)
+        self.composers = [
+            Composer(self.definition(["category"], [("SUM", "raisedAmt"), ("AVG", "raisedAmt")])),
+            Composer(self.definition(["category", "state"], [("COUNT", "round"), ("MAX", "raisedAmt")])),
+            Composer(self.definition(["state"], [("MIN", "raisedAmt")])),
+        ]
+
+    def run_sorted(self, composer):
+        self.client.query(composer.buildQuery())
+        return sorted(self.client.fetchall(), key=repr)
+
+    def test_derive(self):
+        manager = RollupManager(self.composers, self.DATASET)
+
+        self.assertEqual(len(manager.rollups), 1)
+        self.assertEqual(manager.rollups[0].dimensions, ["category", "state"])
+        self.assertEqual(list(manager.rollups[0].measures.keys()), [
+            ("SUM", "raisedAmt"),
+            ("COUNT", "raisedAmt"),
+            ("COUNT", "round"),
+            ("MAX", "raisedAmt"),
+            ("MIN", "raisedAmt"),
+        ])
+
+    def test_name(self):
+        base = self.composers[0].scanClauses()
+        rollup = Rollup(self.DATASET, base, ["category"], [("SUM", "raisedAmt")])
+        wider = Rollup(self.DATASET, base, ["category"], [("SUM", "raisedAmt"), ("MAX", "raisedAmt")])
+        reordered = Rollup(self.DATASET, base, ["category"], [("MAX", "raisedAmt"), ("SUM", "raisedAmt")])
+
+        self.assertNotEqual(rollup.name, wider.name)
+        self.assertEqual(wider.name, reordered.name)
+
+    def test_statements(self):
+        manager = RollupManager(self.composers[:1], self.DATASET)
+        rollup = manager.rollups[0]
+
+        self.assertEqual(manager.statements(), [
+            "CREATE OR REPLACE TABLE `{}` AS SELECT category, SUM(raisedAmt) AS sum_raisedAmt, "
+            "COUNT(raisedAmt) AS count_raisedAmt FROM `{}` GROUP BY category".format(rollup.name, self.TABLE)
+        ])
+        self.assertTrue(manager.statements(materialized=True)[0].startswith("CREATE MATERIALIZED VIEW"))
+
+    def test_rewrite(self):
+        manager = RollupManager(self.composers, self.DATASET)
+        manager.build(self.client)
+
+        self.assertEqual(manager.rollups[0].rows, 5)
+        for composer in self.composers:
+            rewritten = manager.rewrite(composer)
+            self.assertIsInstance(rewritten, RollupComposer)
+            self.assertIn(manager.rollups[0].name, rewritten.buildQuery())
+            self.assertEqual(self.run_sorted(rewritten), self.run_sorted(composer))
+
+    def test_smallestRollup(self):
+        manager = RollupManager(self.composers, self.DATASET)
+        manager.rollups.append(Rollup(
+            self.DATASET,
+            manager.rollups[0].base,
+            ["category"],
+            manager.rollups[0].measures.keys()
+        ))
+        manager.build(self.client)
+
+        self.assertEqual(manager.route(self.composers[0]), manager.rollups[1])
+        self.assertEqual(manager.route(self.composers[1]), manager.rollups[0])
+
+    def test_notCovered(self):
+        manager = RollupManager(self.composers, self.DATASET)
+        distinct = Composer(self.definition(["category"], [("ARRAY_AGG", "state")]))
+        filtered = Composer(self.definition(
+            ["category"],
+            [("SUM", "raisedAmt")],
+            WHERE=[{"Field": "state", "Operator": "=", "Operand": "CA"}]
+        ))
+
+        self.assertIs(manager.rewrite(distinct), distinct)
+        self.assertIs(manager.rewrite(filtered), filtered)
+
+
+if "__main__" == __name__:
+    unittest.main()
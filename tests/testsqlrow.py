@@ -0,0 +1,106 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from fakeclient import FakeClient
+from sqlclient import SQLClient
+import sqlrow
+from sqlrow import ArrowPage, LazyRow, RecordPage
+
+class TestLazyRow(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+    QUERY = "SELECT id, category, raisedAmt FROM `project.dataset.inv` ORDER BY id"
+    RECORDS = [(index, "web" if index % 2 else "mobile", index * 10) for index in range(25)]
+
+    def setUp(self):
+        self.fake = FakeClient()
+        self.fake.load(self.TABLE, ["id", "category", "raisedAmt"], self.RECORDS)
+        self.client = SQLClient(self.fake)
+
+    def test_lazy(self):
+        self.client.query(self.QUERY, lazy=True)
+        rows = self.client.fetchall()
+
+        self.assertIsInstance(rows[0], LazyRow)
+        self.assertEqual(rows, self.RECORDS)
+        self.assertEqual(rows[3]["category"], "web")
+        self.assertEqual(rows[3][-1], 30)
+        self.assertEqual(rows[3].keys(), ["id", "category", "raisedAmt"])
+        self.assertEqual(rows[3].get("missing", 0), 0)
+        self.assertEqual(self.client.columns, ["id", "category", "raisedAmt"])
+
+    def test_projection(self):
+        self.client.query(self.QUERY, projection=["raisedAmt", "id"])
+
+        self.assertEqual(self.client.columns, ["raisedAmt", "id"])
+        self.assertEqual(self.client.fetchall(), [(record[2], record[0]) for record in self.RECORDS])
+        with self.assertRaises(Exception):
+            self.client.query(self.QUERY, projection=["missing"])
+
+    def test_shards(self):
+        handle = self.client.submit(self.QUERY, streams=4)
+        rows = handle.fetchLazy(["category"])
+
+        self.assertEqual([field.name for field in self.fake.selected], ["category"])
+        self.assertEqual(rows, [(record[1],) for record in self.RECORDS])
+
+    def test_singleStreamProjection(self):
+        handle = self.client.submit(self.QUERY)
+        rows = handle.fetchLazy(["raisedAmt"])
+
+        self.assertEqual([field.name for field in self.fake.selected], ["raisedAmt"])
+        self.assertEqual(rows, [(record[2],) for record in self.RECORDS])
+
+    def test_pages(self):
+        handle = self.client.submit(self.QUERY)
+        handle.PAGE_SIZE = 10
+        rows = list(handle.iterLazy())
+
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(len(set(id(row._page) for row in rows)), 3)
+
+    def test_projectedTuples(self):
+        handle = self.client.submit(self.QUERY)
+        handle.PAGE_SIZE = 10
+        rows = list(handle.iterLazy(["raisedAmt", "id"]))
+
+        self.assertEqual(rows, [(record[2], record[0]) for record in self.RECORDS])
+        self.assertTrue(all(type(row) is tuple for row in rows))
+
+    def test_decode_once(self):
+        decoded = []
+
+        class CountingPage(RecordPage):
+            def _decode(self, position):
+                decoded.append(position)
+                return super(CountingPage, self)._decode(position)
+
+        rows = CountingPage(self.RECORDS, ["id", "category", "raisedAmt"]).rows()
+        for row in rows:
+            row["id"]
+        rows[0]["id"]
+
+        self.assertEqual(decoded, [0])
+
+    @unittest.skipIf(sqlrow.pyarrow is None, "pyarrow not installed")
+    def test_wide(self):
+        pyarrow = sqlrow.pyarrow
+        columns = ["column{}".format(index) for index in range(20)]
+        batch = pyarrow.record_batch([pyarrow.array(range(1000)) for name in columns], names=columns)
+        decoded = []
+
+        class CountingPage(ArrowPage):
+            def _decode(self, position):
+                decoded.append(self.columns[position])
+                return super(CountingPage, self)._decode(position)
+
+        records = CountingPage(batch, ["column3", "column7"]).records()
+
+        self.assertEqual(records, [(index, index) for index in range(1000)])
+        self.assertEqual(decoded, ["column3", "column7"])
+
+if "__main__" == __name__:
+    unittest.main()
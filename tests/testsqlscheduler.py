@@ -0,0 +1,142 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from fakeclient import FakeClient
+from sqlclient import SQLClient
+from sqlscheduler import Scheduler, TokenBucket
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst(self):
+        bucket = TokenBucket(10, 3)
+        start = time.time()
+        for index in range(3):
+            bucket.acquire()
+
+        self.assertLess(time.time() - start, 0.05)
+
+    def test_rate(self):
+        bucket = TokenBucket(20, 1)
+        start = time.time()
+        for index in range(5):
+            bucket.acquire()
+
+        self.assertGreaterEqual(time.time() - start, 0.19)
+
+class TestScheduler(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+    QUERY = "SELECT id FROM `project.dataset.inv` WHERE id = {}"
+
+    def setUp(self):
+        self.fake = FakeClient()
+        self.fake.load(self.TABLE, ["id"], [(index,) for index in range(50)])
+        self.client = SQLClient(self.fake)
+        self.scheduler = None
+
+    def tearDown(self):
+        if self.scheduler is not None:
+            self.scheduler.shutdown()
+
+    def test_results(self):
+        self.scheduler = Scheduler(self.client, slots=3)
+        futures = [self.scheduler.submit(self.QUERY.format(index)) for index in range(10)]
+
+        self.assertEqual([future.result() for future in futures], [[(index,)] for index in range(10)])
+        self.assertEqual(self.scheduler.query(self.QUERY.format(7)), [(7,)])
+
+    def test_slots(self):
+        self.fake.duration = 0.15
+        self.scheduler = Scheduler(self.client, slots=2)
+        start = time.time()
+        futures = [self.scheduler.submit(self.QUERY.format(index)) for index in range(6)]
+        for future in futures:
+            future.result()
+
+        self.assertGreaterEqual(time.time() - start, 0.45)
+
+    def test_rate_limit(self):
+        self.scheduler = Scheduler(self.client, slots=4, rate=20, burst=1)
+        start = time.time()
+        futures = [self.scheduler.submit(self.QUERY.format(index)) for index in range(5)]
+        for future in futures:
+            future.result()
+
+        self.assertGreaterEqual(time.time() - start, 0.19)
+
+    def test_priority(self):
+        self.fake.duration = 0.1
+        self.scheduler = Scheduler(self.client, slots=1)
+        order = []
+        lock = threading.Lock()
+
+        def record(name):
+            def callback(future):
+                with lock:
+                    order.append(name)
+            return callback
+
+        self.scheduler.submit(self.QUERY.format(0), Scheduler.BACKGROUND).add_done_callback(record("blocker"))
+        time.sleep(0.05)
+        futures = []
+        for index in range(3):
+            futures.append(self.scheduler.submit(self.QUERY.format(index), Scheduler.BACKGROUND))
+            futures[-1].add_done_callback(record("background"))
+        futures.append(self.scheduler.submit(self.QUERY.format(9), Scheduler.INTERACTIVE))
+        futures[-1].add_done_callback(record("interactive"))
+        for future in futures:
+            future.result()
+
+        self.assertEqual(order[:2], ["blocker", "interactive"])
+
+    def test_fairness(self):
+        self.scheduler = Scheduler(self.client, slots=1, weights={Scheduler.INTERACTIVE: 2})
+        order = []
+        with self.scheduler._condition:
+            for index in range(6):
+                future = self.scheduler.submit(self.QUERY.format(index), Scheduler.INTERACTIVE)
+                future.add_done_callback(lambda future: order.append(Scheduler.INTERACTIVE))
+            future = self.scheduler.submit(self.QUERY.format(9), Scheduler.BACKGROUND)
+            future.add_done_callback(lambda future: order.append(Scheduler.BACKGROUND))
+        future.result()
+
+        self.assertEqual(order.index(Scheduler.BACKGROUND), 2)
+
+    def test_metrics(self):
+        self.fake.duration = 0.1
+        self.scheduler = Scheduler(self.client, slots=1)
+        futures = [self.scheduler.submit(self.QUERY.format(index), Scheduler.BACKGROUND) for index in range(3)]
+        time.sleep(0.05)
+        metrics = self.scheduler.metrics()
+
+        self.assertEqual(metrics[Scheduler.BACKGROUND][Scheduler.METRIC_QUEUED], 2)
+        self.assertEqual(metrics[Scheduler.BACKGROUND][Scheduler.METRIC_RUNNING], 1)
+        for future in futures:
+            future.result()
+        metrics = self.scheduler.metrics()
+        self.assertEqual(metrics[Scheduler.BACKGROUND][Scheduler.METRIC_COMPLETED], 3)
+        self.assertEqual(metrics[Scheduler.BACKGROUND][Scheduler.METRIC_QUEUED], 0)
+        self.assertGreater(metrics[Scheduler.BACKGROUND][Scheduler.METRIC_WAIT_MAX], 0.1)
+        self.assertEqual(metrics[Scheduler.INTERACTIVE][Scheduler.METRIC_SUBMITTED], 0)
+
+    def test_failure(self):
+        self.scheduler = Scheduler(self.client, slots=1)
+        future = self.scheduler.submit("SELECT missing FROM `project.dataset.inv`")
+
+        with self.assertRaises(Exception):
+            future.result()
+        self.assertEqual(self.scheduler.metrics()[Scheduler.INTERACTIVE][Scheduler.METRIC_FAILED], 1)
+
+    def test_invalid_priority(self):
+        self.scheduler = Scheduler(self.client, slots=1)
+
+        with self.assertRaises(Exception):
+            self.scheduler.submit(self.QUERY.format(0), "URGENT")
+
+if "__main__" == __name__:
+    unittest.main()
@@ -0,0 +1,164 @@
+from collections import namedtuple
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from sqlbuilder import Composer
+from sqlschema import BigQuerySchemaSource, JSONSchemaSource, SchemaRegistry
+
+SchemaField = namedtuple('SchemaField', 'name field_type mode fields')
+
+class CountingSource(JSONSchemaSource):
+
+    def __init__(self, schemas):
+        super(CountingSource, self).__init__(schemas)
+        self.fetched = []
+
+    def fetch(self, table):
+        self.fetched.append(table)
+        return super(CountingSource, self).fetch(table)
+
+class TestSchemaRegistry(unittest.TestCase):
+
+    TABLE = "datadocs-163219.010ff92f6a62438aa47c10005fe98fc9.inv"
+    SCHEMAS = {
+        TABLE: [
+            {"name": "company", "type": "STRING"},
+            {"name": "category", "type": "STRING"},
+            {"name": "city", "type": "STRING"},
+            {"name": "state", "type": "STRING"},
+            {"name": "raisedAmt", "type": "INTEGER"},
+            {"name": "fundedDate", "type": "DATE"},
+            {"name": "tags", "type": "STRING", "mode": "REPEATED"},
+        ],
+    }
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = CountingSource(self.SCHEMAS)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def definition(self, groups, values, **extra):
+        definition = {"TABLE_NAME": self.TABLE, "GROUP_BY": groups, "VALUES": values}
+        definition.update(extra)
+        path = os.path.join(self.directory, "definition.json")
+        with open(path, "w") as handle:
+            json.dump(definition, handle)
+        return Composer(path)
+
+    def test_valid(self):
+        registry = SchemaRegistry(self.source)
+
+        for name in ["testCase1.json", "testCase8.json"]:
+            self.assertEqual(registry.validate(Composer(os.path.join("config", name))), [])
+        self.assertEqual(self.source.fetched, [self.TABLE])
+
+    def test_missing_field(self):
+        composer = self.definition(
+            [{"Field": "categroy"}],
+            [{"Field": "raisedAmt", "Operation": "SUM"}],
+            WHERE=[{"Field": "sate", "Operator": "=", "Operand": "CA"}]
+        )
+        errors = SchemaRegistry(self.source).validate(composer)
+
+        self.assertEqual(len(errors), 2)
+        self.assertIn("'categroy'", errors[0])
+        self.assertIn("'sate'", errors[1])
+        with self.assertRaises(Exception):
+            SchemaRegistry(self.source).check(composer)
+
+    def test_types(self):
+        composer = self.definition(
+            [{"Field": "category"}],
+            [
+                {"Field": "company", "Operation": "SUM"},
+                {"Field": "tags", "Operation": "ARRAY_AGG"},
+                {"Field": "tags", "Operation": "MAX"},
+                {"Field": "company", "Operation": "COUNT", "Modifier": "DISTINCT"},
+                {"Field": "*", "Operation": "COUNT"},
+            ]
+        )
+        errors = SchemaRegistry(self.source).validate(composer)
+
+        self.assertEqual(len(errors), 3)
+        self.assertIn("numeric", errors[0])
+        self.assertIn("array of arrays", errors[1])
+        self.assertIn("orderable", errors[2])
+
+    def test_date_aggregation(self):
+        composer = self.definition(
+            [{"Field": "fundedDate", "DateAggregation": "MONTH"}, {"Field": "city", "DateAggregation": "YEAR"}],
+            [{"Field": "raisedAmt", "Operation": "MAX", "DateAggregation": "DAY"}]
+        )
+        errors = SchemaRegistry(self.source).validate(composer)
+
+        self.assertEqual(len(errors), 2)
+        self.assertIn("'city'", errors[0])
+        self.assertIn("'raisedAmt'", errors[1])
+
+    def test_cte(self):
+        composer = self.definition(
+            [{"Field": "city"}],
+            [{"Field": "doubled", "Operation": "SUM"}],
+            WITH=[{"Name": "funded", "Table": self.TABLE, "Fields": ["category", "raisedAmt * 2 AS doubled"]}]
+        )
+        composer.table = "funded"
+        errors = SchemaRegistry(self.source).validate(composer)
+
+        self.assertEqual(errors, ["Group field 'city' not found in 'funded'"])
+
+    def test_disk_cache(self):
+        SchemaRegistry(self.source, self.directory).schema(self.TABLE)
+        schema = SchemaRegistry(self.source, self.directory).schema(self.TABLE)
+
+        self.assertEqual(self.source.fetched, [self.TABLE])
+        self.assertEqual(schema["tags"].mode, "REPEATED")
+        self.assertEqual(schema["fundedDate"].type, "DATE")
+
+    def test_expiry(self):
+        registry = SchemaRegistry(self.source, self.directory, ttl=0.05)
+        registry.schema(self.TABLE)
+        time.sleep(0.1)
+        SchemaRegistry(self.source, self.directory, ttl=0.05).schema(self.TABLE)
+        registry.schema(self.TABLE)
+        registry.invalidate(self.TABLE)
+        registry.schema(self.TABLE)
+
+        self.assertEqual(len(self.source.fetched), 3)
+
+    def test_json_file(self):
+        path = os.path.join(self.directory, "schema.json")
+        with open(path, "w") as handle:
+            json.dump(self.SCHEMAS, handle)
+
+        self.assertEqual(JSONSchemaSource(path).fetch(self.TABLE)[4].type, "INTEGER")
+        with self.assertRaises(Exception):
+            JSONSchemaSource(path).fetch("missing")
+        with self.assertRaises(Exception):
+            JSONSchemaSource(os.path.join(self.directory, "missing.json"))
+
+    def test_bigquery_source(self):
+        class Table(object):
+            schema = [
+                SchemaField("id", "INTEGER", "REQUIRED", ()),
+                SchemaField("address", "RECORD", "NULLABLE", (SchemaField("city", "STRING", "NULLABLE", ()),)),
+            ]
+
+        class Client(object):
+            def get_table(self, table):
+                return Table()
+
+        columns = BigQuerySchemaSource(Client()).fetch(self.TABLE)
+
+        self.assertEqual([column.name for column in columns], ["id", "address", "address.city"])
+
+if "__main__" == __name__:
+    unittest.main()
@@ -0,0 +1,135 @@
+import http.client
+import json
+import os
+import sys
+import threading
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from fakeclient import FakeClient
+from query import CommandLine
+from sqlclient import SQLClient
+from sqlservice import ClientPool, QueryServer, QueryService
+
+class TestClientPool(unittest.TestCase):
+
+    def test_reuse(self):
+        created = []
+        pool = ClientPool(lambda: created.append(object()) or created[-1], size=2)
+
+        with pool.client() as first:
+            self.assertEqual(pool.available(), 1)
+        with pool.client() as second:
+            pass
+        self.assertEqual(len(created), 2)
+        self.assertIn(first, created)
+        self.assertEqual(pool.available(), 2)
+
+class TestQueryServer(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+    DEFINITION = {
+        "TABLE_NAME": TABLE,
+        "GROUP_BY": [{"Field": "id", "Sort": -1, "SortDirection": "ASC"}],
+        "VALUES": [{"Field": "id", "Operation": "COUNT"}],
+    }
+
+    def setUp(self):
+        self.fake = FakeClient()
+        self.fake.load(self.TABLE, ["id", "category"], [(index, "web") for index in range(25)])
+        self.service = QueryService(ClientPool(lambda: SQLClient(self.fake), size=2), chunkSize=10)
+        self.server = QueryServer(self.service, port=0).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def request(self, method, path, document=None):
+        connection = http.client.HTTPConnection(*self.server.address)
+        body = None if document is None else json.dumps(document)
+        connection.request(method, path, body, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        lines = response.read().decode("utf-8").splitlines()
+        connection.close()
+        return response, [json.loads(line) for line in lines]
+
+    def rows(self, lines):
+        return [tuple(row) for line in lines if "rows" in line for row in line["rows"]]
+
+    def test_definition(self):
+        response, lines = self.request("POST", "/query", {"definition": self.DEFINITION})
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Transfer-Encoding"), "chunked")
+        self.assertEqual(lines[0]["columns"], ["id", "COUNT(id)"])
+        self.assertFalse(lines[0]["cached"])
+        self.assertEqual(len([line for line in lines if "rows" in line]), 3)
+        self.assertEqual(self.rows(lines), [(index, 1) for index in range(25)])
+        self.assertEqual(lines[-1], {"done": True, "count": 25})
+
+    def test_caches(self):
+        self.request("POST", "/query", {"definition": self.DEFINITION})
+        response, lines = self.request("POST", "/query", {"definition": self.DEFINITION})
+
+        self.assertTrue(lines[0]["cached"])
+        self.assertEqual(len(self.fake.queries), 1)
+        self.assertEqual(len(self.rows(lines)), 25)
+        response, health = self.request("GET", "/health")
+        self.assertEqual(health[0]["results"]["hits"], 1)
+        self.assertEqual(health[0]["definitions"]["hits"], 1)
+        self.assertEqual(health[0]["clients"], 2)
+
+    def test_uncached(self):
+        self.request("POST", "/query", {"sql": "SELECT id FROM `project.dataset.inv`"})
+        response, lines = self.request("POST", "/query", {"sql": "SELECT id FROM `project.dataset.inv`", "cache": False})
+
+        self.assertFalse(lines[0]["cached"])
+        self.assertEqual(len(self.fake.queries), 2)
+
+    def test_compile(self):
+        response, lines = self.request("POST", "/compile", {"definition": self.DEFINITION})
+
+        self.assertEqual(lines[0]["sql"], "SELECT id, COUNT(id) FROM `project.dataset.inv` GROUP BY id ORDER BY id ASC")
+        self.assertEqual(self.fake.queries, [])
+
+    def test_errors(self):
+        response, lines = self.request("POST", "/query", {"sql": "SELECT missing FROM `project.dataset.inv`"})
+        self.assertEqual(response.status, 400)
+        self.assertIn("missing", lines[0]["error"])
+
+        response, lines = self.request("POST", "/query", {})
+        self.assertEqual(response.status, 400)
+
+        response, lines = self.request("GET", "/unknown")
+        self.assertEqual(response.status, 404)
+        self.assertEqual(self.service.pool.available(), 2)
+
+    def test_concurrent(self):
+        results = {}
+
+        def run(index):
+            response, lines = self.request("POST", "/query", {"sql": "SELECT id FROM `project.dataset.inv` WHERE id < {}".format(index)})
+            results[index] = len(self.rows(lines))
+
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(1, 11)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, dict((index, index) for index in range(1, 11)))
+        self.assertEqual(self.service.pool.available(), 2)
+
+    def test_command_line(self):
+        command = CommandLine(SQLClient(self.fake))
+        arguments = command.parser().parse_args(["serve", "--port", "0", "--clients", "1", "--ttl", "5"])
+        server = command.server(arguments).start()
+        self.server.stop()
+        self.server = server
+
+        response, lines = self.request("POST", "/query", {"definition": self.DEFINITION})
+        self.assertEqual(len(self.rows(lines)), 25)
+        self.assertEqual(server.service.results.ttl, 5.0)
+
+if "__main__" == __name__:
+    unittest.main()
@@ -0,0 +1,88 @@
+import datetime
+import multiprocessing
+import os
+import pickle
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from fakeclient import FakeClient
+from sqlclient import SQLClient
+from sqlshared import SharedColumn, SharedResult
+
+def score(table, start, stop):
+    values = table.column("raisedAmt").values
+    return sum(values[start:stop])
+
+def categories(table):
+    return sorted(set(table.column("category")))
+
+class TestSharedResult(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+    QUERY = "SELECT id, category, raisedAmt FROM `project.dataset.inv` ORDER BY id"
+    RECORDS = [(index, "web" if index % 3 else "mobile", index * 10) for index in range(3000)]
+
+    def setUp(self):
+        self.fake = FakeClient()
+        self.fake.load(self.TABLE, ["id", "category", "raisedAmt"], self.RECORDS)
+        self.client = SQLClient(self.fake)
+        self.client.query(self.QUERY)
+
+    def test_attach(self):
+        with self.client.share() as shared:
+            with SharedResult.attach(shared.handle) as table:
+                self.assertEqual(table.columns, ["id", "category", "raisedAmt"])
+                self.assertEqual(len(table), 3000)
+                self.assertEqual(table[4], self.RECORDS[4])
+                self.assertEqual(list(table), self.RECORDS)
+                self.assertEqual(table.column("raisedAmt").kind, SharedColumn.KIND_INTEGER)
+                self.assertEqual(table.column("raisedAmt").values.format, "q")
+                self.assertEqual(table.column("category").kind, SharedColumn.KIND_STRING)
+        self.assertTrue(shared.released)
+
+    def test_kinds(self):
+        records = [(1, 0.5, "Zürich", datetime.date(2020, 1, 1), True), (None, None, None, None, False)]
+        with SharedResult.publish(["a", "b", "c", "d", "e"], records) as shared:
+            with SharedResult.attach(shared.handle) as table:
+                self.assertEqual(list(table), records)
+                self.assertEqual(table.column("d").kind, SharedColumn.KIND_OBJECT)
+
+    def test_empty(self):
+        with SharedResult.publish(["a"], []) as shared:
+            with SharedResult.attach(shared.handle) as table:
+                self.assertEqual(list(table), [])
+
+    def test_handle(self):
+        with self.client.share() as shared:
+            self.assertLess(len(pickle.dumps(shared.handle)), len(pickle.dumps(self.RECORDS)) // 20)
+
+    def test_pool(self):
+        shared = self.client.share()
+        with multiprocessing.Pool(2) as pool:
+            totals = shared.map(pool, score, [(start, start + 1000) for start in range(0, 3000, 1000)])
+            self.assertEqual(shared.submit(pool, categories).get(), ["mobile", "web"])
+        self.assertEqual(sum(totals), sum(record[2] for record in self.RECORDS))
+        self.assertEqual(shared.references, 1)
+
+        shared.close()
+        self.assertTrue(shared.wait(1))
+        with self.assertRaises(FileNotFoundError):
+            SharedResult.attach(shared.handle)
+
+    def test_refcount(self):
+        shared = self.client.share()
+        handle = shared.acquire()
+        shared.close()
+        self.assertFalse(shared.released)
+
+        with SharedResult.attach(handle) as table:
+            self.assertEqual(table[0], self.RECORDS[0])
+        shared.release()
+        self.assertTrue(shared.released)
+        with self.assertRaises(Exception):
+            shared.acquire()
+
+if "__main__" == __name__:
+    unittest.main()
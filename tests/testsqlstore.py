@@ -0,0 +1,90 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from fakeclient import FakeClient
+from sqlclient import SQLClient
+import sqlstore
+from sqlstore import ResultStore
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_whitespace(self):
+        self.assertEqual(
+            ResultStore.fingerprint("SELECT a\n  FROM `t`"),
+            ResultStore.fingerprint("SELECT a FROM `t` ")
+        )
+
+    def test_literals(self):
+        self.assertNotEqual(
+            ResultStore.fingerprint("SELECT a FROM `t` WHERE x = 'a  b'"),
+            ResultStore.fingerprint("SELECT a FROM `t` WHERE x = 'a b'")
+        )
+        self.assertNotEqual(
+            ResultStore.fingerprint('SELECT a FROM `t` WHERE x = "it\\"s  b"'),
+            ResultStore.fingerprint('SELECT a FROM `t` WHERE x = "it\\"s b"')
+        )
+        self.assertEqual(
+            ResultStore.fingerprint("SELECT a\n  FROM `t` WHERE x = 'a  b'"),
+            ResultStore.fingerprint("SELECT a FROM `t`  WHERE x = 'a  b'")
+        )
+
+    def test_distinct(self):
+        self.assertNotEqual(
+            ResultStore.fingerprint("SELECT a FROM `t`"),
+            ResultStore.fingerprint("SELECT b FROM `t`")
+        )
+
+
+@unittest.skipIf(sqlstore.pyarrow is None, "pyarrow not installed")
+class TestResultStore(unittest.TestCase):
+
+    TABLE = "project.dataset.inv"
+    QUERY = "SELECT category, raisedAmt FROM `project.dataset.inv`"
+    RECORDS = [("web", 100), ("mobile", 10), ("web", 25)]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fake = FakeClient()
+        self.fake.load(self.TABLE, ["category", "raisedAmt"], self.RECORDS)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def check(self, format, compression):
+        store = ResultStore(self.directory, format=format, compression=compression)
+        client = SQLClient(self.fake, store=store)
+        client.query(self.QUERY)
+
+        self.assertIn(self.QUERY, store)
+        self.assertEqual(store.records(self.QUERY), self.RECORDS)
+        self.assertEqual(
+            store.records(self.QUERY, columns=["raisedAmt"], filters=[("category", "=", "web")]),
+            [(100,), (25,)]
+        )
+
+        restored = SQLClient(self.fake, store=store)
+        queries = len(self.fake.queries)
+        restored.query(self.QUERY)
+        self.assertEqual(len(self.fake.queries), queries)
+        self.assertEqual(restored.fetchall(), self.RECORDS)
+        self.assertEqual(restored.columns, ["category", "raisedAmt"])
+
+    def test_parquet(self):
+        self.check(ResultStore.FORMAT_PARQUET, ResultStore.COMPRESSION)
+
+    def test_feather(self):
+        self.check(ResultStore.FORMAT_FEATHER, ResultStore.UNCOMPRESSED)
+
+    def test_missing(self):
+        store = ResultStore(self.directory)
+
+        self.assertIsNone(store.load(self.QUERY))
+
+
+if "__main__" == __name__:
+    unittest.main()